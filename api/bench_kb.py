@@ -0,0 +1,142 @@
+"""
+知识库微基准测试
+在合成知识库（见 api/synthetic_kb.py）上分别测量加载、引用检查、树构建、路径查找和序列化的耗时
+
+用法:
+    python api/bench_kb.py [--sizes 100,1000,10000] [--repeat 3] [-o bench_kb.json]
+
+每项测量重复 repeat 次取最小值，结果以 JSON 写入输出文件（每个规模、每个测量一条记录）
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.data_loader import DataLoader
+from src.utils.reference_checker import ReferenceChecker
+from src.utils.tree_builder import TreeBuilder
+from api.serializers import tree_node_to_dict
+from api.synthetic_kb import SyntheticSpec, generate
+
+PATH_LOOKUPS = 1000  # 每次测量查找的路径数量
+
+
+def _best(func: Callable[[], None], repeat: int) -> float:
+    """重复执行取最短耗时（秒）"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _record(size: int, name: str, seconds: float, ops: int) -> Dict:
+    return {
+        "size": size,
+        "benchmark": name,
+        "seconds": round(seconds, 6),
+        "ops": ops,
+        "usPerOp": round(seconds / ops * 1e6, 3) if ops else None
+    }
+
+
+def bench_size(spec: SyntheticSpec, repeat: int) -> List[Dict]:
+    """在一个规模的合成知识库上运行所有测量"""
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        generate(spec, data_dir)
+
+        def load():
+            loader = DataLoader(data_dir)
+            loader.load_all_issues()
+            return loader
+
+        results.append(_record(spec.issues, "load_all_issues", _best(load, repeat), spec.issues))
+        loader = load()
+        names = list(loader.issues)
+
+        def check_references():
+            checker = ReferenceChecker(loader.data_dir, loader.all_yml_files, loader.issues)
+            checker.check_invalid_references()
+            checker.find_orphan_issues()
+
+        results.append(_record(spec.issues, "reference_checker", _best(check_references, repeat), spec.issues))
+
+        trees = {}
+
+        def build_trees():
+            # 每次使用新的树构建器，测量冷构建
+            builder = TreeBuilder(loader)
+            for name in names:
+                trees[name] = builder.build_complete_tree(name)
+
+        results.append(_record(spec.issues, "build_complete_tree", _best(build_trees, repeat), len(names)))
+
+        rng = random.Random(spec.seed)
+        lookups = []
+        for _ in range(PATH_LOOKUPS):
+            node = trees[rng.choice(names)]
+            while node.children and rng.random() < 0.8:
+                node = rng.choice(node.children)
+            lookups.append((trees[node.original_path[0]], node.original_path))
+        builder = TreeBuilder(loader)
+
+        def find_paths():
+            for tree, path in lookups:
+                builder.find_node_by_path(tree, path)
+
+        results.append(_record(spec.issues, "find_node_by_path", _best(find_paths, repeat), len(lookups)))
+
+        def serialize():
+            for tree in trees.values():
+                tree_node_to_dict(tree)
+
+        results.append(_record(spec.issues, "tree_node_to_dict", _best(serialize, repeat), len(trees)))
+
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="知识库微基准测试")
+    parser.add_argument("--sizes", default="100,1000,10000", help="问题数量，逗号分隔（默认 100,1000,10000）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量的重复次数（默认 3）")
+    parser.add_argument("--depth", type=int, default=SyntheticSpec.depth, help="检查项层数")
+    parser.add_argument("--branching", type=int, default=SyntheticSpec.branching, help="每个检查项的子项数量")
+    parser.add_argument("--seed", type=int, default=SyntheticSpec.seed, help="随机种子")
+    parser.add_argument("-o", "--output", default="bench_kb.json", help="结果文件（默认 bench_kb.json）")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(",")):
+        spec = SyntheticSpec(issues=size, depth=args.depth, branching=args.branching, seed=args.seed)
+        for record in bench_size(spec, args.repeat):
+            results.append(record)
+            print(f"{record['size']:>7}  {record['benchmark']:<22}{record['seconds']:>12.4f}s"
+                  f"{record['usPerOp']:>14.1f}us/op", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "generatedAt": time.time(),
+        "params": {"depth": args.depth, "branching": args.branching, "seed": args.seed, "repeat": args.repeat},
+        "results": results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
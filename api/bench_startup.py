@@ -0,0 +1,121 @@
+"""
+启动耗时基准测试
+
+测量三项指标（每项重复多次取中位数）：
+- import: 新进程中 `import api.main` 的耗时（不加载知识库）
+- first_200: 启动 uvicorn 到 `GET /` 第一次返回 200 的耗时
+- ready: 启动 uvicorn 到 `GET /api/issues/summary` 第一次返回 200 的耗时（知识库已加载，可以正常服务）
+
+用法:
+    python api/bench_startup.py [--runs 5] [--json] [--max-import-ms 600]
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+project_root = Path(__file__).parent.parent
+
+_IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import api.main
+print(time.perf_counter() - started)
+"""
+
+
+def measure_import() -> float:
+    """在新进程中测量导入 api.main 的耗时（秒）"""
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET], cwd=project_root, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_200(url: str, started: float, deadline: float) -> float:
+    """轮询直到 url 返回 200，返回从 started 开始的耗时（秒）"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{url} 未在规定时间内返回 200")
+
+
+def measure_server(timeout: float = 60.0) -> Dict[str, float]:
+    """启动 uvicorn 并测量第一次返回 200 和可以正常服务的耗时（秒）"""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=project_root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        first_200 = _wait_for_200(f"{base}/", started, deadline)
+        ready = _wait_for_200(f"{base}/api/issues/summary", started, deadline)
+        return {"first_200": first_200, "ready": ready}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def run(runs: int) -> Dict[str, Dict[str, float]]:
+    """重复测量，返回每项指标的中位数、最小值和最大值（毫秒）"""
+    samples: Dict[str, List[float]] = {"import": [], "first_200": [], "ready": []}
+    for _ in range(runs):
+        samples["import"].append(measure_import())
+        for name, seconds in measure_server().items():
+            samples[name].append(seconds)
+
+    return {
+        name: {
+            "median_ms": round(statistics.median(values) * 1000, 1),
+            "min_ms": round(min(values) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1)
+        }
+        for name, values in samples.items()
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="api.main 启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数（默认 5）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="导入耗时中位数超过该值时返回非零退出码")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f"{'指标':<12}{'中位数(ms)':>12}{'最小(ms)':>12}{'最大(ms)':>12}")
+        for name, values in results.items():
+            print(f"{name:<12}{values['median_ms']:>12}{values['min_ms']:>12}{values['max_ms']:>12}")
+
+    if args.max_import_ms is not None and results["import"]["median_ms"] > args.max_import_ms:
+        print(f"导入耗时 {results['import']['median_ms']}ms 超过 {args.max_import_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+知识库命令行工具
+
+用法:
+    python api/cli.py export [--form expanded|normalized] [--granularity issue|node] [-o 输出文件]
+    python api/cli.py build-static -o 输出目录 [--keep 保留版本数]
+    python api/cli.py compile -o 快照文件 [--strict]
+    python api/cli.py generate -o 输出目录 [--issues 1000] [--depth 2] [--branching 3] ...
+    python api/cli.py memory [--top 20] [--sort treeBytes] [--json]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.knowledge_base import KnowledgeBase, write_snapshot
+from src.utils.logging_setup import setup_logging
+from api.export import EXPORT_FORMS, EXPORT_GRANULARITIES, iter_export_records, iter_ndjson
+from src.utils.memory_report import SORT_KEYS as MEMORY_SORT_KEYS, build_memory_report
+from api.serializers import catalog_to_summary_json, dumps_json, tree_node_to_dict
+from api.static_bundle import write_static_bundle
+from api.synthetic_kb import SyntheticSpec, generate
+
+
+def _load(data_dir: str):
+    """加载知识库（加载日志写到 stderr，不会混入导出数据）"""
+    knowledge_base = KnowledgeBase(data_dir=data_dir, summary_renderer=catalog_to_summary_json)
+    return knowledge_base.load()
+
+
+def cmd_export(args) -> int:
+    """导出 NDJSON"""
+    snapshot = _load(args.data_dir)
+    chunks = iter_ndjson(iter_export_records(snapshot, args.form, args.granularity))
+
+    if args.output == "-":
+        out = sys.stdout.buffer
+        for chunk in chunks:
+            out.write(chunk)
+        out.flush()
+    else:
+        with open(args.output, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        print(f"已导出到 {args.output}（版本 {snapshot.version}）", file=sys.stderr)
+    return 0
+
+
+def cmd_build_static(args) -> int:
+    """预渲染静态 API 目录"""
+    snapshot = _load(args.data_dir)
+    version_dir = write_static_bundle(snapshot, args.output, keep=args.keep)
+    print(f"已生成静态 API {version_dir}（版本 {snapshot.version}）", file=sys.stderr)
+    return 0
+
+
+def cmd_compile(args) -> int:
+    """校验数据并编译为快照文件，有错误时（--strict 时包括警告）返回非零退出码且不写入文件"""
+    snapshot = _load(args.data_dir)
+    errors, warnings = snapshot.data_loader.get_problems()
+    for message in errors:
+        print(f"错误: {message}", file=sys.stderr)
+    for message in warnings:
+        print(f"警告: {message}", file=sys.stderr)
+
+    if errors or (args.strict and warnings):
+        print(f"编译失败：{len(errors)} 个错误，{len(warnings)} 个警告", file=sys.stderr)
+        return 1
+
+    header = write_snapshot(snapshot, args.output)
+    print(
+        f"已编译到 {args.output}（版本 {header['version']}，{header['issueCount']} 个问题，"
+        f"{header['payloadBytes']} 字节，{len(warnings)} 个警告）",
+        file=sys.stderr
+    )
+    return 0
+
+
+def cmd_generate(args) -> int:
+    """生成合成知识库"""
+    spec = SyntheticSpec(
+        issues=args.issues, depth=args.depth, branching=args.branching, refer_targets=args.refer_targets,
+        refer_fan_in=args.refer_fan_in, cycles=args.cycles, broken_refs=args.broken_refs, seed=args.seed
+    )
+    summary = generate(spec, args.output)
+    print(f"已生成 {summary['files']} 个问题、{summary['checklistItems']} 个检查项、{summary['refers']} 个引用到 {args.output}",
+          file=sys.stderr)
+    return 0
+
+
+def cmd_memory(args) -> int:
+    """统计知识库内存占用"""
+    snapshot = _load(args.data_dir)
+    report = build_memory_report(snapshot, lambda tree: dumps_json(tree_node_to_dict(tree)), args.top, args.sort)
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+
+    totals = report["totals"]
+    print(f"版本 {report['version']}，{totals['issues']} 个问题，统计耗时 {report['durationMs']}ms")
+    print(f"原始数据 {_kib(totals['rawBytes'])}，展开后 {totals['expandedNodes']} 个节点 {_kib(totals['treeBytes'])}，"
+          f"序列化 {_kib(totals['serializedBytes'])}")
+    print(f"{'问题':<24}{'检查项':>8}{'原始':>12}{'节点':>8}{'展开':>12}{'序列化':>12}")
+    for row in report["issues"]:
+        print(f"{row['issue']:<24}{row['rawItems']:>8}{_kib(row['rawBytes']):>12}{row['expandedNodes']:>8}"
+              f"{_kib(row['treeBytes']):>12}{_kib(row['serializedBytes']):>12}")
+    return 0
+
+
+def _kib(size: int) -> str:
+    return f"{size / 1024:.1f}KiB"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="运维知识库命令行工具")
+    parser.add_argument("--data-dir", default="data", help="YAML 数据目录（默认 data）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export = subparsers.add_parser("export", help="以 NDJSON 导出整个知识库")
+    export.add_argument("--form", choices=EXPORT_FORMS, default="expanded",
+                        help="expanded 展开 refer 引用；normalized 引用只输出占位节点")
+    export.add_argument("--granularity", choices=EXPORT_GRANULARITIES, default="issue",
+                        help="issue 每个问题一行；node 每个节点一行")
+    export.add_argument("-o", "--output", default="-", help="输出文件（默认输出到标准输出）")
+    export.set_defaults(func=cmd_export)
+
+    build_static = subparsers.add_parser("build-static", help="预渲染只读接口为静态 JSON（供 nginx 直接返回）")
+    build_static.add_argument("-o", "--output", required=True, help="输出目录")
+    build_static.add_argument("--keep", type=int, default=3, help="保留的历史版本数（默认 3）")
+    build_static.set_defaults(func=cmd_build_static)
+
+    compile_ = subparsers.add_parser("compile", help="校验数据并编译为快照文件（供 KB_SNAPSHOT_FILE 只读加载）")
+    compile_.add_argument("-o", "--output", required=True, help="输出的快照文件")
+    compile_.add_argument("--strict", action="store_true", help="有警告（信息不完整的文件、孤立问题）时同样失败")
+    compile_.set_defaults(func=cmd_compile)
+
+    defaults = SyntheticSpec()
+    generate_ = subparsers.add_parser("generate", help="生成合成知识库（用于基准测试，相同参数生成相同文件）")
+    generate_.add_argument("-o", "--output", required=True, help="输出目录")
+    generate_.add_argument("--issues", type=int, default=defaults.issues, help="问题数量")
+    generate_.add_argument("--depth", type=int, default=defaults.depth, help="检查项层数")
+    generate_.add_argument("--branching", type=int, default=defaults.branching, help="每个检查项的子项数量")
+    generate_.add_argument("--refer-targets", type=float, default=defaults.refer_targets, help="被引用的公共问题比例")
+    generate_.add_argument("--refer-fan-in", type=int, default=defaults.refer_fan_in, help="每个公共问题被引用的次数")
+    generate_.add_argument("--cycles", type=int, default=defaults.cycles, help="循环引用对数")
+    generate_.add_argument("--broken-refs", type=int, default=defaults.broken_refs, help="无效引用数量")
+    generate_.add_argument("--seed", type=int, default=defaults.seed, help="随机种子")
+    generate_.set_defaults(func=cmd_generate)
+
+    memory = subparsers.add_parser("memory", help="统计每个问题展开前后和序列化后的内存占用")
+    memory.add_argument("--top", type=int, default=20, help="输出占用最多的问题数量（0 表示全部，默认 20）")
+    memory.add_argument("--sort", choices=MEMORY_SORT_KEYS, default="treeBytes", help="排序字段（默认 treeBytes）")
+    memory.add_argument("--json", action="store_true", help="以 JSON 输出完整报告")
+    memory.set_defaults(func=cmd_memory)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    setup_logging()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+pytest 公共配置
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def started_app():
+    """所有测试共用一次启动（与 lifespan 相同：加载知识库，创建会话存储和线程池）"""
+    from api import main
+
+    main.startup()
+    yield main
@@ -0,0 +1,139 @@
+"""
+知识库版本变化推送（Server-Sent Events）
+每次发布新快照后，向所有连接的客户端推送新版本号和发生变化的问题，
+空闲连接只是一个等待中的协程，定期发送注释行保持连接
+"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, List, Optional, Tuple
+
+from src.utils.knowledge_base import KnowledgeSnapshot
+
+
+@dataclass(frozen=True)
+class VersionEvent:
+    """一次版本变化"""
+    version: str
+    loaded_at: float
+    changed_issues: Tuple[str, ...]  # 与上一个版本相比发生变化的问题
+
+
+class VersionBroadcaster:
+    """把快照发布通知广播给本进程中所有的 SSE 连接"""
+
+    def __init__(self, history_size: int = 32, keepalive: float = 15.0, retry_ms: int = 3000):
+        """
+        Args:
+            history_size: 保留的最近版本数，客户端断线重连时据此补发断线期间的变化
+            keepalive: 没有事件时发送保活注释的间隔（秒）
+            retry_ms: 建议客户端断线后的重连间隔（毫秒）
+        """
+        self.keepalive = keepalive
+        self.retry_ms = retry_ms
+        self._history: Deque[VersionEvent] = deque(maxlen=history_size)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock = threading.Lock()
+        self._clients = 0
+
+    @property
+    def clients(self) -> int:
+        """当前连接数"""
+        return self._clients
+
+    def bind(self, loop: asyncio.AbstractEventLoop, snapshot: KnowledgeSnapshot):
+        """绑定推送所在的事件循环，并以当前快照作为起始版本（重复调用时只在事件循环变化时生效）"""
+        with self._lock:
+            if self._loop is loop:
+                return
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            if not self._history or self._history[-1].version != snapshot.version:
+                if not self._history and snapshot.previous_version:
+                    # 由主进程重新加载后 fork 的工作进程：记下上一个版本，
+                    # 从旧工作进程断开重连的客户端仍能只获取变化的问题
+                    self._history.append(VersionEvent(snapshot.previous_version, 0.0, ()))
+                self._history.append(self._to_event(snapshot))
+
+    def notify_threadsafe(self, snapshot: KnowledgeSnapshot):
+        """快照发布回调（在重新加载线程中调用），把通知转交给事件循环"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(self._publish, self._to_event(snapshot))
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+
+    def changes_since(self, version: Optional[str]) -> Optional[List[str]]:
+        """
+        指定版本之后发生变化的问题
+
+        Returns:
+            变化的问题列表；版本已不在历史记录中时返回 None（客户端需要全部重新获取）
+        """
+        changed = set()
+        # 从最新的版本往前找（内容改回去后同一版本号可能出现多次）
+        for event in reversed(self._history):
+            if event.version == version:
+                return sorted(changed)
+            changed.update(event.changed_issues)
+        return None
+
+    async def stream(self, last_seen: Optional[str]) -> AsyncIterator[str]:
+        """
+        一个客户端的事件流
+
+        Args:
+            last_seen: 客户端已知的版本（Last-Event-ID），为空时先推送当前版本作为起点
+        """
+        self._clients += 1
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            while True:
+                wakeup = self._wakeup
+                latest = self._history[-1]
+                if latest.version != last_seen:
+                    yield self._format(latest, last_seen)
+                    last_seen = latest.version
+                    continue
+
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+        finally:
+            self._clients -= 1
+
+    def _publish(self, event: VersionEvent):
+        """在事件循环中记录新版本并唤醒所有连接"""
+        if self._history and self._history[-1].version == event.version:
+            return
+        self._history.append(event)
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    def _format(self, latest: VersionEvent, last_seen: Optional[str]) -> str:
+        """格式化为 SSE 消息（事件 ID 为版本号，断线重连时浏览器会通过 Last-Event-ID 带回）"""
+        if last_seen is None:
+            changed, full = [], False  # 首次连接，只告知当前版本
+        else:
+            changed = self.changes_since(last_seen)
+            full = changed is None
+        data = json.dumps({
+            "version": latest.version,
+            "previousVersion": last_seen,
+            "loadedAt": latest.loaded_at,
+            "changedIssues": changed or [],
+            "full": full
+        }, ensure_ascii=False, separators=(",", ":"))
+        return f"id: {latest.version}\nevent: version\ndata: {data}\n\n"
+
+    @staticmethod
+    def _to_event(snapshot: KnowledgeSnapshot) -> VersionEvent:
+        return VersionEvent(snapshot.version, snapshot.loaded_at, snapshot.changed_issues)
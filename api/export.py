@@ -0,0 +1,113 @@
+"""
+知识库 NDJSON 导出
+以生成器逐条产出记录（每个问题或每个节点一行），每次只构建一个问题的树且不写入树缓存，
+内存占用只与最大的单个问题有关，与知识库大小无关
+"""
+
+import time
+from typing import Any, Dict, Iterable, Iterator
+
+from src.utils.knowledge_base import KnowledgeSnapshot
+from src.models.checklist import TreeChecklistItem
+from api.serializers import tree_node_to_dict, tree_node_to_normalized_dict, tree_node_to_flat_dict, dumps_json
+
+# expanded: refer 引用展开为完整子树；normalized: refer 引用只输出占位节点（referTo），被引用问题单独导出
+EXPORT_FORMS = ("expanded", "normalized")
+# issue: 每个问题一条记录（包含整棵树）；node: 每个节点一条记录（带 parentId 和 depth）
+EXPORT_GRANULARITIES = ("issue", "node")
+
+
+def iter_export_records(snapshot: KnowledgeSnapshot, form: str = "expanded",
+                        granularity: str = "issue") -> Iterator[Dict[str, Any]]:
+    """
+    逐条产出导出记录，第一条为 meta 记录，最后一条为 end 记录（没有 end 记录说明导出被中断）
+
+    Args:
+        snapshot: 导出的知识库快照（导出过程中重新加载不影响本次导出）
+        form: expanded 或 normalized
+        granularity: issue 或 node
+
+    Yields:
+        可 JSON 序列化的字典
+    """
+    if form not in EXPORT_FORMS:
+        raise ValueError(f"form 必须是 {' / '.join(EXPORT_FORMS)} 之一")
+    if granularity not in EXPORT_GRANULARITIES:
+        raise ValueError(f"granularity 必须是 {' / '.join(EXPORT_GRANULARITIES)} 之一")
+
+    entries = snapshot.catalog.entries
+    yield {
+        "type": "meta",
+        "version": snapshot.version,
+        "form": form,
+        "granularity": granularity,
+        "issueCount": len(entries),
+        "exportedAt": time.time()
+    }
+
+    issue_count = 0
+    record_count = 0
+    for name, entry in entries.items():
+        tree = snapshot.tree_builder.build_uncached_tree(name)
+        if not tree:
+            continue
+
+        issue_count += 1
+        if granularity == "issue":
+            record_count += 1
+            yield {
+                "type": "issue",
+                "issue": name,
+                "display": entry.issue.display,
+                "tree": tree_node_to_dict(tree) if form == "expanded"
+                else tree_node_to_normalized_dict(tree, {}, lambda _name: None)
+            }
+        else:
+            for record in _iter_node_records(name, tree, normalized=form == "normalized"):
+                record_count += 1
+                yield record
+
+    yield {"type": "end", "issueCount": issue_count, "recordCount": record_count}
+
+
+def _iter_node_records(issue_name: str, tree: TreeChecklistItem, normalized: bool) -> Iterator[Dict[str, Any]]:
+    """先序遍历逐个产出节点记录"""
+    stack = [(tree, None, 0)]
+    while stack:
+        node, parent_id, depth = stack.pop()
+        stop = normalized and node.is_refer
+        record = {
+            "type": "node",
+            "issue": issue_name,
+            "parentId": parent_id,
+            "depth": depth,
+            **tree_node_to_flat_dict(node),
+            "childCount": 0 if stop else len(node.children)
+        }
+        node_id = record["id"]
+        if stop:
+            record["referTo"] = node.status
+        yield record
+
+        if not stop:
+            for child in reversed(node.children):
+                stack.append((child, node_id, depth + 1))
+
+
+def iter_ndjson(records: Iterable[Dict[str, Any]], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    将记录编码为 NDJSON，按大约 chunk_size 字节分块产出
+
+    Args:
+        records: 导出记录
+        chunk_size: 每块的目标大小（字节），减少大量小节点记录时的写入次数
+    """
+    buffer = bytearray()
+    for record in records:
+        buffer += dumps_json(record)
+        buffer += b"\n"
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
@@ -0,0 +1,67 @@
+"""
+Gunicorn 多进程部署配置（仅支持 Linux/Mac）
+
+用法: gunicorn -c api/gunicorn_conf.py api.main:app
+
+- preload_app: 在主进程中加载一次知识库，fork 后各工作进程以写时复制方式共享
+- KB_RELOAD_VIA_MASTER: 工作进程收到重新加载请求后通知主进程（HUP），主进程重新加载后
+  fork 新的工作进程并平滑替换旧进程，所有工作进程同时切换到新版本并继续共享同一份数据
+- KB_PREWARM: 在主进程中预先构建所有问题树，工作进程启动后无需冷构建
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("API_BIND", "0.0.0.0:8000")
+# 环境变量为空时使用默认值
+workers = int(os.environ.get("API_WORKERS") or max(2, multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = int(os.environ.get("API_WORKER_TIMEOUT") or 60)
+
+# 必须在加载 api.main 之前设置，加载时读取
+os.environ.setdefault("KB_RELOAD_VIA_MASTER", "1")
+os.environ.setdefault("KB_PREWARM", "1")
+
+
+def when_ready(server):
+    """在主进程中加载知识库（fork 之前），并冻结现有对象，避免垃圾回收触发写时复制"""
+    from api.main import load_knowledge_base
+    from src.utils.logging_setup import setup_logging
+
+    # 主进程中配置一次，fork 出的工作进程会重新创建日志输出线程
+    setup_logging()
+    load_knowledge_base()
+    gc.freeze()
+    server.log.info("知识库已加载，启动 %s 个工作进程", workers)
+
+
+def on_reload(server):
+    """
+    收到 HUP 后在主进程中重新加载知识库
+
+    之后 gunicorn 用新数据 fork 出新的工作进程，并平滑关闭旧的工作进程。
+    加载失败时保留旧快照，新工作进程继续使用旧版本
+    """
+    from api.main import clear_master_reload_marker, knowledge_base
+
+    try:
+        snapshot = knowledge_base.load()
+    except Exception as e:
+        server.log.error("重新加载知识库失败，继续使用版本 %s: %s", knowledge_base.snapshot.version, e)
+        return
+    finally:
+        # 加载期间工作进程收到的重新加载请求已合并到本次，完成后才允许再次通知
+        clear_master_reload_marker()
+
+    # 回收旧快照（已被冻结的对象不参与垃圾回收），再冻结新快照
+    gc.unfreeze()
+    gc.collect()
+    gc.freeze()
+    server.log.info("知识库已重新加载 (版本: %s, 变化的问题: %s)", snapshot.version, len(snapshot.changed_issues))
+
+
+def post_fork(server, worker):
+    """工作进程启动后打印进程信息"""
+    server.log.info("工作进程已启动 (pid: %s)", worker.pid)
@@ -0,0 +1,297 @@
+"""
+HTTP 负载测试
+在进程内（httpx + ASGI）或对本地启动的 uvicorn 混合并发请求问题列表、问题摘要、问题树和重新加载接口，
+报告吞吐量和 p50 / p95 / p99 延迟，并检查是否有响应看到了重新加载到一半的知识库
+
+数据目录先复制（或生成合成数据）到临时目录，重新加载前修改其中的探针问题，不修改原数据：
+- 同一版本（X-KB-Version）下同一接口的响应内容必须完全相同
+- 探针问题的代数在问题摘要和问题树中必须与响应头中的版本一一对应
+
+用法:
+    python api/loadtest.py [--duration 10] [--concurrency 32] [--synthetic 1000] [--launch] [--json]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+import httpx
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+PROBE_ISSUE = "压测探针"
+PROBE_FILE = "_loadtest_probe.yml"
+DEFAULT_MIX = "issues=30,summary=20,tree=45,reload=5"
+
+
+def write_probe(data_dir: Path, generation: int):
+    """写入探针问题（描述和检查项标题中带有代数）"""
+    (data_dir / PROBE_FILE).write_text("\n".join([
+        f'status: "{PROBE_ISSUE}"',
+        f'describe: "代数 {generation}"',
+        "priority: 10",
+        'version: "-"',
+        "display: true",
+        "checklist:",
+        f'  - status: "代数{generation}"',
+        '    describe: "负载测试探针"',
+        "    priority: 5",
+        '    version: "-"',
+        '    todo: "无需处理"'
+    ]) + "\n", encoding="utf-8")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(round(pct * len(sorted_values) / 100, 9))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+@dataclass
+class LoadReport:
+    """负载测试结果"""
+    elapsed: float = 0.0
+    latencies: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    statuses: Dict[str, Dict[int, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    bodies: Dict[Tuple[str, str], Set[str]] = field(default_factory=lambda: defaultdict(set))  # (版本, 请求) -> 响应摘要
+    generations: Dict[str, Set[int]] = field(default_factory=lambda: defaultdict(set))  # 版本 -> 探针代数
+    reloads: int = 0
+
+    def record(self, kind: str, seconds: float, status: int):
+        self.latencies[kind].append(seconds)
+        self.statuses[kind][status] += 1
+
+    def inconsistencies(self) -> List[str]:
+        """同一版本出现不同内容，或同一版本对应多个探针代数"""
+        problems = [
+            f"版本 {version} 的 {request} 返回了 {len(digests)} 种不同的内容"
+            for (version, request), digests in self.bodies.items() if len(digests) > 1
+        ]
+        problems.extend(
+            f"版本 {version} 同时对应探针代数 {sorted(generations)}"
+            for version, generations in self.generations.items() if len(generations) > 1
+        )
+        return problems
+
+    def errors(self) -> int:
+        """非 200 响应数"""
+        return sum(count for by_status in self.statuses.values() for status, count in by_status.items() if status != 200)
+
+    def to_dict(self) -> Dict:
+        total = sum(len(values) for values in self.latencies.values())
+        routes = {}
+        for kind, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            routes[kind] = {
+                "requests": len(values),
+                "statuses": {str(status): count for status, count in sorted(self.statuses[kind].items())},
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2)
+            }
+        return {
+            "elapsed_s": round(self.elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / self.elapsed, 1) if self.elapsed else 0.0,
+            "errors": self.errors(),
+            "reloads": self.reloads,
+            "versions": len(self.generations),
+            "inconsistencies": self.inconsistencies(),
+            "routes": routes
+        }
+
+
+class LoadRunner:
+    """按比例混合发送请求的并发客户端"""
+
+    def __init__(self, client: httpx.AsyncClient, data_dir: Path, mix: Dict[str, int], seed: int = 0):
+        self.client = client
+        self.data_dir = data_dir
+        self.kinds = list(mix)
+        self.weights = [mix[kind] for kind in self.kinds]
+        self.rng = random.Random(seed)
+        self.report = LoadReport()
+        self.issue_names: List[str] = []
+        self.generation = 0
+        self._reload_lock = asyncio.Lock()
+
+    async def run(self, duration: float, concurrency: int) -> LoadReport:
+        """并发发送请求 duration 秒"""
+        response = await self.client.get("/api/issues")
+        response.raise_for_status()
+        self.issue_names = response.json()["issues"]
+
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(*(self._worker(deadline) for _ in range(concurrency)))
+        self.report.elapsed = time.perf_counter() - started
+        return self.report
+
+    async def _worker(self, deadline: float):
+        while time.perf_counter() < deadline:
+            kind = self.rng.choices(self.kinds, self.weights)[0]
+            if kind == "reload" and self._reload_lock.locked():
+                # 已有重新加载进行中，改发其它请求，不让客户端排队等待
+                continue
+            if kind == "reload":
+                await self._reload()
+            elif kind == "tree":
+                name = PROBE_ISSUE if self.rng.random() < 0.2 else self.rng.choice(self.issue_names)
+                await self._get("tree", f"/api/issues/{quote(name, safe='')}/tree", probe=name == PROBE_ISSUE)
+            elif kind == "summary":
+                await self._get("summary", "/api/issues/summary", probe=True)
+            else:
+                await self._get("issues", "/api/issues")
+
+    async def _get(self, kind: str, url: str, probe: bool = False):
+        started = time.perf_counter()
+        response = await self.client.get(url)
+        self.report.record(kind, time.perf_counter() - started, response.status_code)
+        version = response.headers.get("x-kb-version")
+        if response.status_code != 200 or not version:
+            return
+
+        self.report.bodies[(version, url)].add(hashlib.sha1(response.content).hexdigest())
+        if probe:
+            generation = self._probe_generation(kind, response.json())
+            if generation is not None:
+                self.report.generations[version].add(generation)
+
+    async def _reload(self):
+        # 同一时刻只修改一次探针文件，重新加载请求本身仍与其它请求并发
+        async with self._reload_lock:
+            self.generation += 1
+            write_probe(self.data_dir, self.generation)
+            started = time.perf_counter()
+            response = await self.client.post("/api/reload", params={"wait": "true"})
+        self.report.record("reload", time.perf_counter() - started, response.status_code)
+        self.report.reloads += 1
+
+    @staticmethod
+    def _probe_generation(kind: str, body: Dict) -> Optional[int]:
+        """从问题摘要或探针问题树中读取探针代数"""
+        if kind == "tree":
+            describe = body.get("describe", "")
+        else:
+            describe = next((item["describe"] for item in body["issues"] if item["title"] == PROBE_ISSUE), "")
+        return int(describe.split()[-1]) if describe.startswith("代数") else None
+
+
+def prepare_data(source: Optional[str], synthetic: int, target: Path) -> Path:
+    """复制数据目录或生成合成数据，并写入初始探针"""
+    if synthetic:
+        from api.synthetic_kb import SyntheticSpec, generate
+        generate(SyntheticSpec(issues=synthetic), str(target))
+    else:
+        shutil.copytree(source or project_root / "data", target, dirs_exist_ok=True)
+    write_probe(target, 0)
+    return target
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """解析 issues=30,summary=20,... 形式的请求比例"""
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in ("issues", "summary", "tree", "reload"):
+            raise ValueError(f"未知的请求类型: {kind}")
+        mix[kind.strip()] = int(weight)
+    return mix
+
+
+async def run_in_process(data_dir: Path, args) -> LoadReport:
+    """在进程内通过 ASGI 直接调用应用（与真实部署共用同一个线程池和快照发布逻辑）"""
+    os.environ["KB_DATA_DIR"] = str(data_dir)
+    from api import main
+    if main.knowledge_base.is_loaded:
+        raise RuntimeError("api.main 已在本进程中加载了其它数据目录")
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            runner = LoadRunner(client, data_dir, parse_mix(args.mix), args.seed)
+            return await runner.run(args.duration, args.concurrency)
+
+
+async def run_against_uvicorn(data_dir: Path, args) -> LoadReport:
+    """启动本地 uvicorn 子进程并通过 HTTP 发送请求"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = {**os.environ, "KB_DATA_DIR": str(data_dir)}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60, limits=limits) as client:
+            deadline = time.perf_counter() + 60
+            while True:
+                try:
+                    if (await client.get("/")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    if time.perf_counter() > deadline or process.poll() is not None:
+                        raise RuntimeError("uvicorn 启动失败")
+                    await asyncio.sleep(0.05)
+            runner = LoadRunner(client, data_dir, parse_mix(args.mix), args.seed)
+            return await runner.run(args.duration, args.concurrency)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="API 负载测试")
+    parser.add_argument("--duration", type=float, default=10.0, help="测试时长（秒，默认 10）")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发客户端数（默认 32）")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"请求比例（默认 {DEFAULT_MIX}）")
+    parser.add_argument("--data-dir", default=None, help="复制该数据目录进行测试（默认 data）")
+    parser.add_argument("--synthetic", type=int, default=0, help="使用指定问题数量的合成数据（见 api/synthetic_kb.py）")
+    parser.add_argument("--launch", action="store_true", help="启动本地 uvicorn 进行测试（默认在进程内调用应用）")
+    parser.add_argument("--seed", type=int, default=0, help="请求选择的随机种子")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = prepare_data(args.data_dir, args.synthetic, Path(tmp) / "data")
+        runner = run_against_uvicorn if args.launch else run_in_process
+        result = asyncio.run(runner(data_dir, args)).to_dict()
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print(f"耗时 {result['elapsed_s']}s，请求 {result['requests']} 个，吞吐量 {result['throughput_rps']} 请求/秒，"
+              f"错误 {result['errors']} 个，重新加载 {result['reloads']} 次，出现 {result['versions']} 个版本")
+        print(f"{'接口':<10}{'请求数':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}  状态码")
+        for kind, route in result["routes"].items():
+            print(f"{kind:<10}{route['requests']:>8}{route['p50_ms']:>10}{route['p95_ms']:>10}{route['p99_ms']:>10}  "
+                  f"{route['statuses']}")
+        for problem in result["inconsistencies"]:
+            print(f"不一致: {problem}")
+
+    return 1 if result["inconsistencies"] or result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
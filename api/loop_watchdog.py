@@ -0,0 +1,179 @@
+"""
+事件循环阻塞监视
+持续测量事件循环延迟；某个回调阻塞事件循环超过阈值时，记录当时正在处理的路由和事件循环线程的调用栈
+
+- 心跳协程每隔 interval 秒醒来一次，实际醒来时间与预期的差值就是事件循环延迟（写入直方图和统计）
+- 监视线程在事件循环之外检查心跳：心跳超过阈值没有更新时，立即采样事件循环线程的调用栈并输出一条 WARNING，
+  即使事件循环一直阻塞不再恢复也能看到现场
+- 路由从调用栈中 Starlette 的 ASGI scope 读取，不需要在每个请求中额外记录
+
+环境变量:
+    API_LOOP_WATCHDOG: 设为 1 时开启
+    API_LOOP_BLOCK_MS: 阻塞阈值（毫秒，默认 200）
+    API_LOOP_INTERVAL_MS: 心跳间隔（毫秒，默认 100）
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+from src.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "api_event_loop_lag_seconds", "事件循环延迟（心跳实际醒来时间与预期的差值）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+LOOP_STALLS = REGISTRY.counter("api_event_loop_stalls_total", "事件循环阻塞超过阈值的次数")
+
+STACK_LIMIT = 30  # 每次采样保留的栈帧数（最内层）
+KEEP_STALLS = 20  # 保留的最近阻塞记录数
+
+
+def _route_from_frame(frame) -> Optional[str]:
+    """从调用栈中找到 Starlette 正在处理的请求（ASGI scope），返回路由模板或路径"""
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope.get("path")
+            return f"{scope.get('method', '')} {path}".strip()
+        frame = frame.f_back
+    return None
+
+
+class LoopWatchdog:
+    """事件循环阻塞监视器（每个进程、每个事件循环一个）"""
+
+    def __init__(self, threshold: float = 0.2, interval: float = 0.1):
+        """
+        Args:
+            threshold: 阻塞阈值（秒）
+            interval: 心跳间隔（秒）
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.samples = 0
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._total_lag = 0.0
+        self._recent: deque = deque(maxlen=KEEP_STALLS)
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._reported_beat: Optional[float] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> Optional['LoopWatchdog']:
+        """从环境变量读取配置（未开启时返回 None）"""
+        if os.environ.get("API_LOOP_WATCHDOG", "").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            threshold=float(os.environ.get("API_LOOP_BLOCK_MS") or 200) / 1000,
+            interval=float(os.environ.get("API_LOOP_INTERVAL_MS") or 100) / 1000
+        )
+
+    def start(self):
+        """在事件循环中启动心跳协程和监视线程（必须在事件循环线程中调用）"""
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self):
+        """停止心跳协程和监视线程"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 5)
+
+    async def _heartbeat(self):
+        """定时醒来，测量事件循环延迟"""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._beat = now
+            self._observe(lag)
+
+    def _observe(self, lag: float):
+        """记录一次延迟测量"""
+        LOOP_LAG_SECONDS.observe(lag)
+        with self._lock:
+            self.samples += 1
+            self.last_lag = lag
+            self._total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.stalls += 1
+                LOOP_STALLS.inc()
+                # 补充监视线程已记录的同一次阻塞的总时长
+                if self._recent and self._recent[-1]["lagMs"] is None:
+                    self._recent[-1]["lagMs"] = round(lag * 1000, 1)
+
+    def _monitor(self):
+        """监视线程：心跳超时时采样事件循环线程的调用栈（每次阻塞只采样一次）"""
+        check_interval = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(check_interval):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == self._reported_beat:
+                continue
+            self._reported_beat = beat
+            self._record_stall(blocked)
+
+    def _record_stall(self, blocked: float):
+        """采样事件循环线程的调用栈，记录并输出阻塞现场"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        route = _route_from_frame(frame)
+        stack = traceback.format_stack(frame)[-STACK_LIMIT:]
+        del frame
+        stall = {
+            "detectedAt": time.time(),
+            "route": route,
+            "blockedMs": round(blocked * 1000, 1),
+            "lagMs": None,  # 事件循环恢复后由心跳补充
+            "stack": stack
+        }
+        with self._lock:
+            self._recent.append(stall)
+        logger.warning(
+            "事件循环已阻塞 %.0fms（路由 %s）\n%s", blocked * 1000, route or "未知", "".join(stack),
+            extra={"route": route, "blocked_ms": stall["blockedMs"]}
+        )
+
+    def stats(self) -> Dict:
+        """延迟统计和最近的阻塞记录（最新的在前）"""
+        with self._lock:
+            recent: List[Dict] = list(reversed(self._recent))
+            return {
+                "thresholdMs": round(self.threshold * 1000, 1),
+                "intervalMs": round(self.interval * 1000, 1),
+                "samples": self.samples,
+                "stalls": self.stalls,
+                "lastLagMs": round(self.last_lag * 1000, 3),
+                "meanLagMs": round(self._total_lag / self.samples * 1000, 3) if self.samples else 0.0,
+                "maxLagMs": round(self.max_lag * 1000, 3),
+                "recentStalls": recent
+            }
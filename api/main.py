@@ -3,24 +3,159 @@ FastAPI 后端应用入口
 提供运维知识库的 RESTful API 接口
 """
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import os
+import re
+import secrets
+import signal
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.datastructures import Headers
+from pydantic import BaseModel, Field
 from pathlib import Path
+from typing import List, Literal, Optional
 
 # 添加项目路径
 import sys
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.utils.data_loader import DataLoader
-from src.utils.tree_builder import TreeBuilder
-from api.serializers import tree_node_to_dict, issue_to_summary_dict
+from src.utils.knowledge_base import KnowledgeBase, KnowledgeSnapshot
+from src.utils.autocomplete import AutocompleteIndex
+from src.utils.metrics import REGISTRY, DEFAULT_SIZE_BUCKETS
+from src.utils.session_store import SessionStore, TroubleshootingSession
+from src.utils.single_flight import AsyncSingleFlight
+from api.serializers import (
+    tree_node_to_dict, tree_node_to_normalized_dict, catalog_to_summary_json, session_to_dict, dumps_json
+)
+from api.worker_pool import WorkerPool, PoolSaturatedError
+from api.events import VersionBroadcaster
+from api.loop_watchdog import LoopWatchdog
+from api.export import iter_export_records, iter_ndjson
+from api.static_bundle import write_static_bundle
+from src.utils.logging_setup import setup_logging, dropped_records
+from src.utils import tracing
+from src.utils.memory_report import build_memory_report, SORT_KEYS as MEMORY_SORT_KEYS
+from api.profiling import ProfileStore, ProfilingMiddleware, SORT_KEYS, current_session
+
+# 知识库（每个请求开始时读取一次当前快照，重新加载时整体替换）
+# 导入时只创建对象，在 startup() 中加载；多进程部署时（见 api/gunicorn_conf.py）在主进程中加载，
+# fork 后各工作进程共享同一份数据
+knowledge_base = KnowledgeBase(
+    data_dir=os.environ.get("KB_DATA_DIR") or "data",
+    sync_file=os.environ.get("KB_SYNC_FILE") or None,
+    prewarm=os.environ.get("KB_PREWARM", "0") == "1",
+    summary_renderer=catalog_to_summary_json,  # 问题摘要在每次加载时序列化一次
+    # 只读模式：从 api/cli.py compile 生成的快照文件加载，不解析 YAML
+    snapshot_file=os.environ.get("KB_SNAPSHOT_FILE") or None
+)
+
+# 静态 API 目录：每次发布新快照时预渲染只读接口，由 nginx 直接返回（见 api/static_bundle.py）
+STATIC_DIR = os.environ.get("KB_STATIC_DIR") or None
+if STATIC_DIR:
+    knowledge_base.add_listener(lambda snapshot: write_static_bundle(snapshot, STATIC_DIR))
+
+# 知识库版本变化推送（每个工作进程各自推送本进程发布的快照）
+version_broadcaster = VersionBroadcaster(keepalive=float(os.environ.get("API_SSE_KEEPALIVE", 15)))
+knowledge_base.add_listener(version_broadcaster.notify_threadsafe)
+SSE_MAX_CLIENTS = int(os.environ.get("API_SSE_MAX_CLIENTS", 1000))
+
+# gunicorn 部署时由主进程重新加载知识库并重新 fork 工作进程（见 api/gunicorn_conf.py）
+RELOAD_VIA_MASTER = os.environ.get("KB_RELOAD_VIA_MASTER", "0") == "1"
+# 已通知主进程的重新加载超过该时间（秒）仍未完成时，视为主进程没有处理，允许再次通知
+MASTER_RELOAD_PENDING_TIMEOUT = 300
+
+# 会话恢复令牌的签名密钥：未设置 API_SESSION_SECRET 时在导入时随机生成（gunicorn 在主进程中导入，
+# 所有工作进程共用同一个密钥），多个独立实例之间恢复会话或重启后继续使用旧令牌时必须设置
+SESSION_SECRET = os.environ.get("API_SESSION_SECRET", "").encode("utf-8") or secrets.token_bytes(32)
+
+# 以下对象属于每个工作进程，在 startup() 中创建：
+# 排查会话（每个进程各自保存，请求落到其它进程时通过恢复令牌重建）
+session_store: Optional[SessionStore] = None
+# 按请求性能分析结果
+profile_store: Optional[ProfileStore] = None
+# 树构建和序列化等 CPU 密集任务在线程池中执行，不阻塞事件循环
+worker_pool: Optional[WorkerPool] = None
+# 事件循环阻塞监视（API_LOOP_WATCHDOG=1 时在 lifespan 中启动）
+loop_watchdog: Optional[LoopWatchdog] = None
+_startup_lock = threading.Lock()
+
+
+def load_knowledge_base() -> KnowledgeSnapshot:
+    """加载知识库（已加载时直接返回当前快照）"""
+    with _startup_lock:
+        if not knowledge_base.is_loaded:
+            knowledge_base.load()
+        return knowledge_base.snapshot
+
+
+def startup() -> bool:
+    """
+    加载知识库并创建工作进程的会话存储、分析结果存储和线程池（重复调用时不重复执行）
+
+    Returns:
+        本次调用是否创建了这些对象（由创建者负责关闭）
+    """
+    global session_store, profile_store, worker_pool
+    setup_logging()
+    tracing.configure_tracing_from_env()
+    load_knowledge_base()
+    with _startup_lock:
+        if worker_pool is not None:
+            return False
+        session_store = SessionStore(
+            resolve_index=lambda issue_name: request_snapshot().tree_builder.get_tree_index(issue_name),
+            ttl=float(os.environ.get("API_SESSION_TTL", 1800)),
+            max_sessions=int(os.environ.get("API_SESSION_MAX", 10000)),
+            max_bytes=int(os.environ.get("API_SESSION_MAX_MB", 32)) * 1024 * 1024,
+            secret=SESSION_SECRET
+        )
+        profile_store = ProfileStore(max_records=int(os.environ.get("API_PROFILE_KEEP", 20)))
+        worker_pool = WorkerPool.from_env()
+        return True
+
+
+def shutdown():
+    """关闭线程池并释放工作进程的对象"""
+    global session_store, profile_store, worker_pool
+    with _startup_lock:
+        if worker_pool is not None:
+            worker_pool.shutdown()
+        session_store = profile_store = worker_pool = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：加载知识库，在每个工作进程中启动版本同步线程和事件循环监视（可选），并绑定版本推送的事件循环"""
+    global loop_watchdog
+    created = startup()
+    version_broadcaster.bind(asyncio.get_running_loop(), knowledge_base.snapshot)
+    knowledge_base.start_sync()
+    watchdog = LoopWatchdog.from_env()
+    if watchdog is not None:
+        watchdog.start()
+        loop_watchdog = watchdog
+    yield
+    if watchdog is not None:
+        await watchdog.stop()
+        loop_watchdog = None
+    if created:
+        shutdown()
+
 
 # 创建 FastAPI 应用
 app = FastAPI(
     title="运维知识库 API",
     description="运维排查知识库的 RESTful API 接口",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 配置（允许所有来源访问，方便局域网调试）
@@ -30,12 +165,249 @@ app.add_middleware(
     allow_credentials=False,  # 使用通配符时必须为 False
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-KB-Version", "X-Profile-Id"],
 )
 
-# 初始化数据加载器和树构建器
-data_loader = DataLoader(data_dir="data")
-data_loader.load_all_issues()
-tree_builder = TreeBuilder(data_loader)
+
+# 请求指标
+REQUEST_SECONDS = REGISTRY.histogram("api_request_duration_seconds", "API 请求处理耗时", ("method", "route"))
+REQUESTS = REGISTRY.counter("api_requests_total", "API 请求数", ("method", "route", "status"))
+RESPONSE_BYTES = REGISTRY.histogram(
+    "api_response_size_bytes", "API 响应体大小", ("route",), buckets=DEFAULT_SIZE_BUCKETS
+)
+
+
+# 请求开始时固定的知识库快照（整个请求只使用这一份快照，响应头中的版本与响应内容一致）
+_request_snapshot: ContextVar[Optional[KnowledgeSnapshot]] = ContextVar("request_snapshot", default=None)
+
+
+def request_snapshot() -> KnowledgeSnapshot:
+    """当前请求使用的知识库快照（请求之外调用时返回当前发布的快照）"""
+    return _request_snapshot.get() or knowledge_base.snapshot
+
+
+# 客户端传入的请求 ID 只接受这些字符，避免日志和响应头注入
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestRecordingMiddleware:
+    """
+    记录请求耗时和响应大小，并在响应头中返回本次请求使用的知识库版本（ASGI 中间件，不创建额外的任务）
+
+    每个请求使用一个关联 ID（沿用合法的 X-Request-ID 请求头，否则生成），作为追踪 ID 并在响应头 X-Request-ID 中返回。
+    耗时和大小在最后一个响应体消息发送后记录，流式响应（导出、SSE）覆盖整个响应体而不只是响应头
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        snapshot = knowledge_base.snapshot if knowledge_base.is_loaded else None
+        request_id = Headers(scope=scope).get("X-Request-ID", "")
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = tracing.new_trace_id()
+        extra_headers = [(b"x-request-id", request_id.encode("ascii"))]
+        if snapshot is not None:
+            extra_headers.append((b"x-kb-version", snapshot.version.encode("ascii")))
+        method = scope["method"]
+        status = None
+        body_bytes = 0
+        recorded = False
+
+        def record():
+            nonlocal recorded
+            recorded = True
+            # 使用路由模板作为标签（如 /api/issues/{issue_name}/tree），未匹配的路径统一归类，避免标签数量膨胀
+            route_path = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_SECONDS.observe(time.perf_counter() - started, method, route_path)
+            REQUESTS.inc(method, route_path, str(status))
+            RESPONSE_BYTES.observe(body_bytes, route_path)
+
+        async def send_recorded(message):
+            nonlocal status, body_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                request_span.set(route=getattr(scope.get("route"), "path", "unmatched"), status=status)
+                message = {**message, "headers": [*message.get("headers", ()), *extra_headers]}
+                await send(message)
+                return
+            body_bytes += len(message.get("body", b""))
+            await send(message)
+            if not message.get("more_body", False) and not recorded:
+                record()
+
+        token = _request_snapshot.set(snapshot)
+        trace_token = tracing.set_trace_id(request_id)
+        try:
+            with tracing.span("http.request", method=method, path=scope["path"]) as request_span:
+                await self.app(scope, receive, send_recorded)
+        finally:
+            tracing.reset_trace_id(trace_token)
+            _request_snapshot.reset(token)
+            # 客户端在流式响应结束前断开时，按已发送的部分记录
+            if status is not None and not recorded:
+                record()
+
+
+app.add_middleware(RequestRecordingMiddleware)
+
+
+# 管理接口口令（不设置时关闭管理接口和按请求性能分析）
+ADMIN_TOKEN = os.environ.get("API_ADMIN_TOKEN") or None
+
+
+def _is_valid_admin_token(token: Optional[str]) -> bool:
+    """是否为正确的管理口令"""
+    return bool(ADMIN_TOKEN and token and secrets.compare_digest(token, ADMIN_TOKEN))
+
+
+def _is_admin(request: Request) -> bool:
+    """请求是否携带了正确的管理口令"""
+    return _is_valid_admin_token(request.headers.get("X-Admin-Token"))
+
+
+async def require_admin(request: Request):
+    """管理接口鉴权：未配置口令时接口不存在，口令错误时拒绝"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="管理接口未开启")
+    if not _is_admin(request):
+        raise HTTPException(status_code=403, detail="管理口令无效")
+
+
+def _authorize_profiling(scope) -> bool:
+    """分析开关只对携带正确管理口令的请求生效"""
+    return bool(ADMIN_TOKEN) and _is_valid_admin_token(Headers(scope=scope).get("X-Admin-Token"))
+
+
+# 管理员通过 X-Profile 请求头或 profile 查询参数开启本次请求的性能分析
+app.add_middleware(ProfilingMiddleware, get_store=lambda: profile_store, authorize=_authorize_profiling)
+
+
+def _snapshot_gauge(func):
+    """根据当前快照计算仪表数值的回调"""
+    def callback():
+        return func(knowledge_base.snapshot) if knowledge_base.is_loaded else {}
+    return callback
+
+
+REGISTRY.gauge("kb_snapshot_info", "当前知识库快照版本", ("version",)).set_callback(
+    _snapshot_gauge(lambda snapshot: {(snapshot.version,): 1})
+)
+REGISTRY.gauge("kb_issues", "当前快照中的问题数量").set_callback(
+    _snapshot_gauge(lambda snapshot: {(): len(snapshot.data_loader.issues)})
+)
+REGISTRY.gauge("kb_checklist_nodes", "当前快照中的检查项数量（包括嵌套子项）").set_callback(
+    _snapshot_gauge(lambda snapshot: {(): snapshot.node_count})
+)
+REGISTRY.gauge("kb_tree_cache_size", "当前快照已缓存的问题树数量").set_callback(
+    _snapshot_gauge(lambda snapshot: {(): len(snapshot.tree_builder.built_trees)})
+)
+REGISTRY.gauge("kb_last_load_phase_seconds", "当前快照加载时各阶段耗时", ("phase",)).set_callback(
+    _snapshot_gauge(lambda snapshot: {
+        (phase,): seconds for phase, seconds in snapshot.data_loader.phase_timings.items()
+    })
+)
+REGISTRY.gauge("api_sse_clients", "当前 SSE 版本推送连接数").set_callback(
+    lambda: {(): version_broadcaster.clients}
+)
+REGISTRY.gauge("api_sessions", "当前排查会话数").set_callback(
+    lambda: {(): len(session_store)} if session_store is not None else {}
+)
+REGISTRY.gauge("api_session_bytes", "排查会话状态的估算内存（字节）").set_callback(
+    lambda: {(): session_store.total_bytes} if session_store is not None else {}
+)
+REGISTRY.gauge("api_log_records_dropped", "日志队列已满被丢弃的记录数").set_callback(
+    lambda: {(): dropped_records()}
+)
+REGISTRY.gauge("api_worker_pool_in_flight", "线程池中正在执行和排队的任务数").set_callback(
+    lambda: {(): worker_pool.in_flight} if worker_pool is not None else {}
+)
+
+
+async def _run_in_pool(func, *args):
+    """在线程池中执行任务，线程池已满返回 503，超时返回 504"""
+    session = current_session()
+    if session is not None:
+        func, args = session.run, (func,) + args
+    try:
+        return await worker_pool.run(func, *args)
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"请求处理超时（超过 {worker_pool.timeout} 秒）")
+
+
+# 相同参数的并发请求只提交一次构建和序列化任务，共享序列化结果
+render_flight = AsyncSingleFlight("tree_render")
+
+
+async def _render_shared(key, func, *args) -> bytes:
+    """在线程池中渲染，相同键的并发请求共享同一次渲染（开启性能分析的请求单独执行）"""
+    if current_session() is not None:
+        return await _run_in_pool(func, *args)
+    return await render_flight.do(key, lambda: _run_in_pool(func, *args))
+
+
+def _json_response(body: bytes) -> Response:
+    """返回已经序列化好的 JSON"""
+    return Response(content=body, media_type="application/json")
+
+
+def _render_issue_tree(snapshot: KnowledgeSnapshot, issue_name: str, root: Optional[str],
+                       path: Optional[List[str]], depth: Optional[int]) -> bytes:
+    """构建并序列化问题树（在线程池中执行）"""
+    tree_builder = snapshot.tree_builder
+    tree = tree_builder.build_complete_tree(issue_name)
+    if not tree:
+        raise HTTPException(status_code=404, detail=f"问题 '{issue_name}' 不存在或无法构建树形结构")
+
+    node = tree
+    if root:
+        node = tree_builder.find_node_by_id(tree, root)
+    elif path:
+        node = tree_builder.find_node_by_path(tree, path) if path[0] == tree.status else None
+
+    if not node:
+        raise HTTPException(status_code=404, detail=f"问题 '{issue_name}' 中未找到指定的节点")
+
+    return dumps_json(tree_node_to_dict(node, depth))
+
+
+def _render_issue_trees(snapshot: KnowledgeSnapshot, requested_issues: List[str], depth: Optional[int]) -> bytes:
+    """批量构建并序列化问题树（在线程池中执行）"""
+    data_loader = snapshot.data_loader
+    tree_builder = snapshot.tree_builder
+    refers = {}
+    items = []
+    for requested in requested_issues:
+        issue = data_loader.get_issue_by_name(requested) or data_loader.get_issue_by_file_name(requested)
+        tree = tree_builder.build_complete_tree(issue.status) if issue else None
+        if not tree:
+            items.append({
+                "issue": requested,
+                "found": False,
+                "error": f"问题 '{requested}' 不存在或无法构建树形结构"
+            })
+            continue
+
+        items.append({
+            "issue": requested,
+            "found": True,
+            "tree": tree_node_to_normalized_dict(
+                tree, refers, tree_builder.build_complete_tree, depth
+            )
+        })
+
+    return dumps_json({
+        "items": items,
+        "refers": refers,
+        "total": len(items)
+    })
 
 
 @app.get("/")
@@ -49,7 +421,16 @@ async def root():
             "issues": "/api/issues",
             "issues_summary": "/api/issues/summary",
             "issue_tree": "/api/issues/{issue_name}/tree",
-            "reload": "/api/reload"
+            "issue_trees_batch": "/api/issues/trees",
+            "search": "/api/search",
+            "autocomplete": "/api/autocomplete",
+            "reload": "/api/reload",
+            "reload_status": "/api/reload/status",
+            "version": "/api/version",
+            "events": "/api/events",
+            "sessions": "/api/sessions",
+            "export": "/api/export",
+            "metrics": "/metrics"
         }
     }
 
@@ -66,7 +447,7 @@ async def get_issues():
         }
     """
     try:
-        issues = data_loader.get_issue_names()
+        issues = list(request_snapshot().catalog.names)
         return {
             "issues": issues,
             "total": len(issues)
@@ -89,6 +470,8 @@ async def get_issues_summary():
                     "priority": 8,
                     "version": "版本号",
                     "sourceFile": "文件名",
+                    "checklistCount": 检查项总数,
+                    "expandedChecklistCount": 展开 refer 引用后的检查项总数,
                     "howToCheck": {
                         "description": "检查方法描述",
                         "knowledgeLinks": [],
@@ -102,75 +485,610 @@ async def get_issues_summary():
         }
     """
     try:
-        all_issues = data_loader.get_all_issues()
-        visible_issues = [issue for issue in all_issues.values() if issue.display]
-        sorted_issues = sorted(visible_issues, key=lambda x: x.priority, reverse=True)
-
-        issues_summary = [issue_to_summary_dict(issue) for issue in sorted_issues]
-
-        return {
-            "issues": issues_summary,
-            "total": len(issues_summary)
-        }
+        # 摘要在加载时已序列化，直接返回
+        return _json_response(request_snapshot().catalog.summary_body)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取问题摘要列表失败: {str(e)}")
 
 
 @app.get("/api/issues/{issue_name}/tree")
-async def get_issue_tree(issue_name: str):
+async def get_issue_tree(
+    issue_name: str,
+    root: Optional[str] = Query(None, description="子树根节点 ID（即响应中的 id 字段）"),
+    path: Optional[List[str]] = Query(None, description="子树根节点路径（即响应中的 originalPath，可重复传参）"),
+    depth: Optional[int] = Query(None, ge=0, description="向下展开的最大层数，不传则展开整棵树")
+):
     """
     获取问题的完整树形结构（包含 refer 引用解析）
 
     Args:
         issue_name: 问题名称
+        root: 从指定 ID 的节点开始返回子树
+        path: 从指定路径的节点开始返回子树
+        depth: 限制展开层数，被截断的节点带有 truncated 和 childCount 字段
 
     Returns:
         TreeChecklistItem 的字典表示
     """
     try:
-        tree = tree_builder.build_complete_tree(issue_name)
-        if not tree:
-            raise HTTPException(status_code=404, detail=f"问题 '{issue_name}' 不存在或无法构建树形结构")
-
-        return tree_node_to_dict(tree)
+        snapshot = request_snapshot()
+        key = ("tree", snapshot.version, issue_name, root, tuple(path) if path else None, depth)
+        body = await _render_shared(key, _render_issue_tree, snapshot, issue_name, root, path, depth)
+        return _json_response(body)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取问题树失败: {str(e)}")
 
 
+class BatchTreeRequest(BaseModel):
+    """批量获取问题树的请求体"""
+    issues: List[str] = Field(..., min_length=1, max_length=200, description="问题名称或来源文件名列表")
+    depth: Optional[int] = Field(None, ge=0, description="向下展开的最大层数，不传则展开整棵树")
+
+
+@app.post("/api/issues/trees")
+async def get_issue_trees(request: BatchTreeRequest):
+    """
+    批量获取多个问题的树形结构（一次请求返回所有结果）
+
+    refer 引用的子树在整个批次中只序列化一次，统一放在 refers 中；
+    树中的 refer 节点只保留占位信息，通过 referTo 字段关联。
+    单个问题不存在时只在对应条目中报告错误，不影响其它问题。
+
+    Args:
+        request: 问题名称（或 sourceFile）列表和可选的展开层数
+
+    Returns:
+        {
+            "items": [
+                {"issue": "请求的名称", "found": true, "tree": {...}},
+                {"issue": "请求的名称", "found": false, "error": "错误信息"}
+            ],
+            "refers": {"被引用问题名称": {...}},
+            "total": 条目数
+        }
+    """
+    try:
+        snapshot = request_snapshot()
+        key = ("trees", snapshot.version, tuple(request.issues), request.depth)
+        body = await _render_shared(key, _render_issue_trees, snapshot, request.issues, request.depth)
+        return _json_response(body)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量获取问题树失败: {str(e)}")
+
+
+def _master_reload_marker(master_pid: int) -> Path:
+    """已通知主进程、尚未完成的重新加载标记文件（同一主进程的所有工作进程共用）"""
+    return Path(tempfile.gettempdir()) / f"kb-reload-{master_pid}.pending"
+
+
+def _signal_master_reload() -> bool:
+    """
+    通知 gunicorn 主进程重新加载（HUP）
+
+    Returns:
+        是否发送了信号；主进程已有未完成的重新加载时不再发送，本次请求与之合并
+    """
+    master_pid = os.getppid()
+    marker = _master_reload_marker(master_pid)
+    for _ in range(2):
+        try:
+            os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - marker.stat().st_mtime < MASTER_RELOAD_PENDING_TIMEOUT:
+                    return False
+                os.utime(marker)  # 标记已过期，重新通知
+                break
+            except FileNotFoundError:
+                continue  # 主进程刚好完成上一次重新加载
+    os.kill(master_pid, signal.SIGHUP)
+    return True
+
+
+def clear_master_reload_marker():
+    """主进程完成重新加载后删除标记（在 gunicorn 主进程的 on_reload 中调用）"""
+    _master_reload_marker(os.getpid()).unlink(missing_ok=True)
+
+
+async def _reload_via_master(request: Request) -> JSONResponse:
+    """gunicorn 部署时的重新加载：需要管理口令，只读快照模式下拒绝，重复的请求合并为一次"""
+    await require_admin(request)
+    if knowledge_base.snapshot_file:
+        raise HTTPException(
+            status_code=409,
+            detail="只读快照模式下数据随镜像发布，重新加载只会读取同一个快照文件，请重新部署新的镜像"
+        )
+    signalled = _signal_master_reload()
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "message": "已通知主进程重新加载数据，工作进程将依次替换为新版本" if signalled
+        else "主进程正在重新加载数据，本次请求已合并",
+        "version": knowledge_base.snapshot.version
+    })
+
+
 @app.post("/api/reload")
-async def reload_data():
+async def reload_data(
+    request: Request,
+    wait: bool = Query(True, description="是否等待重新加载完成后再返回（通知主进程重新加载时无效）")
+):
     """
     重新加载数据文件
 
-    用于在更新 YAML 文件后刷新数据，无需重启服务
+    用于在更新 YAML 文件后刷新数据，无需重启服务。
+    重新加载在后台线程中构建完整的新快照，完成后一次性替换，期间的请求继续使用旧快照；
+    重新加载进行中时的多次请求会合并为一次。
+
+    gunicorn 部署时（KB_RELOAD_VIA_MASTER=1）通知主进程重新加载，主进程加载完成后用新数据
+    重新 fork 所有工作进程。这种方式需要管理口令（X-Admin-Token），只读快照模式下返回 409；
+    立即返回 202（wait 参数无效），主进程完成之前的重复请求不再通知主进程，可通过 /api/version 确认新版本。
+
+    Args:
+        wait: 为 false 时立即返回，可通过 /api/reload/status 查询进度（通知主进程重新加载时无效）
 
     Returns:
         {
             "success": true/false,
-            "message": "重新加载结果消息"
+            "message": "重新加载结果消息",
+            "version": "新快照版本号",
+            "stats": {...}
         }
     """
+    if RELOAD_VIA_MASTER:
+        return await _reload_via_master(request)
+
+    future = knowledge_base.request_reload()
+    if not wait:
+        return {
+            "success": True,
+            "message": "已开始重新加载数据",
+            "status": knowledge_base.get_reload_status()
+        }
+
     try:
-        success = data_loader.reload_data()
-        tree_builder.clear_cache()
-
-        if success:
-            # 重新统计信息
-            stats = data_loader.get_statistics()
-            return {
-                "success": True,
-                "message": "数据重新加载成功",
-                "stats": stats
-            }
-        else:
-            return {
-                "success": False,
-                "message": "数据重新加载失败"
+        snapshot = await asyncio.wrap_future(future)
+        return {
+            "success": True,
+            "message": "数据重新加载成功",
+            "version": snapshot.version,
+            "changed_issues": list(snapshot.changed_issues),
+            "stats": snapshot.stats
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": f"数据重新加载失败: {str(e)}"
+        }
+
+
+@app.get("/api/reload/status")
+async def get_reload_status():
+    """
+    获取重新加载状态
+
+    Returns:
+        {
+            "in_progress": 是否正在重新加载,
+            "pending": 是否还有等待中的重新加载请求,
+            "version": "当前快照版本号",
+            "last_reload": {
+                "started_at": 开始时间戳,
+                "finished_at": 结束时间戳,
+                "duration_ms": 耗时,
+                "success": true/false,
+                "error": "错误信息",
+                "version": "加载得到的版本号",
+                "changed_issues": ["发生变化的问题", ...]
             }
+        }
+    """
+    return knowledge_base.get_reload_status()
+
+
+@app.get("/api/version")
+async def get_version():
+    """
+    获取当前工作进程正在使用的知识库版本
+
+    多进程部署时每个工作进程分别报告自己的版本，用于确认重新加载已同步到所有进程
+
+    Returns:
+        {
+            "version": "快照版本号",
+            "loaded_at": 快照加载完成时间戳,
+            "pid": 工作进程 PID,
+            "total_issues": 问题总数
+        }
+    """
+    snapshot = request_snapshot()
+    return {
+        "version": snapshot.version,
+        "loaded_at": snapshot.loaded_at,
+        "pid": os.getpid(),
+        "total_issues": snapshot.stats.get("total_issues", 0)
+    }
+
+
+class CreateSessionRequest(BaseModel):
+    """创建排查会话的请求体"""
+    issue: str = Field(..., min_length=1, description="问题名称")
+
+
+class SessionNodeRequest(BaseModel):
+    """会话中针对某个节点的操作请求体"""
+    node_id: str = Field(..., alias="nodeId", min_length=1, description="节点 ID（即响应中的 id 字段）")
+
+
+async def _warm_tree_index(issue_name: Optional[str]):
+    """
+    在线程池中构建问题树和节点索引
+
+    会话存储在事件循环中解析节点索引，提前构建好之后只会命中缓存，
+    冷构建不会阻塞事件循环
+    """
+    tree_builder = request_snapshot().tree_builder
+    if issue_name and issue_name not in tree_builder.tree_indexes:
+        await _run_in_pool(tree_builder.get_tree_index, issue_name)
+
+
+async def _get_session(session_id: str, resume_token: Optional[str]) -> TroubleshootingSession:
+    """获取会话，不存在（已过期或在其它进程中且没有恢复令牌）时返回 404"""
+    await _warm_tree_index(session_store.peek_issue_name(session_id, resume_token))
+    session = session_store.get(session_id, resume_token)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"会话 '{session_id}' 不存在或已过期")
+    return session
+
+
+def _get_position(session: TroubleshootingSession, node_id: str) -> int:
+    """节点ID对应的编号，不在会话的问题树中时返回 404"""
+    position = session.index.position(node_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"问题 '{session.issue_name}' 中未找到节点 '{node_id}'")
+    return position
+
+
+def _session_response(session: TroubleshootingSession, status_code: int = 200) -> Response:
+    """保存会话修改并返回当前视图"""
+    session_store.touch(session)
+    body = dumps_json(session_to_dict(session, request_snapshot().version, session_store.resume_token(session)))
+    return Response(content=body, media_type="application/json", status_code=status_code)
+
+
+@app.post("/api/sessions", status_code=201)
+async def create_session(request: CreateSessionRequest):
+    """
+    为指定问题创建排查会话
+
+    Returns:
+        会话当前视图（位于问题根节点）
+    """
+    await _warm_tree_index(request.issue)
+    session = session_store.create(request.issue)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"问题 '{request.issue}' 不存在或无法构建树形结构")
+    return _session_response(session, status_code=201)
+
+
+@app.get("/api/sessions/{session_id}")
+async def get_session(session_id: str, resume: Optional[str] = Header(None, alias="X-Session-Resume")):
+    """获取会话当前视图：导航路径、当前节点、当前层检查项及其状态、已确认项"""
+    return _session_response(await _get_session(session_id, resume))
+
+
+@app.post("/api/sessions/{session_id}/navigate")
+async def navigate_session(session_id: str, request: SessionNodeRequest,
+                           resume: Optional[str] = Header(None, alias="X-Session-Resume")):
+    """导航到指定节点（路径中的节点即回退），并重置该节点子项的状态"""
+    session = await _get_session(session_id, resume)
+    session.navigate(_get_position(session, request.node_id))
+    return _session_response(session)
+
+
+@app.post("/api/sessions/{session_id}/back")
+async def back_session(session_id: str, resume: Optional[str] = Header(None, alias="X-Session-Resume")):
+    """返回上一级（已在根节点时不变）"""
+    session = await _get_session(session_id, resume)
+    session.back()
+    return _session_response(session)
+
+
+@app.post("/api/sessions/{session_id}/exclude")
+async def exclude_session_item(session_id: str, request: SessionNodeRequest,
+                               resume: Optional[str] = Header(None, alias="X-Session-Resume")):
+    """排除检查项，已排除时撤销排除"""
+    session = await _get_session(session_id, resume)
+    session.toggle_exclude(_get_position(session, request.node_id))
+    return _session_response(session)
+
+
+@app.post("/api/sessions/{session_id}/confirm")
+async def confirm_session_item(session_id: str, request: SessionNodeRequest,
+                               resume: Optional[str] = Header(None, alias="X-Session-Resume")):
+    """确认检查项并进入该节点，confirmedItem 返回该节点（叶子节点即解决方案）"""
+    session = await _get_session(session_id, resume)
+    session.confirm(_get_position(session, request.node_id))
+    return _session_response(session)
+
+
+@app.delete("/api/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    """结束会话"""
+    if not session_store.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"会话 '{session_id}' 不存在或已过期")
+    return Response(status_code=204)
+
+
+async def _stream_in_pool(chunks):
+    """
+    逐块在线程池中迭代同步生成器（每一块都受线程池的并发上限和超时限制）
+
+    响应已经开始发送后无法再返回 503/504，线程池已满或超时时直接中断连接，
+    客户端没有收到最后的 end 记录即可判断导出不完整
+    """
+    done = object()
+    try:
+        while True:
+            chunk = await _run_in_pool(next, chunks, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        try:
+            chunks.close()
+        except ValueError:
+            # 超时后生成器仍在工作线程中执行，执行完这一块后随引用释放
+            pass
+
+
+@app.get("/api/export")
+async def export_knowledge_base(
+    form: Literal["expanded", "normalized"] = Query(
+        "expanded", description="expanded 展开 refer 引用；normalized 引用只输出占位节点，被引用问题单独导出"
+    ),
+    granularity: Literal["issue", "node"] = Query(
+        "issue", description="issue 每个问题一行（整棵树）；node 每个节点一行"
+    )
+):
+    """
+    以 NDJSON 流式导出整个知识库（包括 display=False 的问题）
+
+    第一行为 meta 记录（版本、格式、问题数），之后每行一条 issue 或 node 记录，最后一行为 end 记录。
+    导出基于请求开始时的快照，在线程池中逐个问题构建、序列化并发送，不写入树缓存，也不缓存导出结果。
+
+    Args:
+        form: 导出形式
+        granularity: 记录粒度
+    """
+    snapshot = request_snapshot()
+    return StreamingResponse(
+        _stream_in_pool(iter_ndjson(iter_export_records(snapshot, form, granularity))),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="knowledge-base-{snapshot.version}.ndjson"'}
+    )
+
+
+@app.get("/api/events")
+async def version_events(
+    request: Request,
+    since: Optional[str] = Query(None, description="客户端已知的版本号，断线重连时浏览器自动通过 Last-Event-ID 请求头携带")
+):
+    """
+    知识库版本变化推送（Server-Sent Events）
+
+    每次重新加载（包括其它进程触发的同步加载）发布新版本后推送 version 事件，
+    包含新版本号和发生变化的问题，客户端只需重新获取这些问题的树。
+
+    Args:
+        since: 客户端已知的版本号，与当前版本不同时立即推送期间的变化
+    """
+    if version_broadcaster.clients >= SSE_MAX_CLIENTS:
+        raise HTTPException(status_code=503, detail="推送连接数已达上限", headers={"Retry-After": "10"})
+
+    version_broadcaster.bind(asyncio.get_running_loop(), knowledge_base.snapshot)
+    last_seen = request.headers.get("Last-Event-ID") or since
+    return StreamingResponse(
+        version_broadcaster.stream(last_seen),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 关闭 nginx 代理缓冲，事件立即送达
+        }
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus 格式的指标
+
+    包括各路由的请求耗时直方图、响应大小、树缓存命中/未命中/大小、
+    数据加载各阶段耗时、问题和检查项数量
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _serialized_tree(tree) -> bytes:
+    """问题树接口返回的响应体"""
+    return dumps_json(tree_node_to_dict(tree))
+
+
+@app.get("/api/admin/memory", dependencies=[Depends(require_admin)])
+async def memory_report(
+    top: int = Query(20, ge=0, le=10000, description="返回占用最多的问题数量（0 表示全部）"),
+    sort: str = Query("treeBytes", description="排序字段：treeBytes / serializedBytes / expandedNodes / rawBytes")
+):
+    """
+    知识库内存统计
+
+    每个问题的原始检查项内存、展开后的节点数和内存、序列化后的字节数，
+    以及树缓存的总内存和占用最多的问题（按对象图估算，在线程池中执行）
+
+    Args:
+        top: 返回的问题数量
+        sort: 排序字段
+    """
+    if sort not in MEMORY_SORT_KEYS:
+        raise HTTPException(status_code=422, detail=f"sort 必须是 {' / '.join(MEMORY_SORT_KEYS)} 之一")
+    return await _run_in_pool(build_memory_report, request_snapshot(), _serialized_tree, top, sort)
+
+
+@app.get("/api/admin/traces", dependencies=[Depends(require_admin)])
+async def list_traces(limit: int = Query(20, ge=1, le=500, description="返回的追踪数量")):
+    """最近的请求追踪（最新的在前）：根区间名称、属性、总耗时和区间数量（需要设置 KB_TRACE=1）"""
+    recorder = tracing.get_recorder()
+    if recorder is None:
+        return {"enabled": False, "traces": []}
+    return {"enabled": True, "traces": recorder.traces(limit)}
+
+
+@app.get("/api/admin/traces/{trace_id}", dependencies=[Depends(require_admin)])
+async def get_trace(trace_id: str):
+    """
+    一次追踪的所有区间（按开始时间排序，通过 parentId 组成嵌套结构）
+
+    Args:
+        trace_id: 响应头 X-Request-ID 中的请求 ID
+    """
+    recorder = tracing.get_recorder()
+    spans = recorder.spans(trace_id) if recorder is not None else []
+    if not spans:
+        raise HTTPException(status_code=404, detail=f"追踪 '{trace_id}' 不存在或已被清理")
+    return {"traceId": trace_id, "spans": spans}
+
+
+@app.get("/api/admin/loop", dependencies=[Depends(require_admin)])
+async def loop_stats():
+    """事件循环延迟统计和最近的阻塞记录（路由、阻塞时长、调用栈），需要设置 API_LOOP_WATCHDOG=1"""
+    if loop_watchdog is None:
+        return {"enabled": False}
+    return {"enabled": True, "pid": os.getpid(), **loop_watchdog.stats()}
+
+
+@app.get("/api/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """列出本进程保存的性能分析结果（最新的在前）"""
+    profiles = [record.to_summary_dict() for record in profile_store.list()]
+    return {"profiles": profiles, "total": len(profiles)}
+
+
+@app.get("/api/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(
+    profile_id: str,
+    limit: int = Query(30, ge=1, le=500, description="返回的函数数量"),
+    sort: str = Query("cumulative", description="排序字段：cumulative / tottime / calls"),
+    format: str = Query("json", description="json 返回函数列表，text 返回 pstats 文本报告，prof 下载 .prof 文件")
+):
+    """
+    获取一次性能分析的结果
+
+    Args:
+        profile_id: 响应头 X-Profile-Id 中的分析 ID
+        limit: 返回的函数数量
+        sort: 排序字段
+        format: 返回格式
+    """
+    record = profile_store.get(profile_id)
+    if not record:
+        raise HTTPException(status_code=404, detail=f"分析结果 '{profile_id}' 不存在或已被清理")
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=422, detail=f"sort 必须是 {' / '.join(SORT_KEYS)} 之一")
+
+    if format == "prof":
+        return Response(
+            content=record.dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    if format == "text":
+        return PlainTextResponse(record.to_text(limit, sort))
+    if format != "json":
+        raise HTTPException(status_code=422, detail="format 必须是 json / text / prof 之一")
+
+    return {**record.to_summary_dict(), "sort": sort, "functions": record.top_functions(limit, sort)}
+
+
+@app.get("/api/search")
+async def search(
+    q: str = Query(..., min_length=1, description="检索关键词，支持中文和命令片段（如 du -sh）"),
+    limit: int = Query(20, ge=1, le=100, description="最多返回的结果数量")
+):
+    """
+    全文检索所有问题和检查项（status、describe、todo）
+
+    Args:
+        q: 检索关键词
+        limit: 最多返回的结果数量
+
+    Returns:
+        {
+            "query": "检索关键词",
+            "results": [
+                {
+                    "id": "节点ID",
+                    "issue": "所属问题",
+                    "title": "节点标题",
+                    "path": ["问题", "检查项", ...],
+                    "field": "命中字段",
+                    "snippet": "命中摘要",
+                    "score": 相关度
+                },
+                ...
+            ],
+            "total": 结果数量
+        }
+    """
+    try:
+        results = request_snapshot().search_index.search(q, limit)
+        return {
+            "query": q,
+            "results": results,
+            "total": len(results)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"检索失败: {str(e)}")
+
+
+@app.get("/api/autocomplete")
+async def autocomplete(
+    q: str = Query(..., min_length=1, description="输入前缀（中文、拼音全拼或首字母）"),
+    limit: int = Query(10, ge=1, le=AutocompleteIndex.MAX_RESULTS, description="最多返回的候选数量"),
+    kind: Optional[str] = Query(None, pattern="^(issue|node)$", description="只返回问题（issue）或检查项（node）")
+):
+    """
+    问题和检查项标题的前缀补全（支持拼音全拼和首字母，如 jqcp → 集群磁盘…）
+
+    Args:
+        q: 输入前缀
+        limit: 最多返回的候选数量
+        kind: 候选类型过滤
+
+    Returns:
+        {
+            "query": "输入前缀",
+            "suggestions": [
+                {"id": "节点ID", "title": "标题", "issue": "所属问题", "path": [...], "priority": 8, "kind": "issue"},
+                ...
+            ],
+            "total": 候选数量
+        }
+    """
+    try:
+        suggestions = request_snapshot().autocomplete_index.complete(q, limit, kind)
+        return {
+            "query": q,
+            "suggestions": suggestions,
+            "total": len(suggestions)
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"重新加载数据失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"自动补全失败: {str(e)}")
 
 
 @app.get("/api/stats")
@@ -186,8 +1104,7 @@ async def get_statistics():
         }
     """
     try:
-        stats = data_loader.get_statistics()
-        return stats
+        return request_snapshot().stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取统计信息失败: {str(e)}")
 
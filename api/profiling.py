@@ -0,0 +1,227 @@
+"""
+按请求开启的性能分析
+管理员在请求中打开分析开关后，该请求在线程池中执行的树构建和序列化会在 cProfile 下运行，
+结果保存在进程内，可查看耗时最多的函数或下载 .prof 文件。未开启时不做任何额外工作。
+"""
+
+import cProfile
+import contextvars
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+# 当前请求的分析会话（只有开启分析的请求才会设置）
+_current_session: contextvars.ContextVar[Optional['ProfileSession']] = contextvars.ContextVar(
+    "profile_session", default=None
+)
+
+SORT_KEYS = ("cumulative", "tottime", "calls")
+
+# 分析开关取这些值时视为关闭
+_FALSE_VALUES = frozenset(("", "0", "false", "no", "off"))
+
+
+class ProfileSession:
+    """一个请求的分析会话，收集该请求在各线程中执行的任务的分析数据"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+
+    def run(self, func: Callable, *args) -> Any:
+        """在 cProfile 下执行函数（在执行任务的线程中调用）"""
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args)
+        finally:
+            with self._lock:
+                self._profiles.append(profile)
+
+    def collect(self) -> Optional[pstats.Stats]:
+        """合并所有任务的分析数据，没有任务时返回 None"""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+def start_session() -> ProfileSession:
+    """为当前请求开启分析会话"""
+    session = ProfileSession()
+    _current_session.set(session)
+    return session
+
+
+def current_session() -> Optional[ProfileSession]:
+    """当前请求的分析会话（未开启时为 None）"""
+    return _current_session.get()
+
+
+@dataclass
+class ProfileRecord:
+    """一次请求的分析结果"""
+    id: str
+    method: str
+    path: str
+    status_code: int
+    created_at: float
+    duration_ms: float
+    stats: pstats.Stats = field(repr=False)
+
+    def to_summary_dict(self) -> Dict:
+        """列表中显示的摘要"""
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "statusCode": self.status_code,
+            "createdAt": self.created_at,
+            "durationMs": self.duration_ms,
+            "totalCalls": self.stats.total_calls
+        }
+
+    def top_functions(self, limit: int = 30, sort: str = "cumulative") -> List[Dict]:
+        """
+        耗时最多的函数
+
+        Args:
+            limit: 返回的函数数量
+            sort: 排序字段（cumulative / tottime / calls）
+        """
+        sort_index = {"cumulative": 3, "tottime": 2, "calls": 1}[sort]
+        rows = sorted(self.stats.stats.items(), key=lambda item: item[1][sort_index], reverse=True)
+
+        functions = []
+        for (file_name, line, func_name), (primitive_calls, calls, tottime, cumtime, _callers) in rows[:limit]:
+            functions.append({
+                "function": func_name,
+                "location": f"{_short_path(file_name)}:{line}",
+                "calls": calls,
+                "primitiveCalls": primitive_calls,
+                "tottimeMs": round(tottime * 1000, 3),
+                "cumtimeMs": round(cumtime * 1000, 3)
+            })
+        return functions
+
+    def dump(self) -> bytes:
+        """导出为 .prof 文件内容（可用 pstats、snakeviz 等工具打开）"""
+        return marshal.dumps(self.stats.stats)
+
+    def to_text(self, limit: int = 30, sort: str = "cumulative") -> str:
+        """pstats 文本报告"""
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        stats.add(self.stats)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+
+def _short_path(file_name: str) -> str:
+    """去掉项目目录前缀，便于阅读"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if file_name.startswith(project_root + os.sep):
+        return os.path.relpath(file_name, project_root)
+    return file_name
+
+
+class ProfileStore:
+    """进程内保存最近若干次分析结果"""
+
+    def __init__(self, max_records: int = 20):
+        self.max_records = max_records
+        self._records: "OrderedDict[str, ProfileRecord]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, status_code: int, started: float, stats: pstats.Stats) -> ProfileRecord:
+        """保存一次分析结果，超过上限时丢弃最早的记录"""
+        record = ProfileRecord(
+            id=uuid.uuid4().hex[:12],
+            method=method,
+            path=path,
+            status_code=status_code,
+            created_at=time.time(),
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+            stats=stats
+        )
+        with self._lock:
+            self._records[record.id] = record
+            while len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+        return record
+
+    def get(self, profile_id: str) -> Optional[ProfileRecord]:
+        """按 ID 获取分析结果"""
+        with self._lock:
+            return self._records.get(profile_id)
+
+    def list(self) -> List[ProfileRecord]:
+        """所有保存的分析结果（最新的在前）"""
+        with self._lock:
+            return list(reversed(self._records.values()))
+
+
+def profile_requested(scope: Dict) -> bool:
+    """请求是否打开了分析开关（X-Profile 请求头优先，其次是 profile 查询参数）"""
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            return value.decode("latin-1").strip().lower() not in _FALSE_VALUES
+
+    query_string = scope.get("query_string", b"")
+    if b"profile" not in query_string:
+        return False
+    values = parse_qs(query_string.decode("latin-1")).get("profile")
+    return bool(values) and values[-1].strip().lower() not in _FALSE_VALUES
+
+
+class ProfilingMiddleware:
+    """
+    按请求性能分析的 ASGI 中间件
+
+    没有打开分析开关的请求（包括 SSE 和流式响应）直接交给下一层，
+    不创建任务，也不包装 receive / send
+    """
+
+    def __init__(self, app, get_store: Callable[[], Optional[ProfileStore]], authorize: Callable[[Dict], bool]):
+        """
+        Args:
+            app: 下一层 ASGI 应用
+            get_store: 返回保存分析结果的存储的函数（应用启动前返回 None，不做分析）
+            authorize: 根据请求 scope 判断是否为管理员的函数
+        """
+        self.app = app
+        self.get_store = get_store
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        store = self.get_store() if scope["type"] == "http" else None
+        if store is None or not profile_requested(scope) or not self.authorize(scope):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        session = start_session()
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                # 只分析线程池中执行的任务，事件循环线程上同时运行着其它请求，分析结果没有意义
+                stats = session.collect()
+                if stats is not None:
+                    record = store.add(scope["method"], scope["path"], message["status"], started, stats)
+                    message = {**message, "headers": [
+                        *message.get("headers", ()), (b"x-profile-id", record.id.encode("ascii"))
+                    ]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_profile_id)
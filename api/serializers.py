@@ -3,31 +3,48 @@
 将 Python 数据模型转换为 JSON 可序列化的字典格式
 """
 
-from typing import Dict, List, Any
+import json
+from typing import Callable, Dict, List, Any, Optional
 from urllib.parse import unquote
 from src.models.checklist import TreeChecklistItem, Issue
+from src.utils.session_store import TroubleshootingSession
+from src.utils.issue_catalog import IssueCatalog, count_checklist_items
+from src.utils.tracing import span
 
 
-def issue_to_summary_dict(issue: Issue) -> Dict[str, Any]:
+def dumps_json(data: Any) -> bytes:
+    """
+    将字典序列化为 JSON 字节串（与 FastAPI 默认响应格式一致）
+
+    Args:
+        data: 可 JSON 序列化的对象
+
+    Returns:
+        UTF-8 编码的 JSON
+    """
+    with span("serialize.dumps_json") as dump_span:
+        body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        dump_span.set(bytes=len(body))
+    return body
+
+
+def issue_to_summary_dict(issue: Issue, checklist_count: Optional[int] = None,
+                          expanded_count: Optional[int] = None) -> Dict[str, Any]:
     """
     将 Issue 转换为摘要字典（用于问题列表展示）
 
     Args:
         issue: 问题对象
+        checklist_count: 检查项总数（包括所有子项），不传时现场统计
+        expanded_count: 展开 refer 引用后的检查项总数，不传时与 checklist_count 相同
 
     Returns:
         可 JSON 序列化的字典
     """
-    # 计算检查单总数（包括所有子项）
-    def count_checklists(items) -> int:
-        count = 0
-        for item in items:
-            count += 1
-            if hasattr(item, 'checklist') and item.checklist:
-                count += count_checklists(item.checklist)
-        return count
-
-    checklist_count = count_checklists(issue.checklist)
+    if checklist_count is None:
+        checklist_count = count_checklist_items(issue.checklist)
+    if expanded_count is None:
+        expanded_count = checklist_count
 
     return {
         "title": issue.status,
@@ -36,6 +53,7 @@ def issue_to_summary_dict(issue: Issue) -> Dict[str, Any]:
         "version": issue.version,
         "sourceFile": issue.file_name,
         "checklistCount": checklist_count,
+        "expandedChecklistCount": expanded_count,
         "howToCheck": {
             "description": issue.describe,
             "knowledgeLinks": [],
@@ -45,18 +63,190 @@ def issue_to_summary_dict(issue: Issue) -> Dict[str, Any]:
     }
 
 
-def tree_node_to_dict(node: TreeChecklistItem) -> Dict[str, Any]:
+def catalog_to_summary_json(catalog: IssueCatalog) -> bytes:
+    """
+    生成问题摘要列表响应体（/api/issues/summary，每次加载时执行一次）
+
+    Args:
+        catalog: 问题目录
+
+    Returns:
+        UTF-8 编码的 JSON
+    """
+    issues_summary = [
+        issue_to_summary_dict(entry.issue, entry.checklist_count, entry.expanded_count)
+        for entry in catalog.visible
+    ]
+    return dumps_json({
+        "issues": issues_summary,
+        "total": len(issues_summary)
+    })
+
+
+def tree_node_to_dict(node: TreeChecklistItem, max_depth: Optional[int] = None) -> Dict[str, Any]:
     """
     将 TreeChecklistItem 转换为字典（供 JSON 序列化）
 
     Args:
         node: 树形检查项节点
+        max_depth: 向下展开的最大层数（None 表示展开整棵树，0 表示只返回当前节点）
 
     Returns:
         可 JSON 序列化的字典
     """
+    with span("serialize.tree_to_dict", node=node.status, depth=max_depth):
+        return _tree_node_to_dict(node, max_depth)
+
+
+def _tree_node_to_dict(node: TreeChecklistItem, max_depth: Optional[int]) -> Dict[str, Any]:
+    """递归转换节点（tree_node_to_dict 只在最外层记录追踪区间）"""
+    result = _node_base_dict(node)
+
+    if max_depth is None or max_depth > 0:
+        child_depth = None if max_depth is None else max_depth - 1
+        result["subCheckItems"] = [
+            _tree_node_to_dict(child, child_depth)
+            for child in node.children
+        ]
+    elif node.children:
+        # 被截断的节点返回子项数量，供前端按层加载
+        result["truncated"] = True
+        result["childCount"] = len(node.children)
+
+    return result
+
+
+def tree_node_to_normalized_dict(
+    node: TreeChecklistItem,
+    refers: Dict[str, Any],
+    resolve_refer: Callable[[str], Optional[TreeChecklistItem]],
+    max_depth: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    将 TreeChecklistItem 转换为规范化字典（refer 子树只序列化一次）
+
+    refer 节点只输出占位节点（referTo 指向被引用问题），被引用问题的完整子树
+    以问题名称为键写入 refers，多个树共享同一份 refers 时每个被引用问题只序列化一次。
+    refers 中的子树总是从被引用问题的根节点按 max_depth 展开，与在哪一层遇到引用无关，
+    节点 ID 也是被引用问题自身的 ID；占位节点的 referIdPrefix 加上 refers 中的 ID
+    即为完整树中对应节点的 ID
+
+    Args:
+        node: 树形检查项节点
+        refers: 被引用问题的序列化结果（会被原地更新）
+        resolve_refer: 根据问题名称构建被引用问题树的函数
+        max_depth: 向下展开的最大层数（None 表示展开整棵树）
+
+    Returns:
+        可 JSON 序列化的字典
+    """
+    return _normalize_node(node, refers, resolve_refer, max_depth, max_depth)
+
+
+def _normalize_node(
+    node: TreeChecklistItem,
+    refers: Dict[str, Any],
+    resolve_refer: Callable[[str], Optional[TreeChecklistItem]],
+    max_depth: Optional[int],
+    refer_depth: Optional[int]
+) -> Dict[str, Any]:
+    """
+    规范化序列化一个节点
+
+    Args:
+        max_depth: 当前节点剩余的展开层数
+        refer_depth: 被引用问题的展开层数（整个批次相同）
+    """
+    result = _node_base_dict(node)
+
+    if node.is_refer:
+        result["referTo"] = node.status
+        # 占位节点 ID 为 “父节点 ID_被引用问题”，被引用问题内的节点 ID 都以被引用问题名称开头
+        result["referIdPrefix"] = result["id"][:len(result["id"]) - len(node.status)]
+        if node.status not in refers:
+            refers[node.status] = None  # 先占位，避免循环引用时重复序列化
+            refer_tree = resolve_refer(node.status)
+            if refer_tree:
+                refers[node.status] = _normalize_node(
+                    refer_tree, refers, resolve_refer, refer_depth, refer_depth
+                )
+        return result
+
+    if max_depth is None or max_depth > 0:
+        child_depth = None if max_depth is None else max_depth - 1
+        result["subCheckItems"] = [
+            _normalize_node(child, refers, resolve_refer, child_depth, refer_depth)
+            for child in node.children
+        ]
+    elif node.children:
+        result["truncated"] = True
+        result["childCount"] = len(node.children)
+
+    return result
+
+
+def session_to_dict(session: TroubleshootingSession, version: str, resume_token: str) -> Dict[str, Any]:
+    """
+    将排查会话转换为当前视图字典
+
+    Args:
+        session: 排查会话
+        version: 会话所在的知识库版本
+        resume_token: 会话的签名恢复令牌
+
+    Returns:
+        包含导航路径、当前节点、当前层检查项状态和已确认项的字典
+    """
+    index = session.index
+    current = session.current
+    confirmed_item = session.confirmed_item
+
+    return {
+        "sessionId": session.session_id,
+        "issue": session.issue_name,
+        "version": version,
+        "path": [
+            {"id": index.node_ids[position], "title": index.nodes[position].status}
+            for position in session.path
+        ],
+        "currentNode": tree_node_to_dict(index.nodes[current], 0),
+        "items": [
+            {**tree_node_to_dict(index.nodes[child], 0), "state": session.item_state(child)}
+            for child in index.children[current]
+        ],
+        "confirmedItem": tree_node_to_dict(index.nodes[confirmed_item], 0) if confirmed_item >= 0 else None,
+        "excludedItems": [index.node_ids[position] for position in session.excluded_positions()],
+        "resumeToken": resume_token
+    }
+
+
+def tree_node_to_flat_dict(node: TreeChecklistItem) -> Dict[str, Any]:
+    """
+    将单个节点转换为字典（不含 subCheckItems，用于逐节点导出）
+
+    Args:
+        node: 树形检查项节点
+
+    Returns:
+        可 JSON 序列化的字典
+    """
+    result = _node_base_dict(node)
+    del result["subCheckItems"]
+    return result
+
+
+def _node_base_dict(node: TreeChecklistItem) -> Dict[str, Any]:
+    """
+    生成节点自身的字段（不含子项）
+
+    Args:
+        node: 树形检查项节点
+
+    Returns:
+        subCheckItems 为空列表的节点字典
+    """
     # 生成唯一 ID（使用路径连接）
-    node_id = "_".join(node.original_path)
+    node_id = node.get_node_id()
 
     return {
         # 基本信息
@@ -131,11 +321,8 @@ def tree_node_to_dict(node: TreeChecklistItem) -> Dict[str, Any]:
         "isRefer": node.is_refer,
         "parentRef": node.parent_ref,
 
-        # 递归处理子项
-        "subCheckItems": [
-            tree_node_to_dict(child)
-            for child in node.children
-        ]
+        # 子项由调用方填充
+        "subCheckItems": []
     }
 
 
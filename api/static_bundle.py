@@ -0,0 +1,144 @@
+"""
+静态 API 预渲染
+把只随 YAML 变化的只读接口（问题列表、问题摘要、统计信息和每个问题的完整树）
+渲染为预压缩的 JSON 文件，由 nginx 直接返回，FastAPI 只处理其余请求
+
+目录结构:
+    <输出目录>/
+    ├── current -> cfd71798c2da          # 指向最新版本的符号链接（原子替换）
+    └── cfd71798c2da/
+        ├── manifest.json
+        └── api/
+            ├── issues.json / issues.json.gz
+            ├── stats.json / stats.json.gz
+            └── issues/
+                ├── summary.json / summary.json.gz
+                └── <问题名称>/tree.json / tree.json.gz
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+from src.utils.knowledge_base import KnowledgeSnapshot
+from api.serializers import tree_node_to_dict, dumps_json
+
+MANIFEST_NAME = "manifest.json"
+CURRENT_LINK = "current"
+
+
+def iter_static_routes(snapshot: KnowledgeSnapshot) -> Iterator[Tuple[str, bytes]]:
+    """
+    逐个产出需要预渲染的接口路径和响应体（与对应接口不带参数时的响应完全一致）
+
+    Yields:
+        (接口路径, JSON 响应体)
+    """
+    names = list(snapshot.catalog.names)
+    yield "/api/issues", dumps_json({"issues": names, "total": len(names)})
+    yield "/api/issues/summary", snapshot.catalog.summary_body
+    yield "/api/stats", dumps_json(snapshot.stats)
+
+    for name in snapshot.catalog.entries:
+        # 包含路径分隔符的名称无法对应到文件，由后端处理
+        if "/" in name or name in (".", "..") or "\x00" in name:
+            continue
+        tree = snapshot.tree_builder.build_uncached_tree(name)
+        if tree:
+            yield f"/api/issues/{name}/tree", dumps_json(tree_node_to_dict(tree))
+
+
+def write_static_bundle(snapshot: KnowledgeSnapshot, out_dir: str, keep: int = 3) -> Path:
+    """
+    把快照渲染到 <out_dir>/<版本号>，然后把 current 链接切换到该版本
+
+    同一版本已经生成过时直接切换链接。先写入临时目录再重命名，nginx 不会读到写了一半的文件；
+    切换后保留最近 keep 个版本，正在读取旧版本文件的请求不受影响。
+
+    Args:
+        snapshot: 知识库快照
+        out_dir: 输出目录
+        keep: 保留的版本数
+
+    Returns:
+        该版本的目录
+    """
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    version_dir = root / snapshot.version
+
+    if not (version_dir / MANIFEST_NAME).exists():
+        tmp_dir = root / f".{snapshot.version}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        files = {route: _write_route(tmp_dir, route, body) for route, body in iter_static_routes(snapshot)}
+        manifest = {
+            "version": snapshot.version,
+            "generatedAt": time.time(),
+            "loadedAt": snapshot.loaded_at,
+            "files": files
+        }
+        (tmp_dir / MANIFEST_NAME).write_bytes(dumps_json(manifest))
+        try:
+            os.rename(tmp_dir, version_dir)
+        except OSError:
+            # 其它进程已经生成了同一版本
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    _switch_current(root, snapshot.version)
+    _prune(root, keep)
+    return version_dir
+
+
+def read_manifest(out_dir: str) -> Dict:
+    """读取 current 指向版本的清单"""
+    import json
+    with open(Path(out_dir) / CURRENT_LINK / MANIFEST_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_route(base: Path, route: str, body: bytes) -> Dict:
+    """写入一个接口的 JSON 和 gzip 文件，返回清单条目"""
+    relative = route.lstrip("/") + ".json"
+    path = base / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(body)
+    # mtime=0 使相同内容生成相同的压缩文件
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    path.with_name(path.name + ".gz").write_bytes(compressed)
+    return {
+        "file": relative,
+        "bytes": len(body),
+        "gzipBytes": len(compressed),
+        "sha256": hashlib.sha256(body).hexdigest()
+    }
+
+
+def _switch_current(root: Path, version: str):
+    """原子替换 current 链接（相对路径，挂载到其它容器中同样有效）"""
+    link = root / CURRENT_LINK
+    if link.is_symlink() and os.readlink(link) == version:
+        return
+    tmp_link = root / f".{CURRENT_LINK}.{os.getpid()}.tmp"
+    if tmp_link.is_symlink() or tmp_link.exists():
+        tmp_link.unlink()
+    os.symlink(version, tmp_link)
+    os.replace(tmp_link, link)
+
+
+def _prune(root: Path, keep: int):
+    """删除最旧的版本目录（不删除 current 指向的版本）"""
+    current = os.readlink(root / CURRENT_LINK)
+    versions = sorted(
+        (path for path in root.iterdir()
+         if path.is_dir() and not path.is_symlink() and not path.name.startswith(".")
+         and (path / MANIFEST_NAME).exists()),
+        key=lambda path: (path / MANIFEST_NAME).stat().st_mtime,
+        reverse=True
+    )
+    for path in versions[max(keep, 1):]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
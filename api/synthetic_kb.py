@@ -0,0 +1,130 @@
+"""
+合成知识库生成器
+按参数生成确定性的 data/ 目录（相同参数和随机种子生成完全相同的文件），用于基准测试和负载测试
+
+- 前 refer_targets 比例的问题作为被引用的公共问题，其余问题通过 refer 引用它们
+- refer_fan_in: 每个公共问题被多少个问题引用
+- cycles: 公共问题之间互相引用的对数（A → B 且 B → A）
+- broken_refs: 指向不存在问题的 refer 数量
+"""
+
+import math
+import random
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import yaml
+
+_WORDS = ("磁盘", "内存", "网络", "集群", "节点", "索引", "延迟", "告警", "进程", "日志",
+          "kafka", "es", "yarn", "hdfs", "cpu", "io", "分片", "副本", "写入", "查询")
+_SUFFIXES = ("异常", "过高", "不足", "卡顿", "失败", "超时", "不均匀", "未启动")
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """合成知识库参数"""
+    issues: int = 100  # 问题数量
+    depth: int = 2  # 每个问题的检查项层数
+    branching: int = 3  # 每个检查项的子项数量
+    refer_targets: float = 0.1  # 作为公共问题被引用的问题比例
+    refer_fan_in: int = 3  # 每个公共问题被引用的次数
+    cycles: int = 2  # 公共问题之间的循环引用对数
+    broken_refs: int = 2  # 指向不存在问题的 refer 数量
+    files_per_dir: int = 100  # 每个子目录的文件数
+    seed: int = 42  # 随机种子
+
+
+def issue_name(index: int) -> str:
+    """第 index 个合成问题的名称"""
+    return f"合成问题{index:05d}"
+
+
+def generate(spec: SyntheticSpec, out_dir: str) -> Dict:
+    """
+    生成合成知识库
+
+    Args:
+        spec: 生成参数
+        out_dir: 输出目录（已有的同名文件会被覆盖）
+
+    Returns:
+        生成结果摘要（参数、文件数、检查项数、refer 数量）
+    """
+    rng = random.Random(spec.seed)
+    root = Path(out_dir)
+    names = [issue_name(i) for i in range(spec.issues)]
+    target_count = min(spec.issues, math.ceil(spec.issues * spec.refer_targets)) if spec.refer_fan_in else 0
+    targets = names[:target_count]
+    target_set = set(targets)
+    referrers = names[target_count:] or names
+
+    refers: Dict[str, List[str]] = {name: [] for name in names}
+    for target in targets:
+        for source in rng.sample(referrers, min(spec.refer_fan_in, len(referrers))):
+            if source != target:
+                refers[source].append(target)
+    for _ in range(min(spec.cycles, target_count // 2)):
+        first, second = rng.sample(targets, 2)
+        refers[first].append(second)
+        refers[second].append(first)
+    for i in range(spec.broken_refs):
+        refers[rng.choice(names)].append(f"不存在的问题{i:03d}")
+
+    node_count = 0
+    for index, name in enumerate(names):
+        checklist = _checklist(rng, spec.depth, spec.branching)
+        node_count += _count(checklist)
+        for refer in refers[name]:
+            # refer 挂在随机一个第一层检查项下（没有检查项时挂在根上）
+            parent = rng.choice(checklist)["checklist"] if checklist else checklist
+            parent.append({"refer": refer})
+
+        data = {
+            "status": name,
+            "describe": _sentence(rng),
+            "priority": rng.randint(1, 10),
+            "version": "-",
+            # 公共问题只通过引用访问，不在问题列表中显示
+            "display": name not in target_set,
+            "checklist": checklist
+        }
+        path = root / f"group{index // spec.files_per_dir:04d}" / f"issue{index:05d}.yml"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+    return {
+        "spec": asdict(spec),
+        "files": len(names),
+        "checklistItems": node_count,
+        "refers": sum(len(items) for items in refers.values())
+    }
+
+
+def _checklist(rng: random.Random, depth: int, branching: int) -> List[Dict]:
+    """生成 depth 层、每层 branching 个子项的检查项列表（同一层的标题互不相同）"""
+    if depth <= 0:
+        return []
+    items = []
+    for i in range(branching):
+        title = f"{rng.choice(_WORDS)}{rng.choice(_SUFFIXES)}-{depth}.{i}"
+        items.append({
+            "status": title,
+            "describe": _sentence(rng),
+            "priority": rng.randint(1, 10),
+            "version": "-",
+            "todo": _sentence(rng),
+            "checklist": _checklist(rng, depth - 1, branching)
+        })
+    return items
+
+
+def _sentence(rng: random.Random) -> str:
+    """随机描述文本"""
+    return "检查" + "、".join(rng.choice(_WORDS) for _ in range(4)) + rng.choice(_SUFFIXES) + "的原因"
+
+
+def _count(items: List[Dict]) -> int:
+    """统计检查项数量（不含 refer）"""
+    return sum(1 + _count(item.get("checklist", [])) for item in items if "refer" not in item)
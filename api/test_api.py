@@ -88,6 +88,24 @@ def test_get_stats():
         return False
 
 
+def test_search():
+    """测试全文检索"""
+    print("\n" + "=" * 50)
+    print("测试: GET /api/search")
+    print("=" * 50)
+    try:
+        response = requests.get(f"{BASE_URL}/api/search", params={"q": "du -sh", "limit": 5})
+        print(f"状态码: {response.status_code}")
+        data = response.json()
+        print(f"结果数量: {data.get('total', 0)}")
+        for result in data.get('results', []):
+            print(f"  {' → '.join(result['path'])} [{result['field']}]")
+        return response.status_code == 200
+    except Exception as e:
+        print(f"错误: {e}")
+        return False
+
+
 def main():
     """运行所有测试"""
     print("开始测试运维知识库 API...")
@@ -100,6 +118,7 @@ def main():
         "问题列表": test_get_issues(),
         "问题树形结构": test_get_issue_tree(),
         "统计信息": test_get_stats(),
+        "全文检索": test_search(),
     }
 
     print("\n" + "=" * 50)
@@ -0,0 +1,65 @@
+"""
+自动补全测试
+验证中文前缀、拼音全拼和首字母补全，以及按类型过滤时不会漏掉排名靠后的候选项
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from src.models.checklist import ChecklistItem, Issue
+from src.utils.autocomplete import AutocompleteIndex, pinyin_keys
+
+
+def _issue(name, priority, titles, display=True):
+    return Issue(file_name=f"{name}.yml", status=name, describe="描述", priority=priority, version="-",
+                 checklist=[ChecklistItem(status=title, describe="说明", priority=9, version="-", todo="")
+                            for title in titles], display=display)
+
+
+def test_pinyin_keys():
+    """拼音全拼和首字母，非中文片段原样保留"""
+    assert pinyin_keys("Es集群") == ("esjiqun", "esjq")
+    assert pinyin_keys("kafka") == ()
+
+
+def test_complete_by_prefix_and_pinyin():
+    """中文前缀、全拼和首字母都能补全，按优先级排序"""
+    index = AutocompleteIndex({
+        "集群磁盘分布不均匀": _issue("集群磁盘分布不均匀", 8, ["磁盘占用过高"]),
+        "集群网络异常": _issue("集群网络异常", 5, [])
+    })
+
+    for query in ("集群", "jiqun", "jq"):
+        assert [item["title"] for item in index.complete(query)] == ["集群磁盘分布不均匀", "集群网络异常"], query
+    assert [item["id"] for item in index.complete("jqcp")] == ["集群磁盘分布不均匀"]
+    assert index.complete("cpzy")[0]["path"] == ["集群磁盘分布不均匀", "磁盘占用过高"]
+
+
+def test_kind_filter_not_limited_by_other_kind():
+    """短前缀被大量排名更高的检查项占满时，kind=issue 仍能返回问题"""
+    nodes = [f"aa检查{i}" for i in range(AutocompleteIndex.MAX_RESULTS + 10)]
+    index = AutocompleteIndex({
+        "容器": _issue("容器", 9, nodes),
+        "aaissue": _issue("aaissue", 1, [])
+    })
+
+    assert [item["id"] for item in index.complete("aa", 10, "issue")] == ["aaissue"]
+    assert [item["id"] for item in index.complete("aais", 10, "issue")] == ["aaissue"]
+    assert len(index.complete("aa", 10, "node")) == 10
+    assert all(item["kind"] == "node" for item in index.complete("aa", 10))
+
+
+def test_autocomplete_endpoint():
+    """补全接口返回当前快照的结果"""
+    client = TestClient(main.app)
+    title = main.knowledge_base.snapshot.catalog.names[0]
+
+    body = client.get("/api/autocomplete", params={"q": title[:2], "kind": "issue"}).json()
+    assert title in [item["title"] for item in body["suggestions"]]
+    assert client.get("/api/autocomplete", params={"q": "a", "kind": "bad"}).status_code == 422
@@ -0,0 +1,95 @@
+"""
+版本推送测试
+验证快照发布后连接收到新版本和变化的问题，以及断线重连时的补发
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.events import VersionBroadcaster
+
+
+def _snapshot(version, changed=(), previous_version=None):
+    return SimpleNamespace(version=version, loaded_at=0.0, changed_issues=tuple(changed),
+                           previous_version=previous_version)
+
+
+def _parse(message):
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return fields["id"], json.loads(fields["data"])
+
+
+def test_publish_from_reload_thread_wakes_streams():
+    """重新加载线程发布新快照后，所有连接收到新版本和变化的问题"""
+    async def scenario():
+        broadcaster = VersionBroadcaster(keepalive=5)
+        broadcaster.bind(asyncio.get_running_loop(), _snapshot("v1"))
+
+        streams = [broadcaster.stream(None) for _ in range(3)]
+        for stream in streams:
+            assert (await anext(stream)).startswith("retry:")
+            assert _parse(await anext(stream))[1]["previousVersion"] is None
+        assert broadcaster.clients == 3
+
+        pending = [asyncio.ensure_future(anext(stream)) for stream in streams]
+        await asyncio.sleep(0.01)
+        await asyncio.to_thread(broadcaster.notify_threadsafe, _snapshot("v2", ["告警延迟"]))
+
+        for message in await asyncio.wait_for(asyncio.gather(*pending), 1):
+            event_id, data = _parse(message)
+            assert event_id == "v2"
+            assert data == {"version": "v2", "previousVersion": "v1", "loadedAt": 0.0,
+                            "changedIssues": ["告警延迟"], "full": False}
+
+        for stream in streams:
+            await stream.aclose()
+        assert broadcaster.clients == 0
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_receives_changes_since_last_event():
+    """断线重连时合并补发期间的变化，版本不在历史中时要求全部重新获取"""
+    async def scenario():
+        broadcaster = VersionBroadcaster(history_size=3)
+        broadcaster.bind(asyncio.get_running_loop(), _snapshot("v1"))
+        broadcaster._publish(broadcaster._to_event(_snapshot("v2", ["a"])))
+        broadcaster._publish(broadcaster._to_event(_snapshot("v3", ["b"])))
+
+        stream = broadcaster.stream("v1")
+        await anext(stream)
+        _, data = _parse(await anext(stream))
+        assert data["changedIssues"] == ["a", "b"] and not data["full"]
+        await stream.aclose()
+
+        broadcaster._publish(broadcaster._to_event(_snapshot("v4", ["c"])))
+        stream = broadcaster.stream("v1")
+        await anext(stream)
+        _, data = _parse(await anext(stream))
+        assert data["full"]
+        await stream.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_forked_worker_reports_changes_since_previous_version():
+    """主进程重新加载后 fork 的工作进程仍能告诉从旧工作进程重连的客户端变化了哪些问题"""
+    async def scenario():
+        broadcaster = VersionBroadcaster(keepalive=5)
+        broadcaster.bind(asyncio.get_running_loop(), _snapshot("v2", ["告警延迟"], previous_version="v1"))
+        assert broadcaster.changes_since("v1") == ["告警延迟"]
+        assert broadcaster.changes_since("v0") is None
+
+        stream = broadcaster.stream("v1")
+        await anext(stream)
+        _, data = _parse(await anext(stream))
+        assert data["version"] == "v2" and data["changedIssues"] == ["告警延迟"] and not data["full"]
+        await stream.aclose()
+
+    asyncio.run(scenario())
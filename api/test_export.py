@@ -0,0 +1,85 @@
+"""
+NDJSON 导出测试
+验证导出记录与问题树一致、不写入树缓存，以及内存占用不随知识库规模增长
+"""
+
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from api.export import iter_export_records, iter_ndjson
+from api.serializers import catalog_to_summary_json
+from src.utils.knowledge_base import KnowledgeBase
+
+
+def _write_synthetic_kb(data_dir: Path, issue_count: int):
+    """生成指定数量的问题，每个问题 3 层共约 40 个检查项，问题 1 起都引用问题 0"""
+    for i in range(issue_count):
+        lines = [f'status: "问题{i}"', 'describe: "描述"', "priority: 5", 'version: "-"', "display: true", "checklist:"]
+        if i > 0:
+            lines.append('  - refer: "问题0"')
+        for a in range(3):
+            lines += [f'  - status: "检查{i}_{a}"', '    describe: "说明"', "    priority: 5", '    version: "-"',
+                      '    todo: "处理方法"', "    checklist:"]
+            for b in range(12):
+                lines += [f'      - status: "子项{i}_{a}_{b}"', '        describe: "说明"', "        priority: 5",
+                          '        version: "-"', '        todo: "处理方法"']
+        (data_dir / f"issue_{i}.yml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _export_peak(data_dir: Path, issue_count: int) -> int:
+    _write_synthetic_kb(data_dir, issue_count)
+    knowledge_base = KnowledgeBase(data_dir=str(data_dir), summary_renderer=catalog_to_summary_json)
+    snapshot = knowledge_base.load()
+
+    tracemalloc.start()
+    lines = sum(chunk.count(b"\n") for chunk in iter_ndjson(iter_export_records(snapshot, "expanded", "node")))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert snapshot.tree_builder.built_trees == {}
+    assert lines == 2 + sum(entry.expanded_count + 1 for entry in snapshot.catalog.entries.values())
+    return peak
+
+
+def test_export_memory_independent_of_kb_size(tmp_path):
+    """问题数增加 8 倍时导出的内存峰值基本不变（只与最大的单个问题有关）"""
+    small_dir, large_dir = tmp_path / "small", tmp_path / "large"
+    small_dir.mkdir()
+    large_dir.mkdir()
+
+    small_peak = _export_peak(small_dir, 10)
+    large_peak = _export_peak(large_dir, 80)
+    assert large_peak < small_peak * 1.5
+
+
+def test_export_endpoint_streams_ndjson():
+    """导出接口的记录与问题树接口一致，normalized 形式中引用只输出占位节点"""
+    client = TestClient(main.app)
+    snapshot = main.knowledge_base.snapshot
+
+    response = client.get("/api/export")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert records[0]["type"] == "meta" and records[0]["version"] == snapshot.version
+    assert records[-1] == {"type": "end", "issueCount": len(records) - 2, "recordCount": len(records) - 2}
+    issues = {record["issue"]: record["tree"] for record in records[1:-1]}
+    assert set(issues) == set(snapshot.catalog.entries)
+
+    name = snapshot.catalog.names[0]
+    assert issues[name] == client.get(f"/api/issues/{name}/tree").json()
+
+    response = client.get("/api/export", params={"form": "normalized", "granularity": "node"})
+    nodes = [json.loads(line) for line in response.text.splitlines()[1:-1]]
+    refer_nodes = [node for node in nodes if node.get("referTo")]
+    assert refer_nodes and all(node["childCount"] == 0 for node in refer_nodes)
+    assert all(node["parentId"] is None for node in nodes if node["depth"] == 0)
+
+    assert client.get("/api/export", params={"form": "bad"}).status_code == 422
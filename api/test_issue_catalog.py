@@ -0,0 +1,72 @@
+"""
+问题目录测试
+验证目录与问题树一致，以及问题列表和摘要接口直接返回加载时构建的结果
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from src.utils.data_loader import DataLoader
+from src.utils.issue_catalog import IssueCatalog
+from src.utils.tree_builder import TreeBuilder
+
+
+def _node_count(node) -> int:
+    return 1 + sum(_node_count(child) for child in node.children)
+
+
+def test_expanded_counts_match_built_trees():
+    """展开引用后的数量与 TreeBuilder 构建出的树一致"""
+    snapshot = main.knowledge_base.snapshot
+    for name, entry in snapshot.catalog.entries.items():
+        tree = snapshot.tree_builder.build_complete_tree(name)
+        assert entry.expanded_count == _node_count(tree) - 1, name
+
+
+def test_expanded_counts_with_cyclic_refers(tmp_path):
+    """循环引用时每个问题的数量仍与它作为根构建出的树一致"""
+    refers = {"A": ["B"], "B": ["A"], "C": ["A", "B"]}
+    for name, targets in refers.items():
+        lines = [f'status: "{name}"', 'describe: "描述"', "priority: 5", 'version: "-"', "display: true",
+                 "checklist:", f'  - status: "{name}检查"', '    describe: "说明"']
+        lines += [f'  - refer: "{target}"' for target in targets]
+        (tmp_path / f"{name}.yml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    data_loader = DataLoader(data_dir=str(tmp_path))
+    data_loader.load_all_issues()
+    tree_builder = TreeBuilder(data_loader)
+    for name, entry in data_loader.catalog.entries.items():
+        assert entry.expanded_count == _node_count(tree_builder.build_complete_tree(name)) - 1, name
+    assert data_loader.catalog.entries["B"].expanded_count == 3
+
+
+def test_visible_issues_sorted_by_priority():
+    """可见问题按优先级降序，同优先级保持加载顺序"""
+    snapshot = main.knowledge_base.snapshot
+    issues = list(snapshot.data_loader.issues.values())
+    expected = [issue.status for issue in sorted(
+        (issue for issue in issues if issue.display), key=lambda issue: issue.priority, reverse=True
+    )]
+    assert list(snapshot.catalog.names) == expected
+    assert snapshot.data_loader.get_issue_names() == expected
+
+
+def test_endpoints_read_from_catalog(monkeypatch):
+    """问题列表和摘要接口直接返回目录中的数据"""
+    snapshot = main.knowledge_base.snapshot
+    client = TestClient(main.app)
+
+    summary = client.get("/api/issues/summary")
+    assert summary.content == snapshot.catalog.summary_body
+    assert [item["title"] for item in summary.json()["issues"]] == list(snapshot.catalog.names)
+    assert client.get("/api/issues").json()["issues"] == list(snapshot.catalog.names)
+
+    # 请求时不再重新统计
+    monkeypatch.setattr(IssueCatalog, "build", None)
+    assert client.get("/api/issues/summary").status_code == 200
@@ -0,0 +1,152 @@
+"""
+问题树接口测试
+验证子树查询（root / path / depth）和批量接口中 refer 子树的展开层数与节点 ID 对应关系
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from api.serializers import catalog_to_summary_json
+from src.utils.knowledge_base import KnowledgeBase
+
+
+def _render(issue_name, root=None, path=None, depth=None):
+    snapshot = main.knowledge_base.snapshot
+    return json.loads(main._render_issue_tree(snapshot, issue_name, root, path, depth))
+
+
+def _first_issue_with_grandchildren():
+    snapshot = main.knowledge_base.snapshot
+    for name in snapshot.catalog.names:
+        tree = snapshot.tree_builder.build_complete_tree(name)
+        for child in tree.children:
+            if child.children:
+                return tree, child
+    raise AssertionError("知识库中没有两层以上的问题")
+
+
+def _max_depth(node):
+    return 1 + max((_max_depth(child) for child in node["subCheckItems"]), default=-1)
+
+
+def test_depth_limits_expansion():
+    """depth=0 只返回根节点，depth=1 返回直接子项，被截断的节点带有 truncated 和 childCount"""
+    tree, _ = _first_issue_with_grandchildren()
+
+    root_only = _render(tree.status, depth=0)
+    assert root_only["subCheckItems"] == []
+    assert root_only["truncated"] is True and root_only["childCount"] == len(tree.children)
+
+    one_level = _render(tree.status, depth=1)
+    assert [item["id"] for item in one_level["subCheckItems"]] == [child.get_node_id() for child in tree.children]
+    for item, child in zip(one_level["subCheckItems"], tree.children):
+        assert item["subCheckItems"] == []
+        assert item.get("childCount", 0) == len(child.children)
+        assert item.get("truncated", False) == bool(child.children)
+
+    full = _render(tree.status)
+    assert "truncated" not in full and _max_depth(full) > 1
+
+
+def test_root_and_path_select_subtree():
+    """root 和 path 都能定位到同一个子树"""
+    tree, child = _first_issue_with_grandchildren()
+
+    by_id = _render(tree.status, root=child.get_node_id(), depth=1)
+    by_path = _render(tree.status, path=list(child.original_path), depth=1)
+    assert by_id == by_path
+    assert by_id["id"] == child.get_node_id()
+    assert len(by_id["subCheckItems"]) == len(child.children)
+
+
+def test_unknown_node_returns_404():
+    """不存在的 root、首个元素不是根节点的 path 和不存在的问题都返回 404"""
+    tree, child = _first_issue_with_grandchildren()
+
+    for kwargs in ({"root": "不存在的节点"}, {"path": ["其它问题"] + list(child.original_path[1:])}):
+        with pytest.raises(HTTPException) as error:
+            _render(tree.status, **kwargs)
+        assert error.value.status_code == 404
+
+    client = TestClient(main.app)
+    assert client.get("/api/issues/不存在的问题/tree").status_code == 404
+    assert client.get(f"/api/issues/{tree.status}/tree", params={"root": "不存在的节点"}).status_code == 404
+    assert client.get(f"/api/issues/{tree.status}/tree", params={"depth": -1}).status_code == 422
+
+
+def _write_issue(data_dir: Path, name: str, checklist):
+    lines = [f'status: "{name}"', 'describe: "描述"', "priority: 5", 'version: "-"', "display: true", "checklist:"]
+
+    def add(items, indent):
+        for item in items:
+            if isinstance(item, str):
+                lines.append(f'{indent}- refer: "{item}"')
+                continue
+            title, children = item
+            lines.append(f'{indent}- status: "{title}"')
+            lines.append(f'{indent}  describe: "说明"')
+            if children:
+                lines.append(f"{indent}  checklist:")
+                add(children, indent + "    ")
+
+    add(checklist, "  ")
+    (data_dir / f"{name}.yml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_batch_refers_expand_to_requested_depth(tmp_path):
+    """同一个被引用问题在不同层被引用时，refers 中的子树都按请求的 depth 展开"""
+    _write_issue(tmp_path, "R", [("R1", [("R2", [("R3", [])])])])
+    _write_issue(tmp_path, "A", [("A1", [("A2", ["R"])])])  # 第 3 层才引用 R
+    _write_issue(tmp_path, "B", ["R"])
+
+    knowledge_base = KnowledgeBase(data_dir=str(tmp_path), summary_renderer=catalog_to_summary_json)
+    snapshot = knowledge_base.load()
+
+    for issues in (["A", "B"], ["B", "A"]):
+        body = json.loads(main._render_issue_trees(snapshot, issues, 3))
+        assert _max_depth(body["refers"]["R"]) == 3, issues
+
+
+def test_batch_refer_ids_map_to_expanded_tree():
+    """占位节点的 referIdPrefix 加上 refers 中的 ID 可以直接用于 ?root= 查询"""
+    snapshot = main.knowledge_base.snapshot
+    client = TestClient(main.app)
+    body = client.post("/api/issues/trees", json={"issues": list(snapshot.catalog.names)}).json()
+
+    placeholders = []
+
+    def collect(node):
+        if node.get("referTo"):
+            placeholders.append(node)
+        for child in node["subCheckItems"]:
+            collect(child)
+
+    for item in body["items"]:
+        collect(item["tree"])
+    assert placeholders
+
+    checked = 0
+    for item in body["items"]:
+        stack = [item["tree"]]
+        while stack:
+            node = stack.pop()
+            stack.extend(node["subCheckItems"])
+            if not node.get("referTo") or not body["refers"].get(node["referTo"]):
+                continue
+            refer_tree = body["refers"][node["referTo"]]
+            for refer_child in refer_tree["subCheckItems"][:2]:
+                expanded_id = node["referIdPrefix"] + refer_child["id"]
+                response = client.get(f"/api/issues/{item['issue']}/tree", params={"root": expanded_id, "depth": 0})
+                assert response.status_code == 200, expanded_id
+                assert response.json()["title"] == refer_child["title"]
+                checked += 1
+    assert checked
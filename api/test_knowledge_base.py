@@ -0,0 +1,73 @@
+"""
+知识库快照测试
+验证后台重新加载构建完整的新快照后整体替换，旧快照不受影响，以及变化检测和请求合并
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.knowledge_base import KnowledgeBase
+
+
+def _load(tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(project_root / "data", data_dir)
+    knowledge_base = KnowledgeBase(data_dir=str(data_dir))
+    knowledge_base.load()
+    return knowledge_base, data_dir
+
+
+def _edit_describe(data_dir: Path, issue_name: str, text: str):
+    for path in data_dir.rglob("*.yml"):
+        content = path.read_text(encoding="utf-8")
+        if f'status: "{issue_name}"' in content or f"status: {issue_name}\n" in content:
+            lines = content.splitlines()
+            index = next(i for i, line in enumerate(lines) if line.startswith("describe:"))
+            lines[index] = f'describe: "{text}"'
+            path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            return
+    raise AssertionError(f"未找到问题 {issue_name} 的文件")
+
+
+def test_reload_swaps_snapshot_and_reports_changes(tmp_path):
+    """重新加载只报告变化的问题，旧快照（包括检索索引）保持不变"""
+    knowledge_base, data_dir = _load(tmp_path)
+    old = knowledge_base.snapshot
+    name = old.catalog.names[0]
+    _edit_describe(data_dir, name, "修改后的描述包含独有词汇甲乙丙")
+
+    new = knowledge_base.request_reload().result(timeout=30)
+
+    assert knowledge_base.snapshot is new
+    assert new.version != old.version and new.previous_version == old.version
+    assert new.changed_issues == (name,)
+    assert old.data_loader.get_issue_by_name(name).describe != "修改后的描述包含独有词汇甲乙丙"
+    assert [result["id"] for result in new.search_index.search("甲乙丙")] == [name]
+    assert old.search_index.search("甲乙丙") == []
+    assert knowledge_base.get_reload_status()["last_reload"]["changed_issues"] == [name]
+
+
+def test_unchanged_reload_keeps_version(tmp_path):
+    """文件没有变化时版本号不变"""
+    knowledge_base, _ = _load(tmp_path)
+    old = knowledge_base.snapshot
+    new = knowledge_base.request_reload().result(timeout=30)
+    assert new is not old
+    assert new.version == old.version and new.changed_issues == ()
+
+
+def test_concurrent_reload_requests_are_coalesced(tmp_path):
+    """重新加载进行中到达的多个请求合并为下一次重新加载，共享同一个结果"""
+    knowledge_base, _ = _load(tmp_path)
+    first = knowledge_base.request_reload()
+    pending = [knowledge_base.request_reload() for _ in range(5)]
+    first.result(timeout=30)
+    for future in pending:
+        future.result(timeout=30)
+
+    assert all(future is pending[0] for future in pending)
+    assert not knowledge_base.get_reload_status()["in_progress"]
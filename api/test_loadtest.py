@@ -0,0 +1,48 @@
+"""
+负载测试工具测试
+验证负载测试在合成数据上能跑通，并能发现同一版本返回不同内容的响应
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api.loadtest import LoadReport, percentile, parse_mix
+
+
+def test_percentile_and_mix():
+    """最近秩百分位数和请求比例解析"""
+    values = [i / 100 for i in range(1, 101)]
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (0.5, 0.95, 0.99)
+    assert percentile([], 99) == 0.0
+    assert parse_mix("issues=1,reload=2") == {"issues": 1, "reload": 2}
+
+
+def test_report_detects_mixed_versions():
+    """同一版本对应不同内容或不同探针代数时报告不一致"""
+    report = LoadReport()
+    report.bodies[("v1", "/api/issues")].update({"a"})
+    report.generations["v1"].add(1)
+    assert report.inconsistencies() == []
+
+    report.bodies[("v1", "/api/issues")].add("b")
+    report.generations["v1"].add(2)
+    assert len(report.inconsistencies()) == 2
+
+
+def test_load_test_with_reloads():
+    """进程内并发请求和重新加载混合运行，没有错误和不一致"""
+    result = subprocess.run(
+        [sys.executable, "api/loadtest.py", "--duration", "3", "--concurrency", "8", "--synthetic", "20",
+         "--mix", "issues=30,summary=20,tree=40,reload=10", "--json"],
+        cwd=project_root, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stdout + result.stderr[-2000:]
+    report = json.loads(result.stdout)
+    assert report["reloads"] > 0 and report["versions"] > 1
+    assert set(report["routes"]) == {"issues", "summary", "tree", "reload"}
+    assert report["inconsistencies"] == [] and report["errors"] == 0
@@ -0,0 +1,76 @@
+"""
+日志配置测试
+验证结构化字段输出、队列已满时不阻塞调用方，以及加载过程的日志级别
+"""
+
+import io
+import json
+import logging
+import queue
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils import logging_setup
+from src.utils.data_loader import DataLoader
+from api.test_snapshot_file import _write_issue
+
+
+@pytest.fixture
+def captured_log():
+    """把日志输出到内存（JSON 格式），结束后恢复默认配置"""
+    logging_setup.shutdown_logging()
+    stream = io.StringIO()
+    logging_setup.setup_logging(level="DEBUG", fmt="json", stream=stream)
+    yield stream
+    logging_setup.shutdown_logging()
+    logging_setup.setup_logging()
+
+
+def _records(stream: io.StringIO):
+    logging_setup.shutdown_logging()  # 等待后台线程写完队列中的记录
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records_carry_structured_fields(captured_log):
+    """结构化字段与消息一起输出，异常附带堆栈"""
+    logger = logging.getLogger("kb.test")
+    logger.info("构建完成 %s", "A", extra={"issue": "A", "duration_ms": 1.5})
+    try:
+        raise ValueError("坏数据")
+    except ValueError:
+        logger.exception("处理失败")
+
+    first, second = _records(captured_log)
+    assert first["msg"] == "构建完成 A" and first["level"] == "INFO" and first["logger"] == "kb.test"
+    assert first["issue"] == "A" and first["duration_ms"] == 1.5
+    assert second["level"] == "ERROR" and "坏数据" in second["msg"]
+
+
+def test_full_queue_drops_without_blocking():
+    """队列已满时丢弃记录并计数"""
+    handler = logging_setup._NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("kb.test", logging.INFO, __file__, 0, "消息", (), None)
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.queue.qsize() == 1 and handler.dropped == 1
+
+
+def test_loader_logs_per_file_at_debug_and_one_quality_event(tmp_path, captured_log):
+    """逐文件加载记录为 DEBUG；数据质量报告只输出一条事件，有问题时为 WARNING 并附带明细"""
+    _write_issue(tmp_path, "A", ["A1", "->不存在的问题"])
+    _write_issue(tmp_path, "B", ["B1"], display=False)
+    DataLoader(str(tmp_path)).load_all_issues()
+
+    records = _records(captured_log)
+    loaded = [r for r in records if r["msg"] == "成功加载"]
+    assert {r["issue"] for r in loaded} == {"A", "B"} and all(r["level"] == "DEBUG" for r in loaded)
+    quality = [r for r in records if r["logger"] == "src.utils.data_quality_reporter"]
+    assert len(quality) == 1 and quality[0]["level"] == "WARNING"
+    assert quality[0]["missing_refs"] == ["A -> 不存在的问题"] and quality[0]["orphan_issues"] == ["B"]
+    summary = next(r for r in records if r["logger"] == "src.utils.data_loader" and r["level"] == "INFO")
+    assert summary["issues"] == 2 and summary["failed_files"] == 0 and summary["duration_ms"] >= 0
@@ -0,0 +1,63 @@
+"""
+通过 gunicorn 主进程重新加载的测试
+验证管理口令、只读快照模式下拒绝，以及主进程完成之前的重复请求不再发送信号
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def signals(monkeypatch, tmp_path):
+    """开启主进程重新加载模式，记录发送的信号（不真正发送）"""
+    sent = []
+    monkeypatch.setattr(main, "RELOAD_VIA_MASTER", True)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    monkeypatch.setattr(main.os, "kill", lambda pid, sig: sent.append((pid, sig)))
+    return sent
+
+
+def test_master_reload_requires_admin_and_writable_mode(signals, monkeypatch):
+    """没有管理口令时拒绝；只读快照模式下返回 409；都不发送信号"""
+    client = TestClient(main.app)
+    assert client.post("/api/reload").status_code == 403
+    assert client.post("/api/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+    monkeypatch.setattr(main.knowledge_base, "snapshot_file", "/app/kb.snapshot")
+    assert client.post("/api/reload", headers=ADMIN).status_code == 409
+    assert signals == []
+
+
+def test_master_reload_is_debounced_until_master_finishes(signals, monkeypatch):
+    """主进程完成之前的重复请求合并为一次信号；完成或标记过期后再次发送"""
+    client = TestClient(main.app)
+    for _ in range(3):
+        response = client.post("/api/reload?wait=true", headers=ADMIN)
+        assert response.status_code == 202 and response.json()["success"]
+    assert len(signals) == 1 and signals[0][0] == os.getppid()
+
+    # 主进程（on_reload）完成后删除标记
+    monkeypatch.setattr(main.os, "getpid", lambda: os.getppid())
+    main.clear_master_reload_marker()
+    client.post("/api/reload", headers=ADMIN)
+    assert len(signals) == 2
+
+    marker = main._master_reload_marker(os.getppid())
+    expired = time.time() - main.MASTER_RELOAD_PENDING_TIMEOUT - 1
+    os.utime(marker, (expired, expired))
+    client.post("/api/reload", headers=ADMIN)
+    assert len(signals) == 3
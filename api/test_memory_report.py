@@ -0,0 +1,72 @@
+"""
+知识库内存统计测试
+验证展开 refer 后的节点数、共享对象只统计一次、统计不写入树缓存，以及管理接口
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from api.serializers import dumps_json, tree_node_to_dict
+from api.test_snapshot_file import _load, _write_issue
+from src.utils.memory_report import build_memory_report, deep_sizeof
+
+
+def _serialize(tree) -> bytes:
+    return dumps_json(tree_node_to_dict(tree))
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    """同一个对象只统计一次，已统计的对象不再计入"""
+    text = "磁盘空间不足" * 10
+    seen = set()
+    first = deep_sizeof([text, text], seen)
+    assert first == sys.getsizeof([text, text]) + sys.getsizeof(text)
+    assert deep_sizeof((text,), seen) == sys.getsizeof((text,))
+    assert deep_sizeof([text], set(), shared=seen) == sys.getsizeof([text])
+
+
+def test_memory_report_expands_refers_without_caching(tmp_path):
+    """引用展开计入引用方的节点数；未缓存的树统计完不写入缓存；缓存的树计入树缓存"""
+    _write_issue(tmp_path, "A", ["A1", "->B"])
+    _write_issue(tmp_path, "B", ["B1", "B2"], display=False)
+    _, snapshot = _load(data_dir=str(tmp_path))
+
+    report = build_memory_report(snapshot, _serialize, top=0)
+    rows = {row["issue"]: row for row in report["issues"]}
+    assert rows["A"]["rawItems"] == 2 and rows["A"]["expandedNodes"] == 5
+    assert rows["B"]["expandedNodes"] == 3
+    assert [row["issue"] for row in report["issues"]] == ["A", "B"]
+    assert rows["A"]["serializedBytes"] == len(_serialize(snapshot.tree_builder.build_uncached_tree("A")))
+    assert report["treeCache"]["trees"] == 0 and report["treeCache"]["totalBytes"] == 0
+    assert snapshot.tree_builder.built_trees == {}
+
+    snapshot.tree_builder.build_complete_tree("A")
+    snapshot.tree_builder.get_tree_index("A")
+    cached = build_memory_report(snapshot, sort="rawBytes")
+    assert cached["totals"]["serializedBytes"] is None
+    assert cached["treeCache"]["trees"] == 1 and cached["treeCache"]["nodes"] == 5
+    assert cached["treeCache"]["treeBytes"] == {row["issue"]: row for row in cached["issues"]}["A"]["treeBytes"] > 0
+    assert cached["treeCache"]["indexBytes"] > 0
+    assert len(build_memory_report(snapshot, top=1)["issues"]) == 1
+    assert cached["totals"]["rawBytes"] == report["totals"]["rawBytes"]
+
+
+def test_memory_endpoint_requires_admin(monkeypatch):
+    """管理接口需要口令，返回合计和按指定字段排序的问题列表"""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+    assert client.get("/api/admin/memory").status_code == 403
+
+    admin = {"X-Admin-Token": "secret"}
+    assert client.get("/api/admin/memory?sort=unknown", headers=admin).status_code == 422
+    report = client.get("/api/admin/memory?top=3&sort=serializedBytes", headers=admin).json()
+    assert report["version"] == main.knowledge_base.snapshot.version
+    assert report["totals"]["issues"] == len(main.knowledge_base.snapshot.data_loader.issues)
+    sizes = [row["serializedBytes"] for row in report["issues"]]
+    assert len(sizes) == 3 and sizes == sorted(sizes, reverse=True)
@@ -0,0 +1,69 @@
+"""
+指标接口测试
+验证 /metrics 的输出格式，请求、树缓存指标的计数，以及流式响应的大小记录
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from src.utils.metrics import MetricsRegistry, TREE_CACHE_HITS, TREE_CACHE_MISSES
+
+
+def test_histogram_renders_cumulative_buckets():
+    """直方图输出累计分桶、总和和计数"""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "示例", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    lines = registry.render().splitlines()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'demo_seconds_sum{route="/a"} 5.55' in lines
+    assert 'demo_seconds_count{route="/a"} 3' in lines
+
+
+def test_metrics_endpoint_reports_routes_and_tree_cache():
+    """请求按路由模板计数，树缓存命中和未命中分别计数"""
+    client = TestClient(main.app)
+    issue_name = main.knowledge_base.snapshot.data_loader.get_issue_names()[0]
+    main.knowledge_base.snapshot.tree_builder.built_trees.pop(issue_name, None)
+
+    hits, misses = TREE_CACHE_HITS.get(), TREE_CACHE_MISSES.get()
+    for _ in range(2):
+        assert client.get(f"/api/issues/{issue_name}/tree").status_code == 200
+    assert TREE_CACHE_MISSES.get() == misses + 1
+    assert TREE_CACHE_HITS.get() == hits + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'api_requests_total{method="GET",route="/api/issues/{issue_name}/tree",status="200"}' in body
+    assert "kb_tree_cache_size" in body
+    assert 'kb_last_load_phase_seconds{phase="parse"}' in body
+    assert f'kb_snapshot_info{{version="{main.knowledge_base.snapshot.version}"}} 1' in body
+
+
+def test_streaming_response_size_and_headers():
+    """流式响应（没有 content-length）按实际发送的响应体记录大小，响应头带版本和请求 ID"""
+    client = TestClient(main.app)
+    series = main.RESPONSE_BYTES._series
+    before = list(series.get(("/api/export",), [0, 0]))
+
+    response = client.get("/api/export", headers={"X-Request-ID": "export-1"})
+    assert response.status_code == 200 and "content-length" not in response.headers
+    assert response.headers["X-KB-Version"] == main.knowledge_base.snapshot.version
+    assert response.headers["X-Request-ID"] == "export-1"
+
+    after = series[("/api/export",)]
+    assert sum(after[:-1]) == sum(before[:-1]) + 1
+    assert after[-1] - before[-1] == len(response.content)
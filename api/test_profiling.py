@@ -0,0 +1,80 @@
+"""
+按请求性能分析测试
+验证管理口令校验、分析结果的保存和导出
+"""
+
+import marshal
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from api.profiling import profile_requested
+
+
+def test_profiling_disabled_without_admin_token(monkeypatch):
+    """未配置管理口令时不做分析，管理接口不存在"""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    client = TestClient(main.app)
+    issue_name = main.knowledge_base.snapshot.data_loader.get_issue_names()[0]
+
+    response = client.get(f"/api/issues/{issue_name}/tree?profile=1", headers={"X-Admin-Token": "x"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/api/admin/profiles").status_code == 404
+
+
+def test_profile_request_and_download(monkeypatch):
+    """管理员开启分析后可以查看耗时最多的函数并下载 .prof 文件"""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+    issue_name = main.knowledge_base.snapshot.data_loader.get_issue_names()[0]
+    main.knowledge_base.snapshot.tree_builder.built_trees.pop(issue_name, None)
+
+    response = client.get(f"/api/issues/{issue_name}/tree", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert "X-Profile-Id" not in response.headers
+
+    response = client.get(f"/api/issues/{issue_name}/tree", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+    profile_id = response.headers["X-Profile-Id"]
+
+    assert client.get(f"/api/admin/profiles/{profile_id}").status_code == 403
+    admin = {"X-Admin-Token": "secret"}
+    report = client.get(f"/api/admin/profiles/{profile_id}", params={"limit": 50}, headers=admin).json()
+    functions = {item["function"] for item in report["functions"]}
+    assert {"build_complete_tree", "tree_node_to_dict"} <= functions
+
+    download = client.get(f"/api/admin/profiles/{profile_id}", params={"format": "prof"}, headers=admin)
+    assert download.status_code == 200
+    assert isinstance(marshal.loads(download.content), dict)
+
+
+def test_profile_flag_values():
+    """分析开关为 0 / false / off 或空值时视为关闭"""
+    def scope(headers=(), query=b""):
+        return {"headers": [(name.encode(), value.encode()) for name, value in headers], "query_string": query}
+
+    assert profile_requested(scope([("x-profile", "1")]))
+    assert profile_requested(scope(query=b"profile=true"))
+    assert not profile_requested(scope())
+    assert not profile_requested(scope([("x-profile", "0")], b"profile=1"))
+    for value in (b"0", b"false", b"off", b""):
+        assert not profile_requested(scope(query=b"profile=" + value)), value
+    assert not profile_requested(scope(query=b"profiles=1"))
+
+
+def test_unprofiled_requests_skip_profiling(monkeypatch):
+    """profile=0 不开启分析；未开启分析的流式响应正常返回"""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    client = TestClient(main.app)
+    issue_name = main.knowledge_base.snapshot.data_loader.get_issue_names()[0]
+    admin = {"X-Admin-Token": "secret"}
+
+    response = client.get(f"/api/issues/{issue_name}/tree?profile=0", headers=admin)
+    assert response.status_code == 200 and "X-Profile-Id" not in response.headers
+
+    response = client.get("/api/export", headers=admin)
+    assert response.status_code == 200 and response.text.endswith("\n")
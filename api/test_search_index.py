@@ -0,0 +1,79 @@
+"""
+全文检索测试
+验证中文 n-gram 和命令片段检索，以及重新加载时索引的增量更新不影响旧索引
+"""
+
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from src.models.checklist import ChecklistItem, Issue
+from src.utils.search_index import SearchIndex, tokenize
+
+
+def _issue(name, *items):
+    return Issue(file_name=f"{name}.yml", status=name, describe=f"{name}的描述", priority=5, version="-",
+                 checklist=[ChecklistItem(status=title, describe=describe or "说明", priority=5, version="-", todo=todo)
+                            for title, describe, todo in items])
+
+
+def test_tokenize_mixes_cjk_ngrams_and_words():
+    """中文切分为单字和双字，查询时只用双字；英文按单词小写"""
+    assert tokenize("磁盘 du -SH") == ["du", "sh", "磁", "盘", "磁盘"]
+    assert tokenize("磁盘占用", for_query=True) == ["磁盘", "盘占", "占用"]
+
+
+def test_search_ranks_title_matches_first():
+    """标题命中排在描述命中之前，结果带路径和摘要"""
+    index = SearchIndex()
+    index.update({
+        "告警延迟": _issue("告警延迟", ("检查磁盘", "磁盘使用率", "执行 du -sh 清理"), ("检查网卡", "磁盘无关", ""))
+    })
+
+    results = index.search("检查磁盘")
+    assert results[0]["id"] == "告警延迟_检查磁盘"
+    assert results[0]["path"] == ["告警延迟", "检查磁盘"] and results[0]["field"] == "status"
+
+    results = index.search("du -sh")
+    assert [result["id"] for result in results] == ["告警延迟_检查磁盘"]
+    assert results[0]["field"] == "todo" and "du -sh" in results[0]["snippet"]
+
+
+def test_derive_reindexes_only_changed_issues():
+    """派生索引只复制被修改的 token 的倒排表，旧索引保持不变"""
+    issues = {
+        "问题甲": _issue("问题甲", ("检查磁盘", "", "")),
+        "问题乙": _issue("问题乙", ("检查网卡", "", ""))
+    }
+    old = SearchIndex()
+    old.update(issues)
+
+    changed = dict(issues, 问题乙=_issue("问题乙", ("检查内存", "", "")))
+    new = old.derive(changed, ["问题乙"])
+
+    assert [result["id"] for result in new.search("内存")] == ["问题乙_检查内存"]
+    assert new.search("网卡") == []
+    assert [result["id"] for result in old.search("网卡")] == ["问题乙_检查网卡"]
+    assert old.search("内存") == []
+
+    # 只属于未变化问题的 token 与旧索引共享同一个倒排表，被修改的 token 各自独立
+    assert new._postings["磁盘"] is old._postings["磁盘"]
+    assert new._postings["检查"] is not old._postings["检查"]
+    assert len(new) == len(old)
+
+
+def test_search_endpoint():
+    """检索接口返回当前快照的结果"""
+    client = TestClient(main.app)
+    snapshot = main.knowledge_base.snapshot
+    title = snapshot.catalog.names[0]
+
+    body = client.get("/api/search", params={"q": title, "limit": 5}).json()
+    assert body["query"] == title and 0 < body["total"] <= 5
+    assert any(result["id"] == title for result in body["results"])
+    assert client.get("/api/search", params={"q": ""}).status_code == 422
@@ -0,0 +1,194 @@
+"""
+排查会话测试
+验证会话操作与前端交互逻辑一致、恢复令牌（签名并绑定会话ID）、重新加载后的迁移，
+以及大量并发会话时的内存上限和空闲淘汰
+"""
+
+import asyncio
+import base64
+import json
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from src.utils.session_store import SessionStore, TroubleshootingSession
+from src.utils.tree_builder import TreeBuilder
+
+
+def _resolver():
+    tree_builder = main.knowledge_base.snapshot.tree_builder
+    return tree_builder.get_tree_index
+
+
+def _deepest_issue():
+    """子项最多的问题，便于测试多层导航"""
+    tree_builder = main.knowledge_base.snapshot.tree_builder
+    names = main.knowledge_base.snapshot.data_loader.get_issue_names()
+    return max(names, key=lambda name: len(tree_builder.get_tree_index(name)))
+
+
+def test_session_flow_and_resume():
+    """排除、确认、返回和恢复令牌"""
+    client = TestClient(main.app)
+    view = client.post("/api/sessions", json={"issue": _deepest_issue()}).json()
+    session_id = view["sessionId"]
+    first, second = view["items"][0]["id"], view["items"][1]["id"]
+
+    view = client.post(f"/api/sessions/{session_id}/exclude", json={"nodeId": first}).json()
+    assert view["items"][0]["state"] == "excluded"
+
+    view = client.post(f"/api/sessions/{session_id}/confirm", json={"nodeId": second}).json()
+    assert view["path"][-1]["id"] == second
+    assert view["confirmedItem"]["id"] == second
+    token = view["resumeToken"]
+
+    view = client.post(f"/api/sessions/{session_id}/back").json()
+    assert len(view["path"]) == 1 and view["confirmedItem"] is None
+    assert view["excludedItems"] == [first]
+
+    # 会话不在本进程时（多进程部署或已淘汰）通过恢复令牌重建
+    assert client.delete(f"/api/sessions/{session_id}").status_code == 204
+    assert client.get(f"/api/sessions/{session_id}").status_code == 404
+    view = client.get(f"/api/sessions/{session_id}", headers={"X-Session-Resume": token}).json()
+    assert view["path"][-1]["id"] == second
+    assert view["excludedItems"] == [first]
+
+    # 令牌绑定会话ID并签名：不能用于其它会话ID，也不能修改
+    assert client.get("/api/sessions/attacker-chosen", headers={"X-Session-Resume": token}).status_code == 404
+    payload, signature = token.split(".")
+    forged = base64.urlsafe_b64encode(json.dumps({"s": "x", "i": view["issue"]}).encode()).decode().rstrip("=")
+    for bad in (f"{forged}.{signature}", payload, f"{payload}.{signature[::-1]}"):
+        main.session_store.delete(session_id)
+        assert client.get(f"/api/sessions/{session_id}", headers={"X-Session-Resume": bad}).status_code == 404
+
+    assert client.post(f"/api/sessions/{session_id}/navigate", json={"nodeId": "不存在"}).status_code == 404
+    assert client.post("/api/sessions", json={"issue": "不存在的问题"}).status_code == 404
+
+
+def test_cold_tree_builds_run_in_worker_pool(monkeypatch):
+    """创建会话和通过恢复令牌重建会话时，冷构建在线程池中执行，不占用事件循环"""
+    client = TestClient(main.app)
+    tree_builder = main.knowledge_base.snapshot.tree_builder
+    issue_name = _deepest_issue()
+    build_threads = []
+    original = TreeBuilder._build_tree
+
+    def recording_build(self, name):
+        build_threads.append(threading.current_thread().name)
+        return original(self, name)
+
+    monkeypatch.setattr(TreeBuilder, "_build_tree", recording_build)
+
+    tree_builder.clear_cache()
+    view = client.post("/api/sessions", json={"issue": issue_name}).json()
+
+    tree_builder.clear_cache()
+    main.session_store.delete(view["sessionId"])
+    response = client.get(f"/api/sessions/{view['sessionId']}", headers={"X-Session-Resume": view["resumeToken"]})
+    assert response.status_code == 200
+
+    assert build_threads and all(name.startswith("api-worker") for name in build_threads), build_threads
+
+
+def test_session_migrates_to_reloaded_tree():
+    """重新加载后会话按节点ID迁移到新树"""
+    snapshot = main.knowledge_base.snapshot
+    issue_name = _deepest_issue()
+    tree_builders = [snapshot.tree_builder]
+    store = SessionStore(resolve_index=lambda name: tree_builders[-1].get_tree_index(name))
+
+    session = store.create(issue_name)
+    child = session.index.children[0][0]
+    child_id = session.index.node_ids[child]
+    session.navigate(child)
+    session.toggle_exclude(session.index.children[child][0] if session.index.children[child] else child)
+
+    tree_builders.append(TreeBuilder(snapshot.data_loader))
+    migrated = store.get(session.session_id)
+    assert migrated.index is tree_builders[-1].get_tree_index(issue_name)
+    assert migrated.index.node_ids[migrated.current] == child_id
+    assert migrated.excluded
+
+
+def test_thousands_of_concurrent_sessions_within_memory_budget():
+    """数千个并发会话在固定内存预算内，超过上限时淘汰最久未访问的会话"""
+    resolve_index = _resolver()
+    issue_names = main.knowledge_base.snapshot.data_loader.get_issue_names()
+    for name in issue_names:
+        resolve_index(name)
+
+    budget = 4 * 1024 * 1024
+    store = SessionStore(resolve_index=resolve_index, ttl=600, max_sessions=100000, max_bytes=budget)
+
+    def run_session(seed):
+        rng = random.Random(seed)
+        session = store.create(rng.choice(issue_names))
+        for _ in range(10):
+            session = store.get(session.session_id) or session
+            children = session.index.children[session.current]
+            if not children:
+                session.back()
+            elif rng.random() < 0.4:
+                session.toggle_exclude(rng.choice(children))
+            else:
+                session.confirm(rng.choice(children))
+            store.touch(session)
+        return session.session_id
+
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        session_ids = list(executor.map(run_session, range(5000)))
+    allocated = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(baseline, "filename"))
+    tracemalloc.stop()
+
+    assert len(store) == 5000
+    assert store.total_bytes <= budget
+    # 会话只保存编号和位集合：实际分配的内存（含存储字典）平均每个会话不到 1KB
+    assert allocated / len(store) < 1024
+
+    # 降低内存上限后，新建会话时淘汰最久未访问的会话
+    store.max_bytes = budget // 8
+    store.create(issue_names[0])
+    assert store.total_bytes <= store.max_bytes
+    assert store.get(session_ids[0]) is None
+    assert store.get(session_ids[-1]) is not None
+
+
+def test_idle_sessions_expire():
+    """超过空闲时间的会话被清理"""
+    store = SessionStore(resolve_index=_resolver(), ttl=0.05)
+    session = store.create(_deepest_issue())
+    time.sleep(0.1)
+    assert store.get(session.session_id) is None
+    assert len(store) == 0
+
+
+def test_concurrent_http_sessions():
+    """通过 HTTP 并发操作数百个会话，状态互不干扰"""
+    issue_name = _deepest_issue()
+
+    async def one(client, seed):
+        view = (await client.post("/api/sessions", json={"issue": issue_name})).json()
+        target = view["items"][seed % len(view["items"])]["id"]
+        view = (await client.post(f"/api/sessions/{view['sessionId']}/exclude", json={"nodeId": target})).json()
+        return target, view["excludedItems"]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[one(client, seed) for seed in range(300)])
+
+    for target, excluded in asyncio.run(scenario()):
+        assert excluded == [target]
@@ -0,0 +1,97 @@
+"""
+并发请求合并测试
+验证同一问题的并发冷请求只构建一次，失败时所有等待者收到同一个异常
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from src.utils.single_flight import SingleFlight, SINGLE_FLIGHT_CALLS
+from src.utils.tree_builder import TreeBuilder
+
+
+def test_concurrent_calls_share_one_execution():
+    """同一个键的并发调用只执行一次，结果共享；不同的键互不影响"""
+    flight = SingleFlight("test_share")
+    calls = []
+    release = threading.Event()
+
+    def work(key):
+        calls.append(key)
+        release.wait(1)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        futures = [executor.submit(flight.do, "a", work, "a") for _ in range(8)]
+        futures.append(executor.submit(flight.do, "b", work, "b"))
+        time.sleep(0.1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert sorted(calls) == ["a", "b"]
+    assert len({id(result) for result in results[:8]}) == 1
+    assert SINGLE_FLIGHT_CALLS.get("test_share", "shared") == 7
+
+
+def test_failure_propagates_to_all_waiters():
+    """执行失败时执行者和所有等待者都收到异常，之后的调用重新执行"""
+    flight = SingleFlight("test_failure")
+    release = threading.Event()
+
+    def fail():
+        release.wait(1)
+        raise ValueError("构建失败")
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        futures = [executor.submit(flight.do, "a", fail) for _ in range(5)]
+        time.sleep(0.1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="构建失败"):
+                future.result()
+
+    assert flight.do("a", lambda: "ok") == "ok"
+
+
+def test_concurrent_cold_requests_build_once(monkeypatch):
+    """同一问题的并发冷请求只构建和序列化一次"""
+    tree_builder = TreeBuilder(main.knowledge_base.snapshot.data_loader)
+    issue_name = main.knowledge_base.snapshot.data_loader.get_issue_names()[0]
+    snapshot = main.knowledge_base.snapshot
+    monkeypatch.setattr(main.knowledge_base, "_snapshot", type(snapshot)(**{
+        **snapshot.__dict__, "tree_builder": tree_builder, "version": "single-flight-test"
+    }))
+
+    builds = []
+    original_build = tree_builder._build_and_cache
+
+    def slow_build(name):
+        builds.append(name)
+        time.sleep(0.2)
+        return original_build(name)
+
+    monkeypatch.setattr(tree_builder, "_build_and_cache", slow_build)
+    shared_before = SINGLE_FLIGHT_CALLS.get("tree_render", "shared")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*[client.get(f"/api/issues/{issue_name}/tree") for _ in range(20)])
+
+    responses = asyncio.run(scenario())
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.content for response in responses}) == 1
+    assert builds == [issue_name]
+    assert SINGLE_FLIGHT_CALLS.get("tree_render", "shared") - shared_before == 19
@@ -0,0 +1,113 @@
+"""
+知识库编译和只读快照模式测试
+验证编译命令的错误检查、从快照文件加载的结果与从 YAML 加载一致，以及损坏文件的检测
+"""
+
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import cli
+from api.serializers import catalog_to_summary_json, tree_node_to_dict, dumps_json
+from src.utils.knowledge_base import KnowledgeBase
+from src.utils.snapshot_file import SnapshotFileError, read_snapshot_header
+
+
+def _write_issue(data_dir: Path, name: str, children, display=True):
+    lines = [f'status: "{name}"', 'describe: "描述"', "priority: 5", 'version: "-"',
+             f"display: {'true' if display else 'false'}", "checklist:"]
+    for child in children:
+        if child.startswith("->"):
+            lines.append(f'  - refer: "{child[2:]}"')
+        else:
+            lines += [f'  - status: "{child}"', '    describe: "说明"', '    priority: 5', '    version: "-"',
+                      '    todo: "处理磁盘空间"']
+    (data_dir / f"{name}.yml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _compile(data_dir: Path, output: Path, *args) -> int:
+    with contextlib.redirect_stderr(io.StringIO()):
+        return cli.main(["--data-dir", str(data_dir), "compile", "-o", str(output), *args])
+
+
+def _load(**kwargs):
+    knowledge_base = KnowledgeBase(summary_renderer=catalog_to_summary_json, **kwargs)
+    return knowledge_base, knowledge_base.load()
+
+
+def test_compile_fails_on_errors(tmp_path):
+    """无效的 refer 引用和解析失败的文件导致编译失败且不写入文件；--strict 时警告同样失败"""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    output = tmp_path / "kb.snapshot"
+    _write_issue(data_dir, "A", ["A1", "->不存在的问题"])
+    assert _compile(data_dir, output) == 1
+    assert not output.exists()
+
+    _write_issue(data_dir, "A", ["A1"])
+    (data_dir / "broken.yml").write_text("status: [\n", encoding="utf-8")
+    assert _compile(data_dir, output) == 1
+
+    (data_dir / "broken.yml").unlink()
+    _write_issue(data_dir, "孤立", ["B1"], display=False)
+    assert _compile(data_dir, output, "--strict") == 1
+    assert _compile(data_dir, output) == 0
+    header = read_snapshot_header(str(output))
+    assert header["issueCount"] == 2 and header["warnings"] == ["孤立问题: 孤立"]
+
+
+def test_snapshot_file_matches_yaml_load(tmp_path):
+    """从快照文件加载（不需要数据目录）的版本、摘要、问题树、检索、补全和按文件名查找的结果与从 YAML 加载一致"""
+    output = tmp_path / "kb.snapshot"
+    assert _compile(project_root / "data", output) == 0
+
+    _, from_yaml = _load(data_dir=str(project_root / "data"))
+    _, from_file = _load(data_dir=str(tmp_path / "不存在"), snapshot_file=str(output))
+
+    assert from_file.version == from_yaml.version
+    assert from_file.catalog.summary_body == from_yaml.catalog.summary_body
+    assert from_file.stats == from_yaml.stats and from_file.node_count == from_yaml.node_count
+    for name in from_yaml.catalog.names:
+        assert dumps_json(tree_node_to_dict(from_file.tree_builder.build_complete_tree(name))) == \
+            dumps_json(tree_node_to_dict(from_yaml.tree_builder.build_complete_tree(name)))
+    assert from_file.search_index.search("磁盘") == from_yaml.search_index.search("磁盘")
+    assert from_file.autocomplete_index.complete("jq") == from_yaml.autocomplete_index.complete("jq")
+    for name, issue in from_yaml.data_loader.issues.items():
+        assert from_file.data_loader.get_issue_by_file_name(issue.file_name).status == name
+
+
+def test_snapshot_file_reload_and_corruption(tmp_path):
+    """只读模式下重新加载读取新的快照文件；损坏的文件加载失败，继续使用旧快照"""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    output = tmp_path / "kb.snapshot"
+    _write_issue(data_dir, "A", ["A1"])
+    _write_issue(data_dir, "B", ["B1"])
+    assert _compile(data_dir, output) == 0
+    knowledge_base, first = _load(snapshot_file=str(output))
+
+    _write_issue(data_dir, "B", ["B1", "B2"])
+    assert _compile(data_dir, output) == 0
+    second = knowledge_base.request_reload().result(timeout=10)
+    assert second.changed_issues == ("B",) and second.previous_version == first.version
+    # 反序列化得到的检索索引可以继续增量更新
+    assert second.search_index.derive(second.data_loader.issues, []).search("磁盘")
+
+    data = bytearray(output.read_bytes())
+    data[-10] ^= 0xFF
+    output.write_bytes(bytes(data))
+    with pytest.raises(SnapshotFileError):
+        knowledge_base.request_reload().result(timeout=10)
+    assert knowledge_base.snapshot.version == second.version
+
+    output.write_bytes(b"not a snapshot")
+    with pytest.raises(SnapshotFileError):
+        _load(snapshot_file=str(output))
+    assert json.loads(knowledge_base.snapshot.catalog.summary_body)["total"] == 2
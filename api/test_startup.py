@@ -0,0 +1,36 @@
+"""
+启动测试
+验证导入 api.main 时不加载知识库，应用启动（lifespan）时完成加载并创建工作进程的对象
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+_CHECK_IMPORT = """
+import sys
+from api import main
+assert not main.knowledge_base.is_loaded
+assert main.session_store is None and main.profile_store is None and main.worker_pool is None
+assert "pypinyin" not in sys.modules
+print("imported", flush=True)
+
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    assert main.knowledge_base.is_loaded and main.worker_pool is not None
+    assert client.get("/api/issues").status_code == 200
+    assert client.post("/api/sessions", json={"issue": main.knowledge_base.snapshot.catalog.names[0]}).status_code == 201
+assert main.worker_pool is None
+"""
+
+
+def test_import_has_no_side_effects():
+    """导入时不加载知识库、不创建线程池，也不导入 pypinyin；启动后接口可用，关闭后释放线程池"""
+    result = subprocess.run(
+        [sys.executable, "-c", _CHECK_IMPORT], cwd=project_root, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    # 导入过程中没有任何输出（加载报告在启动后才打印）
+    assert result.stdout.startswith("imported\n")
@@ -0,0 +1,115 @@
+"""
+排查状态管理测试
+验证多个会话共享同一个知识库快照（问题树只构建一次）且排查状态互不影响，以及知识库重新加载后各会话按路径恢复排查位置
+"""
+
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+# 控制器包导入时会加载 Streamlit 界面模块
+pytest.importorskip("streamlit")
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.controllers.state_manager import StateManager
+from src.utils.knowledge_base import KnowledgeBase
+from api.test_snapshot_file import _write_issue
+
+
+def _write_nested_issue(data_dir: Path, name: str, children):
+    """写入两层检查项的问题：children 为 {检查项: [子检查项]}，子检查项以 -> 开头时为 refer"""
+    lines = [f'status: "{name}"', 'describe: "描述"', "priority: 5", 'version: "-"', "display: true", "checklist:"]
+    for child, grandchildren in children.items():
+        lines += [f'  - status: "{child}"', '    describe: "说明"', '    priority: 5', '    version: "-"',
+                  f'    todo: "处理{child}"', "    checklist:"]
+        for grandchild in grandchildren:
+            if grandchild.startswith("->"):
+                lines.append(f'      - refer: "{grandchild[2:]}"')
+            else:
+                lines += [f'      - status: "{grandchild}"', '        describe: "说明"', '        priority: 5',
+                          '        version: "-"', f'        todo: "处理{grandchild}"']
+    (data_dir / f"{name}.yml").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _knowledge_base(data_dir: Path) -> KnowledgeBase:
+    knowledge_base = KnowledgeBase(data_dir=str(data_dir))
+    knowledge_base.load()
+    return knowledge_base
+
+
+def test_sessions_share_snapshot_trees(tmp_path):
+    """多个会话使用同一个快照的树构建器，同一问题的树只构建一次"""
+    _write_nested_issue(tmp_path, "A", {"A1": ["A1a"], "A2": ["->B"]})
+    _write_issue(tmp_path, "B", ["B1"], display=False)
+    snapshot = _knowledge_base(tmp_path).snapshot
+
+    first, second = StateManager(snapshot.tree_builder), StateManager(snapshot.tree_builder)
+    assert first.set_current_issue("A") and second.set_current_issue("A")
+    assert first.state.current_tree is second.state.current_tree
+    assert list(snapshot.tree_builder.built_trees) == ["A"]
+
+
+def test_sessions_do_not_share_troubleshooting_state(tmp_path):
+    """同一问题的两个会话各自排除、确认检查项，互不影响，共享的问题树不被修改"""
+    _write_nested_issue(tmp_path, "A", {"A1": ["A1a"], "A2": ["A2a"]})
+    snapshot = _knowledge_base(tmp_path).snapshot
+    first, second = StateManager(snapshot.tree_builder), StateManager(snapshot.tree_builder)
+    first.set_current_issue("A")
+    second.set_current_issue("A")
+    tree_before = copy.deepcopy(first.state.current_tree)
+
+    a1, a2 = sorted(first.get_current_checklist_items(), key=lambda item: item.status)
+    assert first.exclude_item(a1)
+    assert first.confirm_item(a2)[0]
+    assert first.is_item_excluded(a1) and first.is_item_confirmed(a2)
+    assert not second.is_item_excluded(a1) and not second.is_item_confirmed(a2)
+    assert second.get_state_summary()["excluded_items_count"] == 0
+
+    assert second.exclude_item(a2)
+    assert not first.is_item_excluded(a2) and second.is_item_excluded(a2)
+    assert first.state.current_tree == tree_before
+
+    first.return_to_checklist()
+    assert not first.is_item_confirmed(a2) and first.is_item_excluded(a1)
+    first.set_current_issue("A")
+    assert not first.is_item_excluded(a1) and second.is_item_excluded(a2)
+
+
+def test_rebind_restores_position_after_reload(tmp_path):
+    """重新加载后按路径恢复导航位置和解决方案；路径不存在时回到根节点；问题被删除时重置"""
+    _write_nested_issue(tmp_path, "A", {"A1": ["A1a"], "A2": ["A2a"]})
+    knowledge_base = _knowledge_base(tmp_path)
+    manager = StateManager(knowledge_base.snapshot.tree_builder)
+    manager.set_current_issue("A")
+    a1 = next(item for item in manager.get_current_checklist_items() if item.status == "A1")
+    manager.navigate_to_child(a1)
+    leaf = manager.get_current_checklist_items()[0]
+    manager.exclude_item(leaf)
+    assert manager.navigate_to_child(leaf) == (True, "处理A1a")
+
+    _write_nested_issue(tmp_path, "A", {"A1": ["A1a"], "A2": ["A2a", "A2b"]})
+    (tmp_path / "A.yml").write_text((tmp_path / "A.yml").read_text(encoding="utf-8").replace(
+        "处理A1a", "新的处理方法"), encoding="utf-8")
+    snapshot = knowledge_base.request_reload().result(timeout=10)
+    assert manager.rebind(snapshot.tree_builder)
+    assert manager.state.current_tree is snapshot.tree_builder.build_complete_tree("A")
+    assert manager.state.navigation_path == ["A", "A1", "A1a"]
+    assert manager.state.current_checklist.status == "A1a"
+    assert manager.get_solution() == "新的处理方法"
+    assert manager.is_item_excluded(manager.state.current_checklist)
+
+    _write_nested_issue(tmp_path, "A", {"A2": ["A2a"]})
+    snapshot = knowledge_base.request_reload().result(timeout=10)
+    assert manager.rebind(snapshot.tree_builder)
+    assert manager.state.navigation_path == ["A"] and manager.state.current_checklist is None
+    assert manager.get_solution() is None
+
+    (tmp_path / "A.yml").unlink()
+    _write_issue(tmp_path, "C", ["C1"])
+    snapshot = knowledge_base.request_reload().result(timeout=10)
+    assert not manager.rebind(snapshot.tree_builder)
+    assert manager.state.current_issue_name is None and manager.state.navigation_path == []
@@ -0,0 +1,68 @@
+"""
+静态 API 预渲染测试
+验证生成的文件与对应接口的响应一致、清单内容以及版本目录的切换和清理
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from urllib.parse import quote
+
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from api.static_bundle import write_static_bundle, read_manifest, CURRENT_LINK
+
+
+def test_bundle_matches_live_endpoints(tmp_path):
+    """每个预渲染文件的内容与不带参数请求对应接口的响应一致，gzip 文件解压后相同"""
+    snapshot = main.knowledge_base.snapshot
+    write_static_bundle(snapshot, str(tmp_path))
+    manifest = read_manifest(str(tmp_path))
+    current = tmp_path / CURRENT_LINK
+
+    assert manifest["version"] == snapshot.version
+    assert os.readlink(current) == snapshot.version
+    assert {"/api/issues", "/api/issues/summary", "/api/stats"} <= set(manifest["files"])
+    assert len(manifest["files"]) == 3 + len(snapshot.catalog.entries)
+
+    client = TestClient(main.app)
+    for route, info in manifest["files"].items():
+        body = (current / info["file"]).read_bytes()
+        assert gzip.decompress((current / (info["file"] + ".gz")).read_bytes()) == body
+        assert info["bytes"] == len(body) and info["sha256"] == hashlib.sha256(body).hexdigest()
+
+        response = client.get(quote(route))
+        assert response.status_code == 200, route
+        assert json.loads(body) == response.json(), route
+
+
+def test_bundle_versions_switch_and_prune(tmp_path):
+    """同一版本不重复生成；新版本生成后切换 current，只保留最近 keep 个版本"""
+    snapshot = main.knowledge_base.snapshot
+    version_dir = write_static_bundle(snapshot, str(tmp_path))
+    manifest_mtime = (version_dir / "manifest.json").stat().st_mtime_ns
+    assert write_static_bundle(snapshot, str(tmp_path)) == version_dir
+    assert (version_dir / "manifest.json").stat().st_mtime_ns == manifest_mtime
+
+    class Renamed:
+        def __init__(self, version):
+            self.version = version
+
+        def __getattr__(self, name):
+            return getattr(snapshot, name)
+
+    os.utime(version_dir / "manifest.json", (0, 0))
+    for i in range(3):
+        written = write_static_bundle(Renamed(f"v{i}"), str(tmp_path), keep=2)
+        os.utime(written / "manifest.json", (i + 1, i + 1))
+
+    versions = sorted(path.name for path in tmp_path.iterdir() if not path.name.startswith("."))
+    assert versions == [CURRENT_LINK, "v1", "v2"]
+    assert os.readlink(tmp_path / CURRENT_LINK) == "v2"
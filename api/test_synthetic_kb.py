@@ -0,0 +1,66 @@
+"""
+合成知识库和微基准测试
+验证生成结果是确定的、引用关系符合参数，以及基准测试能输出结果文件
+"""
+
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import bench_kb
+from api.synthetic_kb import SyntheticSpec, generate, issue_name
+from src.utils.data_loader import DataLoader
+from src.utils.tree_builder import TreeBuilder
+
+
+def _files(data_dir: Path):
+    return {str(path.relative_to(data_dir)): path.read_bytes() for path in sorted(data_dir.rglob("*.yml"))}
+
+
+def test_generation_is_deterministic(tmp_path):
+    """相同参数生成完全相同的文件，不同随机种子生成不同的文件"""
+    spec = SyntheticSpec(issues=30, files_per_dir=10)
+    generate(spec, str(tmp_path / "a"))
+    generate(spec, str(tmp_path / "b"))
+    generate(SyntheticSpec(issues=30, files_per_dir=10, seed=7), str(tmp_path / "c"))
+
+    first = _files(tmp_path / "a")
+    assert len(first) == 30 and len({name.split("/")[0] for name in first}) == 3
+    assert first == _files(tmp_path / "b")
+    assert first != _files(tmp_path / "c")
+
+
+def test_generated_references(tmp_path):
+    """检查项数量、无效引用数量与参数一致，循环引用不影响树构建"""
+    spec = SyntheticSpec(issues=40, depth=2, branching=2, refer_fan_in=2, cycles=2, broken_refs=3)
+    summary = generate(spec, str(tmp_path))
+    loader = DataLoader(str(tmp_path))
+    loader.load_all_issues()
+
+    assert len(loader.issues) == 40
+    assert summary["checklistItems"] == 40 * (2 + 4)
+    assert len(loader.invalid_refs["not_exist"]) == 3
+    # 公共问题不显示，且都被引用了
+    assert len(loader.catalog.names) == 36 and loader.orphan_issues == []
+
+    builder = TreeBuilder(loader)
+    for index in range(40):
+        assert builder.build_complete_tree(issue_name(index)) is not None
+
+
+def test_benchmark_writes_results(tmp_path):
+    """基准测试为每个规模输出每项测量的结果"""
+    output = tmp_path / "bench.json"
+    with contextlib.redirect_stderr(io.StringIO()):
+        assert bench_kb.main(["--sizes", "5,10", "--repeat", "1", "-o", str(output)]) == 0
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    benchmarks = {"load_all_issues", "reference_checker", "build_complete_tree", "find_node_by_path", "tree_node_to_dict"}
+    assert {(record["size"], record["benchmark"]) for record in report["results"]} == \
+        {(size, name) for size in (5, 10) for name in benchmarks}
+    assert all(record["seconds"] >= 0 and record["ops"] > 0 for record in report["results"])
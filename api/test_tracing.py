@@ -0,0 +1,100 @@
+"""
+阶段耗时追踪测试
+验证区间嵌套、线程池中的区间归属发起请求的追踪、请求 ID 和管理接口，以及 JSON Lines 导出
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from src.utils import tracing
+
+
+@pytest.fixture
+def recorder():
+    recorder = tracing.configure_tracing(buffer_size=1000)
+    yield recorder
+    tracing.disable_tracing()
+
+
+def test_nested_spans_share_trace(recorder):
+    """嵌套区间记录父区间并共享追踪 ID；异常记录在区间属性中"""
+    token = tracing.set_trace_id("t1")
+    try:
+        with tracing.span("outer", issue="A") as outer:
+            with tracing.span("inner"):
+                pass
+            with pytest.raises(ValueError):
+                with tracing.span("failing"):
+                    raise ValueError()
+            outer.set(nodes=3)
+    finally:
+        tracing.reset_trace_id(token)
+
+    spans = {record["name"]: record for record in recorder.spans("t1")}
+    assert spans["outer"]["parentId"] is None and spans["outer"]["attrs"] == {"issue": "A", "nodes": 3}
+    assert spans["inner"]["parentId"] == spans["outer"]["spanId"]
+    assert spans["failing"]["attrs"]["error"] == "ValueError"
+    assert recorder.traces()[0]["name"] == "outer" and recorder.traces()[0]["spans"] == 3
+
+
+def test_disabled_tracing_records_nothing():
+    """未开启追踪时 span 返回空操作对象"""
+    tracing.disable_tracing()
+    with tracing.span("noop") as noop:
+        noop.set(ignored=True)
+    assert tracing.get_recorder() is None
+
+
+def test_request_trace_covers_build_and_serialize(recorder, monkeypatch):
+    """一次树请求的区间包括线程池中的树构建、每个引用和序列化，通过请求 ID 查询"""
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    snapshot = main.knowledge_base.snapshot
+    issue_name = next(name for name, entry in snapshot.catalog.entries.items()
+                      if entry.expanded_count > entry.checklist_count)
+    snapshot.tree_builder.built_trees.pop(issue_name, None)
+    client = TestClient(main.app)
+
+    response = client.get(f"/api/issues/{issue_name}/tree", headers={"X-Request-ID": "req-1"})
+    assert response.headers["X-Request-ID"] == "req-1"
+    admin = {"X-Admin-Token": "secret"}
+    spans = client.get("/api/admin/traces/req-1", headers=admin).json()["spans"]
+    by_id = {record["spanId"]: record for record in spans}
+    names = {record["name"] for record in spans}
+    assert {"http.request", "build_tree", "build_refer", "serialize.tree_to_dict", "serialize.dumps_json"} <= names
+
+    root = next(record for record in spans if record["parentId"] is None)
+    assert root["name"] == "http.request" and root["attrs"]["route"] == "/api/issues/{issue_name}/tree"
+    build = next(record for record in spans if record["name"] == "build_tree")
+    assert build["attrs"]["issue"] == issue_name and build["thread"].startswith("api-worker")
+    refer = next(record for record in spans if record["name"] == "build_refer")
+    while refer["parentId"] is not None:
+        refer = by_id[refer["parentId"]]
+    assert refer is root
+
+    # 不合法的请求 ID 被替换为生成的 ID
+    generated = client.get("/api/stats", headers={"X-Request-ID": "bad id\n"}).headers["X-Request-ID"]
+    assert generated != "bad id\n" and len(generated) == 16
+    listed = client.get("/api/admin/traces", headers=admin).json()
+    assert listed["enabled"] and listed["traces"][0]["traceId"] == generated
+    assert client.get("/api/admin/traces/unknown", headers=admin).status_code == 404
+
+
+def test_json_lines_export(tmp_path):
+    """同时写入 JSON Lines 文件，关闭追踪时写完剩余的区间"""
+    path = tmp_path / "trace.jsonl"
+    tracing.configure_tracing(buffer_size=10, file=str(path))
+    for i in range(3):
+        with tracing.span("step", index=i):
+            pass
+    tracing.disable_tracing()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [record["attrs"]["index"] for record in records] == [0, 1, 2]
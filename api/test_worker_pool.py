@@ -0,0 +1,89 @@
+"""
+线程池并发测试
+验证冷构建不会拖慢已缓存的请求，以及线程池满载时的拒绝和超时行为
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from api import main
+from api.worker_pool import WorkerPool, PoolSaturatedError
+
+
+def test_cold_build_does_not_delay_cached_requests(monkeypatch):
+    """一个很慢的冷构建进行中时，已缓存问题的请求仍然快速返回"""
+    tree_builder = main.knowledge_base.snapshot.tree_builder
+    cold_issue, warm_issue = main.knowledge_base.snapshot.data_loader.get_issue_names()[:2]
+    tree_builder.built_trees.pop(cold_issue, None)
+    tree_builder.build_complete_tree(warm_issue)
+
+    original_build = tree_builder.build_complete_tree
+
+    def slow_build(issue_name):
+        if issue_name == cold_issue:
+            time.sleep(1.0)
+        return original_build(issue_name)
+
+    monkeypatch.setattr(tree_builder, "build_complete_tree", slow_build)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            cold_task = asyncio.create_task(client.get(f"/api/issues/{cold_issue}/tree"))
+            await asyncio.sleep(0.05)
+
+            started = time.perf_counter()
+            warm_responses = await asyncio.gather(
+                *[client.get(f"/api/issues/{warm_issue}/tree") for _ in range(10)]
+            )
+            warm_elapsed = time.perf_counter() - started
+
+            cold_response = await cold_task
+        return cold_response, warm_responses, warm_elapsed
+
+    cold_response, warm_responses, warm_elapsed = asyncio.run(scenario())
+
+    assert cold_response.status_code == 200
+    assert all(r.status_code == 200 for r in warm_responses)
+    assert warm_elapsed < 0.5
+
+
+def test_pool_rejects_when_saturated():
+    """正在执行和排队的任务达到上限时立即拒绝"""
+    async def scenario():
+        pool = WorkerPool(max_workers=1, max_pending=0, timeout=5)
+        try:
+            busy = asyncio.create_task(pool.run(time.sleep, 0.2))
+            await asyncio.sleep(0.01)
+            with pytest.raises(PoolSaturatedError):
+                await pool.run(time.sleep, 0)
+            await busy
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_pool_timeout_keeps_task_accounted():
+    """超时后停止等待，但任务结束前仍然计入排队上限"""
+    async def scenario():
+        pool = WorkerPool(max_workers=1, max_pending=1, timeout=0.05)
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.run(time.sleep, 0.3)
+            assert pool.in_flight == 1
+            await asyncio.sleep(0.4)
+            assert pool.in_flight == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
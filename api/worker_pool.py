@@ -0,0 +1,80 @@
+"""
+CPU 密集任务线程池
+把树构建和序列化从事件循环中移出，限制并发数、排队长度和单个请求的等待时间
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class PoolSaturatedError(Exception):
+    """线程池已满（正在执行和排队的任务达到上限）"""
+
+
+class WorkerPool:
+    """有界线程池：超过排队上限时立即拒绝，超过超时时间时停止等待"""
+
+    def __init__(self, max_workers: int, max_pending: int, timeout: float):
+        """
+        Args:
+            max_workers: 工作线程数
+            max_pending: 所有线程都忙时允许排队的任务数
+            timeout: 单个任务的最长等待时间（秒）
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-worker")
+        self._lock = threading.Lock()
+        self._in_flight = 0  # 已提交但尚未结束的任务数（包括超时后仍在执行的任务）
+
+    @classmethod
+    def from_env(cls) -> 'WorkerPool':
+        """从环境变量读取配置"""
+        return cls(
+            max_workers=int(os.environ.get("API_WORKER_THREADS", min(8, (os.cpu_count() or 1) + 2))),
+            max_pending=int(os.environ.get("API_MAX_PENDING", 64)),
+            timeout=float(os.environ.get("API_REQUEST_TIMEOUT", 30))
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """已提交但尚未结束的任务数"""
+        return self._in_flight
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在线程池中执行函数并等待结果
+
+        Raises:
+            PoolSaturatedError: 排队任务已达上限
+            asyncio.TimeoutError: 等待超时（任务本身会在后台继续执行完）
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_pending:
+                raise PoolSaturatedError(f"服务繁忙，已有 {self._in_flight} 个任务在执行或排队")
+            self._in_flight += 1
+
+        # 保留调用方的上下文变量（请求 ID 等）
+        context = contextvars.copy_context()
+        try:
+            future = self._executor.submit(context.run, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._task_done(None)
+            raise
+        future.add_done_callback(self._task_done)
+
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def shutdown(self):
+        """关闭线程池（不等待正在执行的任务）"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _task_done(self, _future):
+        with self._lock:
+            self._in_flight -= 1
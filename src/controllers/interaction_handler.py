@@ -32,10 +32,7 @@ class InteractionHandler:
 
     def handle_return_to_checklist(self):
         """处理返回检查列表"""
-        self.state_manager.state.confirmed_item = None
-        current_node = self.state_manager.get_current_node()
-        if current_node:
-            current_node.confirmed = False
+        self.state_manager.return_to_checklist()
 
     def handle_reset(self):
         """处理重置会话状态"""
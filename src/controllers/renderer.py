@@ -7,6 +7,7 @@ import streamlit as st
 from urllib.parse import unquote
 
 from ..models.checklist import TreeChecklistItem
+from ..utils.tracing import traced
 from .style_manager import StyleManager
 
 
@@ -16,6 +17,7 @@ class Renderer:
     def __init__(self, style_manager: StyleManager):
         self.style_manager = style_manager
 
+    @traced("render.left_panel")
     def render_left_panel(self, data_loader, state_manager, current_issue_key: str):
         """渲染左侧面板（包含问题选择和导航路径）"""
         self.style_manager.apply_left_panel_styles()
@@ -23,13 +25,13 @@ class Renderer:
 
         # 问题选择区域
         st.markdown("### 📋 选择问题")
-        issue_names = data_loader.get_issue_names()
-        if issue_names:
+        catalog = data_loader.catalog
+        if catalog.names:
             current_issue = st.session_state.get(current_issue_key)
             selected_issue = st.selectbox(
                 "问题现象",
-                options=issue_names,
-                index=0 if not current_issue else issue_names.index(current_issue),
+                options=catalog.names,
+                index=catalog.positions.get(current_issue, 0),
                 key="left_panel_issue_selector",
                 help="选择要排查的问题"
             )
@@ -38,6 +40,7 @@ class Renderer:
         st.error("未找到任何问题数据")
         return None
 
+    @traced("render.navigation_path")
     def render_navigation_path(self, state_manager):
         """渲染当前排查路径"""
         st.markdown('<div class="navigation-section">', unsafe_allow_html=True)
@@ -78,6 +81,7 @@ class Renderer:
         st.markdown('</div></div>', unsafe_allow_html=True)
         return False
 
+    @traced("render.detail_panel")
     def render_detail_panel(self, state_manager):
         """渲染详情面板"""
         confirmed_item = state_manager.get_confirmed_item()
@@ -122,6 +126,7 @@ class Renderer:
         elif path_to_show and len(path_to_show) == 1:
             st.info(f"🔍 根因分析: {path_to_show[0]}")
 
+    @traced("render.checklist_panel")
     def render_checklist_panel(self, state_manager, on_confirm, on_exclude):
         """渲染检查清单面板"""
         st.markdown("### ✅ Checklist确认单")
@@ -160,6 +165,7 @@ class Renderer:
 
             self.style_manager.render_compact_separator(i, len(current_items))
 
+    @traced("render.confirmed_item_solution")
     def render_confirmed_item_solution(self, confirmed_item):
         """渲染已确认项目的解决方案"""
         st.markdown("### 🛠️ 解决方案")
@@ -222,6 +228,7 @@ class Renderer:
             script_name = script_url
         return unquote(script_name)
 
+    @traced("render.solution_panel")
     def render_solution_panel(self, state_manager):
         """渲染解决方案面板"""
         st.markdown("### 🛠️ 解决方案")
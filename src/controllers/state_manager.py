@@ -3,11 +3,14 @@
 管理排查过程中的状态变化和导航逻辑
 """
 
+import logging
 from typing import Optional, List, Tuple
 
 from ..models.checklist import AppState, TreeChecklistItem
 from ..utils.tree_builder import TreeBuilder
 
+logger = logging.getLogger(__name__)
+
 
 class StateManager:
     """应用状态管理器"""
@@ -38,13 +41,58 @@ class StateManager:
             self.state.current_checklist = None
             self.state.navigation_path = [issue_name]
             self.state.excluded_items.clear()
+            self.state.confirmed_items.clear()
             self._clear_navigating_state()
 
             return True
         except Exception as e:
-            print(f"设置当前问题失败: {e}")
+            logger.exception("设置当前问题失败: %s", e, extra={"issue": issue_name})
+            return False
+
+    def rebind(self, tree_builder: TreeBuilder) -> bool:
+        """
+        切换到新快照的树构建器（共享知识库重新加载后调用）
+
+        按问题名称和路径在新的问题树中恢复当前问题、导航位置和已确认的检查项；
+        导航位置在新树中不存在时回到根节点
+
+        Args:
+            tree_builder: 新快照的树构建器
+
+        Returns:
+            当前问题在新快照中是否仍然存在（不存在时重置状态）
+        """
+        self.tree_builder = tree_builder
+        issue_name = self.state.current_issue_name
+        if not issue_name:
+            return True
+
+        tree = tree_builder.build_complete_tree(issue_name)
+        issue = tree_builder.data_loader.get_issue_by_name(issue_name)
+        if not tree or not issue:
+            self.reset_state()
             return False
 
+        confirmed = self.state.confirmed_item
+        self.state.current_issue = issue
+        self.state.current_tree = tree
+
+        node = None
+        if len(self.state.navigation_path) > 1:
+            node = tree_builder.find_node_by_path(tree, self.state.navigation_path)
+            if node is None:
+                self.navigate_to_root()
+                return True
+        self.state.current_checklist = node
+
+        if confirmed is not None:
+            self.state.confirmed_item = tree_builder.find_node_by_path(tree, confirmed.original_path)
+        if self.state.solution_text is not None:
+            # 解决方案来自当前节点，使用新数据中的内容
+            self.state.solution_text = node.todo if node is not None else None
+        logger.debug("切换到新快照，当前路径: %s", self.state.navigation_path)
+        return True
+
     def navigate_to_child(self, child_item: TreeChecklistItem) -> Tuple[bool, Optional[str]]:
         """导航到子节点"""
         try:
@@ -66,7 +114,7 @@ class StateManager:
                 return True, child_item.todo
 
         except Exception as e:
-            print(f"导航到子节点失败: {e}")
+            logger.exception("导航到子节点失败: %s", e)
             return False, None
 
     def navigate_to_parent(self) -> bool:
@@ -85,12 +133,12 @@ class StateManager:
             if parent_item:
                 self.state.current_checklist = parent_item
                 self._clear_navigating_state()
-                print(f"导航到父节点，当前路径: {self.state.navigation_path}")
+                logger.debug("导航到父节点，当前路径: %s", self.state.navigation_path)
                 return True
 
             return False
         except Exception as e:
-            print(f"导航到父节点失败: {e}")
+            logger.exception("导航到父节点失败: %s", e)
             return False
 
     def navigate_to_path(self, path: List[str]) -> bool:
@@ -104,12 +152,12 @@ class StateManager:
                 self.state.navigation_path = path.copy()
                 self.state.current_checklist = target_node
                 self._clear_navigating_state()
-                print(f"导航到指定路径，新路径: {self.state.navigation_path}")
+                logger.debug("导航到指定路径，新路径: %s", self.state.navigation_path)
                 return True
 
             return False
         except Exception as e:
-            print(f"导航到指定路径失败: {e}")
+            logger.exception("导航到指定路径失败: %s", e)
             return False
 
     def navigate_to_root(self) -> bool:
@@ -120,32 +168,29 @@ class StateManager:
         self.state.current_checklist = None
         self.state.navigation_path = [self.state.current_issue_name] if self.state.current_issue_name else []
         self._clear_navigating_state()
-        print(f"导航到根节点")
+        logger.debug("导航到根节点")
         return True
 
     def exclude_item(self, item: TreeChecklistItem) -> bool:
-        """排除检查项"""
+        """排除检查项（只记录在本会话的状态中，不修改共享的问题树）"""
         try:
-            item_path = item.get_path_display()
-            if item_path not in self.state.excluded_items:
-                self.state.excluded_items.append(item_path)
-                item.excluded = True
+            self.state.excluded_items.add(item.get_node_id())
             return True
         except Exception as e:
-            print(f"排除项目失败: {e}")
+            logger.exception("排除项目失败: %s", e)
             return False
 
     def confirm_item(self, item: TreeChecklistItem) -> Tuple[bool, Optional[str]]:
-        """确认检查项"""
+        """确认检查项（只记录在本会话的状态中，不修改共享的问题树）"""
         try:
-            item.confirmed = True
+            self.state.confirmed_items.add(item.get_node_id())
             self.state.confirmed_item = item  # 记录已确认的项目
 
             # 更新导航路径，使其包含当前确认的项目
             if item.original_path:
                 # 使用项目的original_path更新导航路径
                 self.state.navigation_path = item.original_path.copy()
-                print(f"更新导航路径为: {self.state.navigation_path}")  # 调试信息
+                logger.debug("更新导航路径为: %s", self.state.navigation_path)
 
             # 如果是引用项目，导航到被引用项目的子项
             if item.is_refer:
@@ -165,7 +210,7 @@ class StateManager:
                     # 没有解决方案也没有子节点
                     return True, None
         except Exception as e:
-            print(f"确认项目失败: {e}")
+            logger.exception("确认项目失败: %s", e)
             return False, None
 
     def get_current_checklist_items(self) -> List[TreeChecklistItem]:
@@ -198,8 +243,18 @@ class StateManager:
 
     def is_item_excluded(self, item: TreeChecklistItem) -> bool:
         """检查项目是否已排除"""
-        item_path = item.get_path_display()
-        return item_path in self.state.excluded_items
+        return item.get_node_id() in self.state.excluded_items
+
+    def is_item_confirmed(self, item: TreeChecklistItem) -> bool:
+        """检查项目是否已确认"""
+        return item.get_node_id() in self.state.confirmed_items
+
+    def return_to_checklist(self):
+        """取消当前已确认的检查项，返回检查列表"""
+        self.state.confirmed_item = None
+        current_node = self.get_current_node()
+        if current_node:
+            self.state.confirmed_items.discard(current_node.get_node_id())
 
     def get_parent_path(self) -> Optional[List[str]]:
         """获取父级路径"""
@@ -4,11 +4,10 @@ Streamlit Web应用控制器
 """
 
 import streamlit as st
-from typing import Optional, Dict
 
 from ..models.checklist import TreeChecklistItem
 from ..utils.data_loader import DataLoader
-from ..utils.tree_builder import TreeBuilder
+from ..utils.knowledge_base import KnowledgeBase, KnowledgeSnapshot
 from ..controllers.state_manager import StateManager
 from ..controllers.style_manager import StyleManager
 from ..controllers.renderer import Renderer
@@ -16,39 +15,59 @@ from ..controllers.interaction_handler import InteractionHandler
 
 
 class WebController:
-    """Streamlit Web应用控制器（重构版）"""
+    """
+    Streamlit Web应用控制器（重构版）
 
-    def __init__(self):
-        self.data_loader = DataLoader()
-        self.tree_builder = TreeBuilder(self.data_loader)
-        self.state_manager = StateManager(self.tree_builder)
+    知识库（数据和树缓存）由进程内所有会话共享，每个会话只保存自己的排查状态（StateManager）
+    """
+
+    def __init__(self, knowledge_base: KnowledgeBase):
+        """
+        Args:
+            knowledge_base: 进程内共享的知识库（已加载）
+        """
+        self.knowledge_base = knowledge_base
+        self.snapshot: KnowledgeSnapshot = knowledge_base.snapshot
+        self.state_manager = StateManager(self.snapshot.tree_builder)
 
         # 创建辅助组件
         self.style_manager = StyleManager()
         self.renderer = Renderer(self.style_manager)
         self.interaction_handler = InteractionHandler(self.state_manager, self.renderer)
 
-        # 加载数据
-        self._load_data()
-
-    def _load_data(self) -> bool:
-        """加载初始数据"""
+        self._show_data_errors()
+
+    @property
+    def data_loader(self) -> DataLoader:
+        """当前快照的数据加载器"""
+        return self.snapshot.data_loader
+
+    def _show_data_errors(self):
+        """显示数据完整性错误"""
+        for error in self.data_loader.validate_data_integrity():
+            st.error(f"数据完整性错误: {error}")
+
+    def _sync_snapshot(self):
+        """共享知识库重新加载后，本会话在下一次交互时切换到新快照"""
+        snapshot = self.knowledge_base.snapshot
+        if snapshot is self.snapshot:
+            return
+        self.snapshot = snapshot
+        if not self.state_manager.rebind(snapshot.tree_builder):
+            st.session_state.pop('current_issue', None)
+            st.warning("当前问题在知识库更新后已不存在，请重新选择")
+
+    def _reload_knowledge_base(self):
+        """重新加载共享知识库（所有会话在下一次交互时切换到新版本）"""
         try:
-            self.data_loader.load_all_issues()
-
-            # 验证数据完整性
-            errors = self.data_loader.validate_data_integrity()
-            if errors:
-                for error in errors:
-                    st.error(f"数据完整性错误: {error}")
-
-            return True
+            snapshot = self.knowledge_base.request_reload().result()
+            st.success(f"知识库已更新到版本 {snapshot.version}")
         except Exception as e:
-            st.error(f"加载数据失败: {e}")
-            return False
+            st.error(f"重新加载失败，继续使用当前版本: {e}")
 
     def render_main_content(self):
         """渲染主内容区"""
+        self._sync_snapshot()
         summary = self.state_manager.get_state_summary()
 
         # 创建两栏布局：左侧导航 + 右侧内容区
@@ -102,6 +121,11 @@ class WebController:
             self.interaction_handler.handle_reset()
             st.rerun()
 
+        if st.button("🔄 重新加载知识库", key="reload_knowledge_base", use_container_width=True,
+                     help="重新读取 YAML 数据，所有用户同时切换到新版本"):
+            self._reload_knowledge_base()
+            self._sync_snapshot()
+
         # 处理问题选择
         if selected_issue and selected_issue != st.session_state.get('current_issue'):
             if self.interaction_handler.handle_issue_selection(selected_issue, 'current_issue'):
@@ -3,7 +3,8 @@ Streamlit主应用类
 运维知识库智能排查助手的主入口
 """
 
-import traceback
+import logging
+import os
 from pathlib import Path
 
 import streamlit as st
@@ -14,17 +15,39 @@ import sys
 sys.path.insert(0, str(project_root))
 
 from src.controllers.web_controller import WebController
+from src.utils.knowledge_base import KnowledgeBase
+from src.utils.logging_setup import setup_logging
+from src.utils.tracing import configure_tracing_from_env, span
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_resource(show_spinner="正在加载知识库...")
+def _shared_knowledge_base() -> KnowledgeBase:
+    """
+    进程内所有会话共享的知识库（只加载一次，数据和树缓存只保存一份）
+
+    快照不可变，重新加载时发布新快照，各会话在下一次交互时切换；
+    设置 KB_SYNC_FILE 时与其它进程（如 API 服务）通过版本标记文件同步重新加载
+    """
+    knowledge_base = KnowledgeBase(
+        data_dir=os.environ.get("KB_DATA_DIR") or "data",
+        sync_file=os.environ.get("KB_SYNC_FILE") or None
+    )
+    knowledge_base.load()
+    knowledge_base.start_sync()
+    return knowledge_base
 
 
 def _initialize_controller():
-    """初始化应用控制器"""
+    """初始化应用控制器（每个会话一个，只保存排查状态）"""
     if 'controller' not in st.session_state:
         try:
-            st.session_state.controller = WebController()
-            print("应用控制器初始化成功")
+            st.session_state.controller = WebController(_shared_knowledge_base())
+            logger.info("应用控制器初始化成功")
         except Exception as e:
             st.error(f"初始化失败: {e}")
-            print(f"初始化错误: {traceback.format_exc()}")
+            logger.exception("初始化错误: %s", e)
             st.stop()
 
 
@@ -45,6 +68,9 @@ def _render_footer():
 
 def main():
     """主函数"""
+    setup_logging()
+    configure_tracing_from_env()
+
     # 设置页面配置（必须是第一个Streamlit命令）
     st.set_page_config(
         page_title="运维知识库智能排查助手",
@@ -63,19 +89,21 @@ def main():
     """)
 
     try:
-        # 初始化控制器
-        _initialize_controller()
+        # 每次脚本运行（用户的一次点击）记录为一个追踪，包含数据加载、树构建和各面板的渲染
+        with span("streamlit.run"):
+            # 初始化控制器
+            _initialize_controller()
 
-        # 渲染主内容区
-        controller = st.session_state.controller
-        controller.render_main_content()
+            # 渲染主内容区
+            controller = st.session_state.controller
+            controller.render_main_content()
 
         # 页脚信息
         _render_footer()
 
     except Exception as e:
         st.error(f"应用运行错误: {e}")
-        print(f"运行错误: {traceback.format_exc()}")
+        logger.exception("运行错误: %s", e)
 
         # 提供重新加载选项
         if st.button("重新加载应用"):
@@ -5,7 +5,7 @@ Checklist数据模型
 """
 
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List, Optional, Set
 
 
 @dataclass
@@ -85,8 +85,6 @@ class TreeChecklistItem:
     gif_links: List[str] = field(default_factory=list)  # GIF演示图链接列表
     script_links: List[str] = field(default_factory=list)  # 脚本文件链接列表
     children: List['TreeChecklistItem'] = field(default_factory=list)  # 子项
-    excluded: bool = False  # 是否已排除
-    confirmed: bool = False  # 是否已确认
     is_refer: bool = False  # 是否为refer引用的项
     parent_ref: Optional[str] = None  # 父级引用来源
 
@@ -106,6 +104,10 @@ class TreeChecklistItem:
         """获取路径显示文本"""
         return " → ".join(self.original_path)
 
+    def get_node_id(self) -> str:
+        """获取节点唯一ID（使用路径连接）"""
+        return "_".join(self.original_path)
+
 
 @dataclass
 class AppState:
@@ -114,7 +116,8 @@ class AppState:
     current_issue_name: Optional[str] = None  # 选择的问题名称
     current_tree: Optional[TreeChecklistItem] = None  # 当前树形结构
     current_checklist: Optional[TreeChecklistItem] = None  # 当前检查项
-    excluded_items: List[str] = field(default_factory=list)  # 已排除项目路径
+    excluded_items: Set[str] = field(default_factory=set)  # 已排除检查项的节点ID
+    confirmed_items: Set[str] = field(default_factory=set)  # 已确认检查项的节点ID
     navigation_path: List[str] = field(default_factory=list)  # 当前导航路径
     solution_text: Optional[str] = None  # 当前显示的解决方案
     confirmed_item: Optional[TreeChecklistItem] = None  # 当前已确认的检查项
@@ -143,6 +146,7 @@ class AppState:
         self.current_tree = None
         self.current_checklist = None
         self.excluded_items.clear()
+        self.confirmed_items.clear()
         self.navigation_path.clear()
         self.solution_text = None
         self.confirmed_item = None
@@ -7,6 +7,12 @@ from .data_validator import DataValidator
 from .reference_checker import ReferenceChecker
 from .data_quality_reporter import DataQualityReporter
 from .tree_builder import TreeBuilder
+from .search_index import SearchIndex
+from .autocomplete import AutocompleteIndex
+from .knowledge_base import KnowledgeBase, KnowledgeSnapshot
+from .tree_index import TreeIndex
+from .issue_catalog import IssueCatalog, CatalogEntry
+from .session_store import SessionStore, TroubleshootingSession
 
 __all__ = [
     'DataLoader',
@@ -14,4 +20,13 @@ __all__ = [
     'ReferenceChecker',
     'DataQualityReporter',
     'TreeBuilder',
+    'SearchIndex',
+    'AutocompleteIndex',
+    'KnowledgeBase',
+    'KnowledgeSnapshot',
+    'TreeIndex',
+    'IssueCatalog',
+    'CatalogEntry',
+    'SessionStore',
+    'TroubleshootingSession',
 ]
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+问题名称自动补全
+基于前缀索引，支持中文标题、拼音全拼和拼音首字母（如 jqcp → 集群磁盘…）
+"""
+
+import bisect
+import heapq
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from ..models.checklist import Issue
+
+_SEPARATORS = re.compile(r"[\s\-_/·,，.。:：()（）\[\]【】]+")
+_CJK_CHAR = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+_NON_CJK_MARK = "\x00"
+_pinyin_module = None  # pypinyin 导入较慢（加载拼音词典），第一次用到时再导入
+
+
+def _lazy_pinyin():
+    """返回 pypinyin.lazy_pinyin，未安装 pypinyin 时返回 None（只支持原文前缀匹配）"""
+    global _pinyin_module
+    if _pinyin_module is None:
+        try:
+            import pypinyin
+            _pinyin_module = pypinyin
+        except ImportError:
+            _pinyin_module = False
+    return _pinyin_module.lazy_pinyin if _pinyin_module else None
+
+
+def normalize(text: str) -> str:
+    """统一小写并去除空白和常见分隔符"""
+    return _SEPARATORS.sub("", text.lower())
+
+
+def pinyin_keys(text: str) -> Tuple[str, ...]:
+    """
+    生成拼音全拼和首字母两种检索键
+
+    非中文片段原样保留（如 Es集群 → esjiqun / esjq）。
+
+    Args:
+        text: 标题文本
+
+    Returns:
+        (全拼, 首字母)，未安装 pypinyin 或不含中文时返回空元组
+    """
+    if not _CJK_CHAR.search(text):
+        return ()
+    lazy_pinyin = _lazy_pinyin()
+    if lazy_pinyin is None:
+        return ()
+
+    full = []
+    initials = []
+    # 非中文片段加上标记，与中文音节区分
+    for syllable in lazy_pinyin(text, errors=lambda chars: [_NON_CJK_MARK + chars]):
+        if syllable.startswith(_NON_CJK_MARK):
+            chunk = normalize(syllable[1:])
+            full.append(chunk)
+            initials.append(chunk)
+        elif syllable:
+            full.append(syllable)
+            initials.append(syllable[0])
+
+    return "".join(full), "".join(initials)
+
+
+@dataclass(frozen=True)
+class CompletionEntry:
+    """补全候选项"""
+    title: str  # 显示标题
+    issue: str  # 所属问题
+    path: Tuple[str, ...]  # 从问题到该节点的路径
+    priority: int  # 优先级
+    kind: str  # issue 或 node
+    display: bool  # 所属问题是否在问题列表中显示
+
+    def to_dict(self) -> Dict:
+        """转换为接口返回的字典"""
+        return {
+            "id": "_".join(self.path),
+            "title": self.title,
+            "issue": self.issue,
+            "path": list(self.path),
+            "priority": self.priority,
+            "kind": self.kind
+        }
+
+
+class AutocompleteIndex:
+    """前缀补全索引（构建后只读）"""
+
+    MAX_RESULTS = 50  # 单次查询最多返回数量
+    PRECOMPUTED_PREFIX_LEN = 3  # 短前缀预先计算结果，避免扫描大范围
+
+    def __init__(self, issues: Dict[str, Issue]):
+        # 候选项按排序规则排好序，编号越小排名越靠前
+        self.entries: List[CompletionEntry] = sorted(
+            self._collect_entries(issues),
+            key=lambda e: (not e.display, -e.priority, e.kind != "issue", len(e.title), e.title)
+        )
+
+        pairs = []
+        for entry_id, entry in enumerate(self.entries):
+            keys = {normalize(entry.title), *pinyin_keys(entry.title)}
+            pairs.extend((key, entry_id) for key in keys if key)
+        pairs.sort()
+
+        self._keys: List[str] = [key for key, _ in pairs]
+        self._key_entries: List[int] = [entry_id for _, entry_id in pairs]
+
+        prefix_entries: Dict[str, set] = {}
+        for key, entry_id in pairs:
+            for length in range(1, min(len(key), self.PRECOMPUTED_PREFIX_LEN) + 1):
+                prefix_entries.setdefault(key[:length], set()).add(entry_id)
+        # 按类型分别预先计算（None 表示不限类型），类型过滤不会因为前 MAX_RESULTS 个被另一类型占满而漏掉结果
+        self._top: Dict[Optional[str], Dict[str, Tuple[int, ...]]] = {None: {}, "issue": {}, "node": {}}
+        for prefix, ids in prefix_entries.items():
+            self._top[None][prefix] = tuple(heapq.nsmallest(self.MAX_RESULTS, ids))
+            for kind in ("issue", "node"):
+                kind_ids = [entry_id for entry_id in ids if self.entries[entry_id].kind == kind]
+                if kind_ids:
+                    self._top[kind][prefix] = tuple(heapq.nsmallest(self.MAX_RESULTS, kind_ids))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def complete(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[Dict]:
+        """
+        按前缀补全
+
+        Args:
+            query: 用户输入（中文、拼音全拼或首字母）
+            limit: 最多返回数量
+            kind: 只返回指定类型（issue 或 node），None 表示不限
+
+        Returns:
+            按优先级排序的候选项字典列表
+        """
+        prefix = normalize(query)
+        if not prefix or limit <= 0:
+            return []
+
+        if len(prefix) <= self.PRECOMPUTED_PREFIX_LEN:
+            candidates = self._top[kind or None].get(prefix, ())
+        else:
+            start = bisect.bisect_left(self._keys, prefix)
+            end = bisect.bisect_left(self._keys, prefix + "\uffff", start)
+            candidates = sorted(set(self._key_entries[start:end]))
+
+        results = []
+        for entry_id in candidates:
+            entry = self.entries[entry_id]
+            if kind and entry.kind != kind:
+                continue
+            results.append(entry.to_dict())
+            if len(results) >= min(limit, self.MAX_RESULTS):
+                break
+        return results
+
+    @staticmethod
+    def _collect_entries(issues: Dict[str, Issue]) -> List[CompletionEntry]:
+        """收集所有问题和检查项标题"""
+        entries = []
+        for issue in issues.values():
+            root_path = (issue.status,)
+            entries.append(CompletionEntry(
+                title=issue.status,
+                issue=issue.status,
+                path=root_path,
+                priority=issue.priority,
+                kind="issue",
+                display=issue.display
+            ))
+
+            stack = [(item, root_path) for item in issue.checklist]
+            while stack:
+                item, parent_path = stack.pop()
+                if item.refer:
+                    continue
+                path = parent_path + (item.status,)
+                entries.append(CompletionEntry(
+                    title=item.status,
+                    issue=issue.status,
+                    path=path,
+                    priority=item.priority,
+                    kind="node",
+                    display=issue.display
+                ))
+                if item.checklist:
+                    stack.extend((child, path) for child in item.checklist)
+
+        return entries
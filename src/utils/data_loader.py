@@ -3,57 +3,109 @@ YAML数据加载器
 负责加载和解析运维知识库的YAML文件
 """
 
+import logging
+import time
 import yaml
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from ..models.checklist import ChecklistItem, Issue
 from .data_validator import DataValidator
 from .reference_checker import ReferenceChecker
 from .data_quality_reporter import DataQualityReporter
+from .issue_catalog import IssueCatalog
+from .metrics import LOAD_PHASE_SECONDS
+from .tracing import span
+
+logger = logging.getLogger(__name__)
 
 
 class DataLoader:
     """YAML数据加载和解析器（简化版）"""
 
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", require_data_dir: bool = True):
+        """
+        Args:
+            data_dir: YAML 数据目录
+            require_data_dir: 数据目录不存在时是否报错（从编译好的快照文件恢复时不需要数据目录）
+        """
         self.data_dir = Path(data_dir)
         self.issues: Dict[str, Issue] = {}
+        self.issues_by_file: Dict[str, Issue] = {}  # yml文件名（不含扩展名）-> 问题（每次加载后重新构建）
         self.issue_list: List[str] = []
         self.loaded_files: set = set()  # 记录成功加载的文件
         self.all_yml_files: set = set()  # 记录所有yml文件
         self.file_issues: Dict[str, List[str]] = {}  # 记录每个文件的问题
+        self.phase_timings: Dict[str, float] = {}  # 最近一次加载各阶段耗时（秒）
+        self.catalog = IssueCatalog.build({})  # 问题目录（每次加载后重新构建）
+        self.invalid_refs: Dict[str, List[Dict]] = {}  # 无效的 refer 引用（not_exist / not_loaded）
+        self.orphan_issues: List[str] = []  # 未被引用且不显示的问题
 
         # 确保数据目录存在
-        if not self.data_dir.exists():
+        if require_data_dir and not self.data_dir.exists():
             raise FileNotFoundError(f"数据目录不存在: {self.data_dir}")
 
     def load_all_issues(self) -> Dict[str, Issue]:
         """加载所有yml文件中的问题数据"""
+        with span("load_all_issues", data_dir=str(self.data_dir)) as load_span:
+            self._load_all_issues()
+            load_span.set(issues=len(self.issues), files=len(self.all_yml_files))
+        return self.issues
+
+    def _load_all_issues(self):
+        """加载所有问题（在 load_all_issues 的追踪区间内执行）"""
         self._clear_internal_state()
+        started = time.perf_counter()
 
         # 获取所有yml文件
         yml_files = list(self.data_dir.rglob("*.yml")) + list(self.data_dir.rglob("*.yaml"))
 
         if not yml_files:
-            print(f"警告: 在 {self.data_dir} 目录下未找到任何yml文件")
+            logger.warning("数据目录下未找到任何yml文件", extra={"data_dir": str(self.data_dir)})
 
         self.all_yml_files = set(yml_files)
 
         # 检查文件完整性并加载数据
-        self._check_all_files_integrity(yml_files)
-        self._load_yml_files(yml_files)
-        self._print_quality_report()
-
-        return self.issues
+        with self._timed_phase("integrity_check"):
+            self._check_all_files_integrity(yml_files)
+        with self._timed_phase("parse"):
+            self._load_yml_files(yml_files)
+        self.index_file_names()
+        self._report_quality()
+        with self._timed_phase("catalog"):
+            self.catalog = IssueCatalog.build(self.issues)
+
+        logger.info("共加载 %s 个问题", len(self.issues), extra={
+            "issues": len(self.issues),
+            "files": len(self.all_yml_files),
+            "failed_files": len(self.all_yml_files - self.loaded_files),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+        })
+
+    @contextmanager
+    def _timed_phase(self, phase: str):
+        """记录加载阶段耗时"""
+        started = time.perf_counter()
+        try:
+            with span(f"load.{phase}"):
+                yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.phase_timings[phase] = elapsed
+            LOAD_PHASE_SECONDS.observe(elapsed, phase)
 
     def _clear_internal_state(self):
         """清空内部状态"""
         self.issues.clear()
+        self.issues_by_file = {}
         self.issue_list.clear()
         self.loaded_files.clear()
         self.all_yml_files.clear()
         self.file_issues.clear()
+        self.phase_timings.clear()
+        self.invalid_refs = {}
+        self.orphan_issues = []
 
     def _load_yml_files(self, yml_files: List[Path]):
         """加载所有yml文件"""
@@ -64,21 +116,28 @@ class DataLoader:
                     self.issues[issue.status] = issue
                     self.issue_list.append(issue.status)
                     self.loaded_files.add(yml_file)
-                    print(f"成功加载: {yml_file.relative_to(self.data_dir)}")
+                    logger.debug("成功加载", extra={"file": str(yml_file.relative_to(self.data_dir)), "issue": issue.status})
             except Exception as e:
-                print(f"解析文件 {yml_file.relative_to(self.data_dir)} 失败: {e}")
-
-        print(f"共加载 {len(self.issues)} 个问题")
+                logger.error("解析文件失败: %s", e, extra={"file": str(yml_file.relative_to(self.data_dir))})
 
     def get_issue_by_name(self, name: str) -> Optional[Issue]:
         """根据名称获取问题"""
         return self.issues.get(name)
 
+    def get_issue_by_file_name(self, file_name: str) -> Optional[Issue]:
+        """根据yml文件名（不含扩展名）获取问题"""
+        return self.issues_by_file.get(file_name)
+
+    def index_file_names(self):
+        """按yml文件名建立问题索引（加载或从快照文件恢复 issues 后调用）"""
+        issues_by_file: Dict[str, Issue] = {}
+        for issue in self.issues.values():
+            issues_by_file.setdefault(issue.file_name, issue)
+        self.issues_by_file = issues_by_file
+
     def get_issue_names(self) -> List[str]:
         """获取所有问题名称列表（仅返回display=True的问题，按优先级降序排列）"""
-        visible_issues = [issue for issue in self.issues.values() if issue.display]
-        sorted_issues = sorted(visible_issues, key=lambda x: x.priority, reverse=True)
-        return [issue.status for issue in sorted_issues]
+        return list(self.catalog.names)
 
     def get_all_issues(self) -> Dict[str, Issue]:
         """获取所有问题"""
@@ -90,13 +149,44 @@ class DataLoader:
             self.load_all_issues()
             return True
         except Exception as e:
-            print(f"重新加载数据失败: {e}")
+            logger.exception("重新加载数据失败: %s", e)
             return False
 
+    def get_problems(self) -> Tuple[List[str], List[str]]:
+        """
+        汇总最近一次加载发现的数据问题
+
+        Returns:
+            (错误, 警告)：解析失败的文件和无效的 refer 引用为错误，信息不完整的文件和孤立问题为警告
+        """
+        errors = [
+            f"解析失败: {path.relative_to(self.data_dir)}"
+            for path in sorted(self.all_yml_files - self.loaded_files)
+        ]
+        errors.extend(
+            f"问题 '{ref['source']}' 引用了 '{ref['target']}'，但文件不存在"
+            for ref in self.invalid_refs.get('not_exist', [])
+        )
+        errors.extend(
+            f"问题 '{ref['source']}' 引用了 '{ref['target']}'，文件 {ref['file_path']} 未成功加载: {ref['reason']}"
+            for ref in self.invalid_refs.get('not_loaded', [])
+        )
+
+        warnings = [
+            f"信息不完整: {file_path}: {issue}"
+            for file_path, issues in sorted(self.file_issues.items()) for issue in issues
+        ]
+        warnings.extend(f"孤立问题: {name}" for name in self.orphan_issues)
+        return errors, warnings
+
     def validate_data_integrity(self) -> List[str]:
         """验证数据完整性（委托给 DataValidator）"""
         return DataValidator.validate_issues(self.issues)
 
+    def count_all_checklist_items(self) -> int:
+        """统计所有问题中的检查项总数（包括嵌套子项）"""
+        return self.catalog.total_checklist_items
+
     def get_statistics(self) -> Dict[str, int]:
         """获取数据统计信息"""
         total_checklists = sum(len(issue.checklist) for issue in self.issues.values())
@@ -113,11 +203,11 @@ class DataLoader:
                 data = yaml.safe_load(f)
 
             if not data:
-                print(f"文件 {file_path} 为空")
+                logger.warning("文件为空", extra={"file": str(file_path)})
                 return None
 
             if 'status' not in data:
-                print(f"文件 {file_path} 缺少必需的status字段")
+                logger.warning("文件缺少必需的status字段", extra={"file": str(file_path)})
                 return None
 
             # 解析checklist项目
@@ -141,16 +231,16 @@ class DataLoader:
             return issue
 
         except yaml.YAMLError as e:
-            print(f"YAML解析错误 {file_path}: {e}")
+            logger.error("YAML解析错误: %s", e, extra={"file": str(file_path)})
         except Exception as e:
-            print(f"解析文件 {file_path} 时发生未知错误: {e}")
+            logger.exception("解析文件时发生未知错误: %s", e, extra={"file": str(file_path)})
 
         return None
 
     def _parse_checklist_item(self, item_data: dict, source_file: str) -> Optional[ChecklistItem]:
         """解析checklist项目"""
         if not isinstance(item_data, dict):
-            print(f"checklist项目格式错误: {item_data}")
+            logger.warning("checklist项目格式错误: %r", item_data, extra={"file": source_file})
             return None
 
         # 处理refer类型
@@ -166,7 +256,7 @@ class DataLoader:
 
         # 检查必需字段
         if 'status' not in item_data:
-            print(f"checklist项目缺少status字段: {item_data}")
+            logger.warning("checklist项目缺少status字段: %r", item_data, extra={"file": source_file})
             return None
 
         # 处理普通checklist项
@@ -204,11 +294,15 @@ class DataLoader:
         orphan_issues = checker.find_orphan_issues()
         return invalid_refs, orphan_issues
 
-    def _print_quality_report(self):
-        """打印数据质量检查报告（委托给 DataQualityReporter）"""
-        invalid_refs, orphan_issues = self._check_references()
-        DataQualityReporter.print_report(
-            self.file_issues,
-            invalid_refs,
-            orphan_issues
-        )
+    def _report_quality(self):
+        """检查引用并输出数据质量报告（委托给 DataQualityReporter）"""
+        with self._timed_phase("reference_check"):
+            invalid_refs, orphan_issues = self._check_references()
+        self.invalid_refs = invalid_refs
+        self.orphan_issues = orphan_issues
+        with self._timed_phase("quality_report"):
+            DataQualityReporter.log_report(
+                self.file_issues,
+                invalid_refs,
+                orphan_issues
+            )
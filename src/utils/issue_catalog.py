@@ -0,0 +1,148 @@
+"""
+问题目录
+每次加载时构建一次的只读目录：按优先级排序的可见问题、每个问题的检查项数量
+（包括展开 refer 引用后的数量），以及 API 预先序列化好的问题摘要响应
+"""
+
+import dataclasses
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+from ..models.checklist import ChecklistItem, Issue
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    """目录中的一个问题"""
+    issue: Issue
+    checklist_count: int  # 检查项数量（包括嵌套子项，不展开引用）
+    expanded_count: int  # 展开 refer 引用后问题树中的节点数（不含根节点）
+
+    @property
+    def name(self) -> str:
+        return self.issue.status
+
+
+@dataclass(frozen=True)
+class IssueCatalog:
+    """问题目录（构建后不再修改）"""
+    entries: Mapping[str, CatalogEntry]  # 所有问题，按问题名称索引
+    visible: Tuple[CatalogEntry, ...]  # display=True 的问题，按优先级降序
+    names: Tuple[str, ...]  # visible 中的问题名称
+    positions: Mapping[str, int] = field(repr=False)  # 问题名称在 names 中的位置
+    summary_body: Optional[bytes] = field(default=None, repr=False)  # 预先序列化的问题摘要响应
+
+    @classmethod
+    def build(cls, issues: Dict[str, Issue]) -> 'IssueCatalog':
+        """根据已加载的问题构建目录"""
+        expanded_counts: Dict[str, int] = {}
+        entries = {
+            name: CatalogEntry(
+                issue=issue,
+                checklist_count=count_checklist_items(issue.checklist),
+                expanded_count=_expanded_count(name, issues, expanded_counts, set())
+            )
+            for name, issue in issues.items()
+        }
+
+        # sorted 是稳定排序，同优先级的问题保持加载顺序
+        visible = tuple(sorted(
+            (entry for entry in entries.values() if entry.issue.display),
+            key=lambda entry: entry.issue.priority,
+            reverse=True
+        ))
+        names = tuple(entry.name for entry in visible)
+
+        return cls(
+            entries=MappingProxyType(entries),
+            visible=visible,
+            names=names,
+            positions=MappingProxyType({name: i for i, name in enumerate(names)})
+        )
+
+    def __reduce__(self):
+        # MappingProxyType 不能直接序列化，保存为普通字典（用于编译后的快照文件）
+        return _restore_catalog, (dict(self.entries), self.visible, self.names, dict(self.positions), self.summary_body)
+
+    def with_summary_body(self, summary_body: bytes) -> 'IssueCatalog':
+        """返回附带问题摘要响应的新目录"""
+        return dataclasses.replace(self, summary_body=summary_body)
+
+    @property
+    def total_checklist_items(self) -> int:
+        """所有问题中的检查项总数（包括嵌套子项）"""
+        return sum(entry.checklist_count for entry in self.entries.values())
+
+
+def _restore_catalog(entries, visible, names, positions, summary_body) -> IssueCatalog:
+    """从序列化数据恢复问题目录"""
+    return IssueCatalog(
+        entries=MappingProxyType(entries),
+        visible=visible,
+        names=names,
+        positions=MappingProxyType(positions),
+        summary_body=summary_body
+    )
+
+
+def count_checklist_items(items: Optional[List[ChecklistItem]]) -> int:
+    """统计检查项数量（包括嵌套子项，不展开引用）"""
+    count = 0
+    stack = list(items or [])
+    while stack:
+        item = stack.pop()
+        count += 1
+        if item.checklist:
+            stack.extend(item.checklist)
+    return count
+
+
+def _expanded_count(name: str, issues: Dict[str, Issue], memo: Dict[str, int], building: Set[str]) -> int:
+    """
+    展开引用后问题树中的节点数（与 TreeBuilder 的构建规则一致）
+
+    引用节点本身计 1，再加上被引用问题展开后的节点数；引用不存在或形成循环时
+    TreeBuilder 会跳过该节点，这里同样不计数
+    """
+    return _count_expanded(name, issues, memo, building)[0]
+
+
+def _count_expanded(name: str, issues: Dict[str, Issue], memo: Dict[str, int],
+                    building: Set[str]) -> Tuple[int, bool]:
+    """
+    Returns:
+        (节点数, 结果是否与当前构建路径有关)。因循环跳过了路径上的问题时，
+        同一个问题作为根或从其它路径到达时节点数不同，这样的结果不写入 memo
+    """
+    if name in memo:
+        return memo[name], False
+
+    building.add(name)
+    depends_on_path = False
+
+    def count_items(items: Optional[List[ChecklistItem]]) -> int:
+        nonlocal depends_on_path
+        count = 0
+        for item in items or []:
+            if item.refer:
+                if item.refer not in issues:
+                    continue
+                if item.refer in building:
+                    depends_on_path = True
+                    continue
+                refer_count, refer_depends = _count_expanded(item.refer, issues, memo, building)
+                depends_on_path = depends_on_path or refer_depends
+                count += 1 + refer_count
+            else:
+                count += 1 + count_items(item.checklist)
+        return count
+
+    try:
+        result = count_items(issues[name].checklist)
+    finally:
+        building.discard(name)
+
+    if not depends_on_path:
+        memo[name] = result
+    return result, depends_on_path
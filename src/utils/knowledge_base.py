@@ -0,0 +1,380 @@
+"""
+知识库快照管理
+每次加载都构建一份完整的新快照，完成后通过一次引用替换发布，
+读请求始终看到完整一致的知识库
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .data_loader import DataLoader
+from .tree_builder import TreeBuilder
+from .search_index import SearchIndex
+from .autocomplete import AutocompleteIndex
+from .issue_catalog import IssueCatalog
+from .metrics import REGISTRY, LOAD_PHASE_SECONDS
+from .snapshot_file import read_snapshot_file, write_snapshot_file
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+RELOADS = REGISTRY.counter("kb_reloads_total", "知识库重新加载次数", ("result",))
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    """一次加载得到的知识库快照（发布后不再修改）"""
+    version: str  # 内容版本号（所有问题内容的摘要）
+    loaded_at: float  # 加载完成时间戳
+    data_loader: DataLoader  # 已加载完成的数据加载器
+    tree_builder: TreeBuilder  # 该快照专属的树构建器（含树缓存）
+    search_index: SearchIndex  # 全文检索索引
+    autocomplete_index: AutocompleteIndex  # 标题补全索引
+    stats: Dict  # 数据统计信息
+    fingerprints: Dict[str, str] = field(default_factory=dict)  # 每个问题的内容摘要
+    changed_issues: Tuple[str, ...] = ()  # 与上一个快照相比发生变化的问题
+    previous_version: Optional[str] = None  # 上一个快照的版本（首次加载时为 None）
+    node_count: int = 0  # 所有问题中的检查项总数（包括嵌套子项）
+    catalog: Optional[IssueCatalog] = None  # 问题目录（可见问题列表、数量统计和预先序列化的摘要）
+
+
+def _fingerprint(issue) -> str:
+    """计算单个问题的内容摘要"""
+    return hashlib.sha1(repr(issue).encode("utf-8")).hexdigest()
+
+
+class KnowledgeBase:
+    """知识库快照持有者：负责首次加载、后台重新加载和原子发布"""
+
+    def __init__(self, data_dir: str = "data", sync_file: Optional[str] = None, prewarm: bool = False,
+                 summary_renderer: Optional[Callable[[IssueCatalog], bytes]] = None,
+                 snapshot_file: Optional[str] = None):
+        """
+        Args:
+            data_dir: YAML 数据目录
+            sync_file: 多个独立进程之间共享的版本标记文件，任一进程重新加载后写入新版本，
+                       其它进程发现版本变化后各自重新加载（各进程分别解析数据，不共享内存；
+                       gunicorn 部署时改由主进程重新加载，见 api/gunicorn_conf.py）
+            prewarm: 发布快照前预先构建所有问题树（多进程部署时在主进程中预热，fork 后共享）
+            summary_renderer: 生成问题摘要响应体的函数，每次加载时执行一次，结果保存在问题目录中
+            snapshot_file: 编译好的快照文件（只读模式：从该文件加载，不读取 data_dir 中的 YAML，
+                           重新加载时重新读取该文件）
+        """
+        self.data_dir = data_dir
+        self.snapshot_file = snapshot_file
+        self.sync_file = sync_file
+        self.prewarm = prewarm
+        self.summary_renderer = summary_renderer
+        self._snapshot: Optional[KnowledgeSnapshot] = None
+        self._lock = threading.Lock()
+        self._running = False  # 后台重新加载线程是否在运行
+        self._next_future: Optional[Future] = None  # 等待中的重新加载请求（合并后共享）
+        self._last_reload: Optional[Dict] = None
+        self._last_seen_marker: Optional[str] = None  # 最近一次读到的版本标记
+        self._sync_thread: Optional[threading.Thread] = None
+        self._listeners: List[Callable[[KnowledgeSnapshot], None]] = []
+
+    @property
+    def snapshot(self) -> KnowledgeSnapshot:
+        """当前发布的快照（每个请求应只读取一次并在整个请求中使用）"""
+        if self._snapshot is None:
+            raise RuntimeError("知识库尚未加载")
+        return self._snapshot
+
+    @property
+    def is_loaded(self) -> bool:
+        """是否已发布快照"""
+        return self._snapshot is not None
+
+    def load(self) -> KnowledgeSnapshot:
+        """同步加载并发布快照（用于启动时的首次加载）"""
+        snapshot = self._build_snapshot(self._snapshot)
+        self._publish(snapshot)
+        return snapshot
+
+    def add_listener(self, callback: Callable[[KnowledgeSnapshot], None]):
+        """
+        注册快照发布回调
+
+        每次发布新快照后在发布它的线程中调用（可能是后台重新加载线程），
+        回调应尽快返回，需要在事件循环中处理的工作应自行切换线程
+        """
+        self._listeners.append(callback)
+
+    def start_sync(self, interval: float = 1.0):
+        """
+        启动版本标记文件轮询线程（每个工作进程 fork 之后各自启动）
+
+        Args:
+            interval: 轮询间隔（秒）
+        """
+        if not self.sync_file or (self._sync_thread and self._sync_thread.is_alive()):
+            return
+
+        self._sync_thread = threading.Thread(
+            target=self._sync_loop, args=(interval,), name="kb-sync", daemon=True
+        )
+        self._sync_thread.start()
+
+    def request_reload(self) -> Future:
+        """
+        请求后台重新加载
+
+        重新加载进行中时到达的请求会合并为下一次重新加载，共享同一个 Future，
+        保证进行中途修改的文件也能被加载到。
+
+        Returns:
+            完成时结果为新快照的 Future（失败时为异常）
+        """
+        with self._lock:
+            if self._next_future is None:
+                self._next_future = Future()
+            future = self._next_future
+            if not self._running:
+                self._running = True
+                threading.Thread(target=self._reload_loop, name="kb-reload", daemon=True).start()
+        return future
+
+    def get_reload_status(self) -> Dict:
+        """获取重新加载状态"""
+        with self._lock:
+            return {
+                "in_progress": self._running,
+                "pending": self._next_future is not None,
+                "version": self._snapshot.version if self._snapshot else None,
+                "last_reload": dict(self._last_reload) if self._last_reload else None
+            }
+
+    def _reload_loop(self):
+        """后台线程：依次处理合并后的重新加载请求"""
+        while True:
+            with self._lock:
+                future = self._next_future
+                if future is None:
+                    self._running = False
+                    return
+                self._next_future = None
+
+            started_at = time.time()
+            try:
+                snapshot = self._build_snapshot(self._snapshot)
+            except Exception as e:
+                logger.exception("重新加载数据失败: %s", e)
+                self._record_reload(started_at, success=False, error=str(e))
+                future.set_exception(e)
+                continue
+
+            self._publish(snapshot)
+            self._record_reload(started_at, success=True, snapshot=snapshot)
+            logger.info("知识库已重新加载", extra={
+                "version": snapshot.version,
+                "previous_version": snapshot.previous_version,
+                "changed_issues": len(snapshot.changed_issues),
+                "duration_ms": round((time.time() - started_at) * 1000, 2)
+            })
+            future.set_result(snapshot)
+
+    def _publish(self, snapshot: KnowledgeSnapshot):
+        """发布快照并通知监听者"""
+        # 原子发布：读请求要么看到旧快照，要么看到完整的新快照
+        self._snapshot = snapshot
+        self._publish_marker(snapshot.version)
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.exception("快照发布回调执行失败: %s", e, extra={"version": snapshot.version})
+
+    def _sync_loop(self, interval: float):
+        """轮询版本标记文件，其它进程发布了新版本时在本进程内重新加载"""
+        while True:
+            time.sleep(interval)
+            marker = self._read_marker()
+            # 只对新出现的标记做出反应，避免标记与本进程版本不一致时反复重新加载
+            if not marker or marker == self._last_seen_marker:
+                continue
+            self._last_seen_marker = marker
+            if self._snapshot is None or marker != self._snapshot.version:
+                self.request_reload()
+
+    def _read_marker(self) -> Optional[str]:
+        """读取版本标记文件"""
+        try:
+            with open(self.sync_file, "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _publish_marker(self, version: str):
+        """写入版本标记文件（先写临时文件再重命名，保证其它进程读到完整内容）"""
+        if not self.sync_file or self._read_marker() == version:
+            return
+
+        self._last_seen_marker = version
+        tmp_path = f"{self.sync_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(version)
+            os.replace(tmp_path, self.sync_file)
+        except OSError as e:
+            logger.error("写入知识库版本标记失败: %s", e, extra={"version": version, "sync_file": self.sync_file})
+
+    def _record_reload(self, started_at: float, success: bool,
+                       snapshot: Optional[KnowledgeSnapshot] = None, error: Optional[str] = None):
+        """记录最近一次重新加载的结果"""
+        finished_at = time.time()
+        RELOADS.inc("success" if success else "failure")
+        with self._lock:
+            self._last_reload = {
+                "started_at": started_at,
+                "finished_at": finished_at,
+                "duration_ms": round((finished_at - started_at) * 1000, 2),
+                "success": success,
+                "error": error,
+                "version": snapshot.version if snapshot else None,
+                "changed_issues": list(snapshot.changed_issues) if snapshot else []
+            }
+
+    def _build_snapshot(self, previous: Optional[KnowledgeSnapshot]) -> KnowledgeSnapshot:
+        """构建一份完整的新快照（不修改已发布的快照）"""
+        with span("kb.build_snapshot", snapshot_file=self.snapshot_file) as build_span:
+            snapshot = self._assemble_snapshot(previous)
+            build_span.set(version=snapshot.version, changed_issues=len(snapshot.changed_issues))
+        return snapshot
+
+    def _assemble_snapshot(self, previous: Optional[KnowledgeSnapshot]) -> KnowledgeSnapshot:
+        """构建快照（在 _build_snapshot 的追踪区间内执行）"""
+        if self.snapshot_file:
+            return self._read_snapshot_file(previous)
+
+        data_loader = DataLoader(data_dir=self.data_dir)
+        data_loader.load_all_issues()
+        issues = data_loader.issues
+        if self.summary_renderer:
+            # 快照发布前数据加载器只被当前线程使用，可以直接替换目录
+            data_loader.catalog = data_loader.catalog.with_summary_body(self.summary_renderer(data_loader.catalog))
+
+        fingerprints = {name: _fingerprint(issue) for name, issue in issues.items()}
+        version = hashlib.sha1(
+            "".join(f"{name}:{digest};" for name, digest in sorted(fingerprints.items())).encode("utf-8")
+        ).hexdigest()[:12]
+
+        changed = _changed_issues(previous, fingerprints)
+        with span("kb.search_index", changed=len(changed)):
+            if previous:
+                # 只重新索引有变化的问题，未变化的部分与旧索引共享
+                search_index = previous.search_index.derive(issues, changed)
+            else:
+                search_index = SearchIndex()
+                search_index.update(issues)
+
+        return KnowledgeSnapshot(
+            version=version,
+            loaded_at=time.time(),
+            data_loader=data_loader,
+            tree_builder=self._new_tree_builder(data_loader),
+            search_index=search_index,
+            autocomplete_index=AutocompleteIndex(issues),
+            stats=data_loader.get_statistics(),
+            fingerprints=fingerprints,
+            changed_issues=tuple(changed),
+            previous_version=previous.version if previous else None,
+            node_count=data_loader.count_all_checklist_items(),
+            catalog=data_loader.catalog
+        )
+
+    def _read_snapshot_file(self, previous: Optional[KnowledgeSnapshot]) -> KnowledgeSnapshot:
+        """从编译好的快照文件构建快照（不解析 YAML，问题目录和检索索引直接使用文件中的结果）"""
+        started = time.perf_counter()
+        header, payload = read_snapshot_file(self.snapshot_file)
+
+        data_loader = DataLoader(data_dir=self.data_dir, require_data_dir=False)
+        data_loader.issues = payload["issues"]
+        data_loader.index_file_names()
+        data_loader.issue_list = payload["issue_list"]
+        data_loader.file_issues = payload["file_issues"]
+        data_loader.invalid_refs = payload["invalid_refs"]
+        data_loader.orphan_issues = payload["orphan_issues"]
+        data_loader.catalog = payload["catalog"]
+        if self.summary_renderer and data_loader.catalog.summary_body is None:
+            data_loader.catalog = data_loader.catalog.with_summary_body(self.summary_renderer(data_loader.catalog))
+        elapsed = time.perf_counter() - started
+        data_loader.phase_timings["snapshot_file"] = elapsed
+        LOAD_PHASE_SECONDS.observe(elapsed, "snapshot_file")
+
+        fingerprints = payload["fingerprints"]
+        return KnowledgeSnapshot(
+            version=header["version"],
+            loaded_at=time.time(),
+            data_loader=data_loader,
+            tree_builder=self._new_tree_builder(data_loader),
+            search_index=payload["search_index"],
+            autocomplete_index=payload["autocomplete_index"],
+            stats=payload["stats"],
+            fingerprints=fingerprints,
+            changed_issues=tuple(_changed_issues(previous, fingerprints)),
+            previous_version=previous.version if previous else None,
+            node_count=payload["node_count"],
+            catalog=data_loader.catalog
+        )
+
+    def _new_tree_builder(self, data_loader: DataLoader) -> TreeBuilder:
+        """创建快照的树构建器（需要时预先构建所有问题树）"""
+        tree_builder = TreeBuilder(data_loader)
+        if self.prewarm:
+            for name in data_loader.issues:
+                tree_builder.build_complete_tree(name)
+        return tree_builder
+
+
+def _changed_issues(previous: Optional[KnowledgeSnapshot], fingerprints: Dict[str, str]) -> List[str]:
+    """与上一个快照相比新增、删除或内容发生变化的问题（首次加载时为所有问题）"""
+    if not previous:
+        return sorted(fingerprints)
+    old = previous.fingerprints
+    return sorted(
+        {name for name in fingerprints if old.get(name) != fingerprints[name]}
+        | {name for name in old if name not in fingerprints}
+    )
+
+
+def write_snapshot(snapshot: KnowledgeSnapshot, path: str) -> Dict:
+    """
+    把快照写入编译后的快照文件（供 KnowledgeBase(snapshot_file=...) 只读加载）
+
+    Args:
+        snapshot: 从 YAML 加载的快照
+        path: 输出文件路径
+
+    Returns:
+        快照文件头部
+    """
+    data_loader = snapshot.data_loader
+    errors, warnings = data_loader.get_problems()
+    payload = {
+        "issues": data_loader.issues,
+        "issue_list": data_loader.issue_list,
+        "file_issues": data_loader.file_issues,
+        "invalid_refs": data_loader.invalid_refs,
+        "orphan_issues": data_loader.orphan_issues,
+        "catalog": snapshot.catalog,
+        "fingerprints": snapshot.fingerprints,
+        "stats": snapshot.stats,
+        "node_count": snapshot.node_count,
+        "search_index": snapshot.search_index,
+        "autocomplete_index": snapshot.autocomplete_index
+    }
+    header = {
+        "version": snapshot.version,
+        "issueCount": len(data_loader.issues),
+        "nodeCount": snapshot.node_count,
+        "errors": errors,
+        "warnings": warnings
+    }
+    return write_snapshot_file(path, header, payload)
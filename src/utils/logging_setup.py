@@ -0,0 +1,162 @@
+"""
+日志配置
+统一的分级日志：各模块使用 logging.getLogger(__name__)，结构化字段通过 extra 传入（如 file、issue、duration_ms）
+
+setup_logging() 在根日志器上安装队列处理器：记录只放入有界内存队列，由后台线程格式化并写到 stderr，
+调用方（请求线程、加载线程）不等待 I/O；队列已满时丢弃记录并计数，不阻塞调用方。
+
+环境变量:
+    LOG_LEVEL: 日志级别（默认 INFO；DEBUG 时输出逐文件加载、导航点击等明细）
+    LOG_FORMAT: text（默认，便于阅读）或 json（每条记录一行 JSON，便于日志系统采集）
+"""
+
+import atexit
+import io
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from typing import Dict, Optional, TextIO
+
+QUEUE_SIZE = 10000
+
+# LogRecord 自带的属性，其余属性都是通过 extra 传入的结构化字段
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_lock = threading.Lock()
+_handler: Optional["_NonBlockingQueueHandler"] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_fork_hook_registered = False
+
+
+def log_fields(record: logging.LogRecord) -> Dict:
+    """日志记录中通过 extra 传入的结构化字段"""
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED_ATTRS and not key.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出一行 JSON（时间、级别、日志器、消息和结构化字段）"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(log_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """文本格式：时间 级别 日志器: 消息 key=value ..."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = log_fields(record)
+        if fields:
+            text += " " + " ".join(
+                f"{key}={value if isinstance(value, (str, int, float)) else json.dumps(value, ensure_ascii=False, default=str)}"
+                for key, value in fields.items()
+            )
+        return text
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """队列已满时丢弃记录（计数）而不是阻塞调用方"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _make_stream(stream: Optional[TextIO]) -> TextIO:
+    """输出流（Windows 控制台使用 UTF-8，避免中文无法编码）"""
+    if stream is not None:
+        return stream
+    if sys.platform == "win32" and hasattr(sys.stderr, "buffer"):
+        return io.TextIOWrapper(sys.stderr.buffer, encoding="utf-8", errors="replace", line_buffering=True)
+    return sys.stderr
+
+
+def _start_listener(stream: TextIO, fmt: str):
+    """创建队列、处理器和后台输出线程"""
+    global _handler, _listener
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    log_queue: queue.Queue = queue.Queue(maxsize=QUEUE_SIZE)
+    _handler = _NonBlockingQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    logging.getLogger().addHandler(_handler)
+
+
+def _restart_after_fork():
+    """fork 出的子进程中没有后台输出线程，重新创建队列和线程"""
+    global _handler
+    if _handler is None:
+        return
+    root = logging.getLogger()
+    root.removeHandler(_handler)
+    output = _listener.handlers[0]
+    fmt = "json" if isinstance(output.formatter, JsonFormatter) else "text"
+    _start_listener(output.stream, fmt)
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, stream: Optional[TextIO] = None) -> bool:
+    """
+    配置根日志器（重复调用时不重复配置）
+
+    Args:
+        level: 日志级别，默认读取环境变量 LOG_LEVEL（默认 INFO）
+        fmt: text 或 json，默认读取环境变量 LOG_FORMAT（默认 text）
+        stream: 输出流（默认 stderr）
+
+    Returns:
+        本次调用是否进行了配置
+    """
+    global _fork_hook_registered
+    with _lock:
+        if _handler is not None:
+            return False
+        level = (level or os.environ.get("LOG_LEVEL") or "INFO").upper()
+        fmt = (fmt or os.environ.get("LOG_FORMAT") or "text").lower()
+        logging.getLogger().setLevel(level)
+        _start_listener(_make_stream(stream), fmt)
+        if not _fork_hook_registered and hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_restart_after_fork)
+            _fork_hook_registered = True
+        return True
+
+
+def shutdown_logging():
+    """输出队列中剩余的记录并移除处理器"""
+    global _handler, _listener
+    with _lock:
+        if _handler is None:
+            return
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        _handler = _listener = None
+
+
+def dropped_records() -> int:
+    """队列已满被丢弃的记录数"""
+    return _handler.dropped if _handler is not None else 0
+
+
+atexit.register(shutdown_logging)
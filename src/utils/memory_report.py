@@ -0,0 +1,160 @@
+"""
+知识库内存统计
+按对象图估算每个问题的原始数据、展开 refer 后的问题树和序列化结果的大小，以及树缓存占用的内存
+
+共享对象只统计一次：先统计所有问题的原始数据，问题树只统计原始数据之外新增的对象（树节点、子项列表、路径等），
+因此原始数据和树缓存之和就是知识库实际占用的内存。未缓存的问题树临时构建后统计（表示缓存后会增加的内存），
+统计完即释放，不写入缓存；统计过程不修改快照，可以在生产环境中按需执行。
+"""
+
+import dataclasses
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+from ..models.checklist import TreeChecklistItem
+
+_SCALAR_SINGLETONS = (type(None), bool)
+_CONTAINERS = (list, tuple, set, frozenset)
+# 实例属性值数组（Python 3.11 起数据类实例的属性不再单独占用 dict）的估算：每个字段一个指针加固定开销
+_INSTANCE_VALUES_OVERHEAD = 32
+_POINTER_SIZE = 8
+
+SORT_KEYS = ("treeBytes", "serializedBytes", "expandedNodes", "rawBytes")
+
+
+def deep_sizeof(obj, seen: Set[int], shared: Optional[Set[int]] = None) -> int:
+    """
+    估算对象及其引用的所有对象占用的内存（字节），已在 seen 中的对象不重复统计
+
+    不读取实例的 __dict__（读取会让 Python 为每个实例创建 dict，统计本身就会增加内存）
+
+    Args:
+        obj: 要统计的对象
+        seen: 已统计的对象 id，统计过程中会加入新统计的对象
+        shared: 已统计且不需要加入 seen 的对象 id（只读）
+
+    Returns:
+        新统计的对象的总大小
+    """
+    total = 0
+    stack = [obj]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, _SCALAR_SINGLETONS) or id(current) in seen or (shared and id(current) in shared):
+            continue
+        if type(current) is int and -5 <= current <= 256:
+            continue  # 小整数是解释器共享的缓存对象
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, (str, bytes, int, float)):
+            continue
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, _CONTAINERS):
+            stack.extend(current)
+        elif dataclasses.is_dataclass(current):
+            fields = dataclasses.fields(current)
+            total += _INSTANCE_VALUES_OVERHEAD + _POINTER_SIZE * len(fields)
+            stack.extend(getattr(current, f.name) for f in fields)
+        else:
+            for name in getattr(type(current), "__slots__", ()):
+                if hasattr(current, name):
+                    stack.append(getattr(current, name))
+    return total
+
+
+def count_tree_nodes(tree: TreeChecklistItem) -> int:
+    """问题树中的节点数（包括根节点）"""
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def build_memory_report(snapshot, serialize: Optional[Callable[[TreeChecklistItem], bytes]] = None,
+                        top: int = 20, sort: str = "treeBytes") -> Dict:
+    """
+    统计快照的内存占用
+
+    Args:
+        snapshot: 知识库快照
+        serialize: 序列化问题树的函数（用于统计响应大小），不传时不统计
+        top: 返回占用最多的前 top 个问题（0 表示全部）
+        sort: 排序字段（见 SORT_KEYS）
+
+    Returns:
+        报告字典（合计、树缓存和按 sort 排序的问题列表）
+    """
+    started = time.perf_counter()
+    issues = snapshot.data_loader.issues
+    tree_builder = snapshot.tree_builder
+    cached_trees = dict(tree_builder.built_trees)
+    cached_indexes = dict(tree_builder.tree_indexes)
+    seen: Set[int] = set()
+
+    rows: List[Dict] = []
+    for name, issue in issues.items():
+        rows.append({
+            "issue": name,
+            "sourceFile": issue.file_name,
+            "rawItems": snapshot.catalog.entries[name].checklist_count if snapshot.catalog else None,
+            "rawBytes": deep_sizeof(issue, seen),
+            "cached": name in cached_trees
+        })
+
+    # 先统计缓存中的树和索引（它们一直存活，id 不会被复用）
+    cache_bytes = 0
+    cache_nodes = 0
+    for row in rows:
+        tree = cached_trees.get(row["issue"])
+        if tree is not None:
+            row["treeBytes"] = deep_sizeof(tree, seen)
+            cache_bytes += row["treeBytes"]
+    index_bytes = sum(deep_sizeof(index, seen) for index in cached_indexes.values())
+
+    for row in rows:
+        name = row["issue"]
+        tree = cached_trees.get(name)
+        if tree is None:
+            tree = tree_builder.build_uncached_tree(name)
+            if tree is None:
+                row.update(expandedNodes=0, treeBytes=0, serializedBytes=0)
+                continue
+            # 临时构建的树统计完即释放，使用单独的集合，避免释放后复用的 id 被误认为已统计
+            row["treeBytes"] = deep_sizeof(tree, set(), shared=seen)
+        row["expandedNodes"] = count_tree_nodes(tree)
+        row["serializedBytes"] = len(serialize(tree)) if serialize else None
+        if row["cached"]:
+            cache_nodes += row["expandedNodes"]
+
+    sort_key = sort if sort in SORT_KEYS else "treeBytes"
+    rows.sort(key=lambda row: row[sort_key] or 0, reverse=True)
+
+    return {
+        "version": snapshot.version,
+        "measuredAt": time.time(),
+        "durationMs": round((time.perf_counter() - started) * 1000, 2),
+        "totals": {
+            "issues": len(rows),
+            "rawBytes": sum(row["rawBytes"] for row in rows),
+            "expandedNodes": sum(row["expandedNodes"] for row in rows),
+            "treeBytes": sum(row["treeBytes"] for row in rows),
+            "serializedBytes": sum(row["serializedBytes"] or 0 for row in rows) if serialize else None
+        },
+        "treeCache": {
+            "trees": len(cached_trees),
+            "nodes": cache_nodes,
+            "treeBytes": cache_bytes,
+            "indexes": len(cached_indexes),
+            "indexBytes": index_bytes,
+            "totalBytes": cache_bytes + index_bytes
+        },
+        "sort": sort_key,
+        "issues": rows[:top] if top > 0 else rows
+    }
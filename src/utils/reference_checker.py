@@ -72,6 +72,9 @@ class ReferenceChecker:
         """递归收集所有被refer引用的问题"""
         for item in checklist_items:
             if hasattr(item, 'refer') and item.refer:
+                # 已收集过的引用不再展开，避免循环引用导致无限递归
+                if item.refer in referenced:
+                    continue
                 referenced.add(item.refer)
                 if item.refer in self.issues:
                     ref_issue = self.issues[item.refer]
@@ -0,0 +1,291 @@
+"""
+全文检索索引
+对所有问题及其嵌套检查项的 status、describe、todo 建立倒排索引
+中文按字符 n-gram 切分，英文/数字按单词切分
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..models.checklist import ChecklistItem, Issue
+
+# 中日韩统一表意文字（含扩展A和兼容区）
+_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+# 各字段权重：标题命中比描述和解决方案更重要
+FIELDS = ("status", "describe", "todo")
+FIELD_WEIGHTS = (3.0, 1.5, 1.0)
+_TF_SATURATION = 1.2
+_PHRASE_BOOST = 1.5
+_SNIPPET_RADIUS = 30
+
+
+def tokenize(text: str, for_query: bool = False) -> List[str]:
+    """
+    文本切分
+
+    英文和数字按单词切分（统一小写）；中文连续片段切分为单字和双字 n-gram。
+    查询时长度不小于 2 的中文片段只使用双字 n-gram，减少噪声匹配。
+
+    Args:
+        text: 待切分文本
+        for_query: 是否为查询语句
+
+    Returns:
+        token 列表（可能重复）
+    """
+    if not text:
+        return []
+
+    lowered = text.lower()
+    tokens = _WORD.findall(lowered)
+
+    for run in _CJK_RUN.findall(lowered):
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        if not for_query:
+            tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+
+    return tokens
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    """索引中的单个文档（一个问题或一个检查项）"""
+    issue: str  # 所属问题名称
+    path: Tuple[str, ...]  # 从问题到该节点的路径
+    source_file: str  # 来源yml文件
+    priority: int  # 优先级
+    texts: Tuple[str, str, str]  # status, describe, todo 原文
+
+    @property
+    def node_id(self) -> str:
+        """节点ID（与树形结构序列化中的 id 一致）"""
+        return "_".join(self.path)
+
+
+class SearchIndex:
+    """倒排索引（支持按问题增量更新）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_doc_id = 0
+        self._docs: Dict[int, SearchDocument] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}  # 文档包含的去重 token，用于删除
+        self._postings: Dict[str, Dict[int, Tuple[int, int, int]]] = {}  # token -> {文档: 各字段词频}
+        self._issue_docs: Dict[str, List[int]] = {}
+        self._owned_terms: Set[str] = set()  # 倒排表属于本索引（未与其它索引共享）的 token
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __getstate__(self):
+        # 锁不能序列化（用于编译后的快照文件）
+        with self._lock:
+            state = dict(self.__dict__)
+        del state["_lock"], state["_owned_terms"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._owned_terms = set(self._postings)  # 反序列化得到的倒排表不与其它索引共享
+
+    def derive(self, issues: Dict[str, Issue], changed: Iterable[str]) -> 'SearchIndex':
+        """
+        生成只重新索引了发生变化的问题的新索引（本索引不受影响）
+
+        新索引与本索引共享文档对象和未变化 token 的倒排表，只有被修改的 token
+        才复制倒排表（写时复制），耗时与变化的问题成正比，而不是与整个索引成正比
+
+        Args:
+            issues: 最新的问题名称到问题对象的映射
+            changed: 新增、删除或内容发生变化的问题名称（由调用方根据内容摘要计算）
+        """
+        other = SearchIndex()
+        with self._lock:
+            other._next_doc_id = self._next_doc_id
+            other._docs = dict(self._docs)
+            other._doc_terms = dict(self._doc_terms)
+            other._postings = dict(self._postings)
+            other._issue_docs = dict(self._issue_docs)
+            # 倒排表从此与新索引共享，本索引之后的修改也必须先复制
+            self._owned_terms.clear()
+
+        other.update(issues, changed)
+        other._owned_terms.clear()
+        return other
+
+    def update(self, issues: Dict[str, Issue], changed: Optional[Iterable[str]] = None):
+        """
+        原地更新索引
+
+        Args:
+            issues: 问题名称到问题对象的映射
+            changed: 需要重新索引的问题名称，不传时索引 issues 中的所有问题
+        """
+        with self._lock:
+            for name in (issues if changed is None else changed):
+                self._remove_issue(name)
+                if name in issues:
+                    self._add_issue(issues[name])
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        检索并按相关度排序
+
+        Args:
+            query: 查询语句
+            limit: 最多返回的结果数量
+
+        Returns:
+            结果字典列表（包含节点路径、命中字段和摘要）
+        """
+        terms = list(dict.fromkeys(tokenize(query, for_query=True)))
+        if not terms or limit <= 0:
+            return []
+
+        phrase = query.strip().lower()
+
+        with self._lock:
+            total_docs = len(self._docs) or 1
+            scores: Dict[int, float] = {}
+            matched: Counter = Counter()
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + total_docs / len(postings))
+                for doc_id, tfs in postings.items():
+                    weight = sum(
+                        w * tf / (tf + _TF_SATURATION)
+                        for w, tf in zip(FIELD_WEIGHTS, tfs) if tf
+                    )
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+                    matched[doc_id] += 1
+
+            ranked = []
+            for doc_id, score in scores.items():
+                doc = self._docs[doc_id]
+                coverage = matched[doc_id] / len(terms)
+                score *= coverage * coverage
+                if len(phrase) > 1 and any(phrase in text.lower() for text in doc.texts):
+                    score *= _PHRASE_BOOST
+                ranked.append((score, doc.priority, -doc_id, doc))
+
+        top = heapq.nlargest(limit, ranked)
+        return [self._to_result(doc, score, terms, phrase) for score, _, _, doc in top]
+
+    def _add_issue(self, issue: Issue):
+        """为问题及其所有嵌套检查项建立索引"""
+        doc_ids = []
+        root_path = (issue.status,)
+        doc_ids.append(self._add_document(SearchDocument(
+            issue=issue.status,
+            path=root_path,
+            source_file=issue.file_name,
+            priority=issue.priority,
+            texts=(issue.status, issue.describe or "", "")
+        )))
+
+        stack: List[Tuple[ChecklistItem, Tuple[str, ...]]] = [
+            (item, root_path) for item in issue.checklist
+        ]
+        while stack:
+            item, parent_path = stack.pop()
+            # refer 项只是指向其它问题的引用，内容在被引用问题中索引
+            if item.refer:
+                continue
+
+            path = parent_path + (item.status,)
+            doc_ids.append(self._add_document(SearchDocument(
+                issue=issue.status,
+                path=path,
+                source_file=issue.file_name,
+                priority=item.priority,
+                texts=(item.status, item.describe or "", item.todo or "")
+            )))
+            if item.checklist:
+                stack.extend((child, path) for child in item.checklist)
+
+        self._issue_docs[issue.status] = doc_ids
+
+    def _add_document(self, doc: SearchDocument) -> int:
+        """添加单个文档，返回文档编号"""
+        doc_id = self._next_doc_id
+        self._next_doc_id += 1
+
+        field_counts = [Counter(tokenize(text)) for text in doc.texts]
+        terms = set().union(*field_counts)
+        for term in terms:
+            self._writable_postings(term)[doc_id] = tuple(
+                counts.get(term, 0) for counts in field_counts
+            )
+
+        self._docs[doc_id] = doc
+        self._doc_terms[doc_id] = tuple(terms)
+        return doc_id
+
+    def _remove_issue(self, name: str):
+        """删除问题的所有文档"""
+        for doc_id in self._issue_docs.pop(name, []):
+            for term in self._doc_terms.pop(doc_id, ()):
+                if term not in self._postings:
+                    continue
+                postings = self._writable_postings(term)
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+            self._docs.pop(doc_id, None)
+
+    def _writable_postings(self, term: str) -> Dict[int, Tuple[int, int, int]]:
+        """获取可修改的倒排表，与其它索引共享时先复制"""
+        postings = self._postings.get(term)
+        if postings is None or term not in self._owned_terms:
+            postings = dict(postings or {})
+            self._postings[term] = postings
+            self._owned_terms.add(term)
+        return postings
+
+    @staticmethod
+    def _to_result(doc: SearchDocument, score: float, terms: List[str], phrase: str) -> Dict:
+        """转换为接口返回的结果字典"""
+        field, snippet = SearchIndex._best_snippet(doc, terms, phrase)
+        return {
+            "id": doc.node_id,
+            "issue": doc.issue,
+            "title": doc.path[-1],
+            "path": list(doc.path),
+            "sourceFile": doc.source_file,
+            "priority": doc.priority,
+            "field": field,
+            "snippet": snippet,
+            "score": round(score, 4)
+        }
+
+    @staticmethod
+    def _best_snippet(doc: SearchDocument, terms: List[str], phrase: str) -> Tuple[Optional[str], str]:
+        """找到首个命中的字段并截取命中位置附近的摘要"""
+        needles = [phrase] + terms if phrase else terms
+        for field, text in zip(FIELDS, doc.texts):
+            lowered = text.lower()
+            for needle in needles:
+                pos = lowered.find(needle)
+                if pos < 0:
+                    continue
+                start = max(0, pos - _SNIPPET_RADIUS)
+                end = min(len(text), pos + len(needle) + _SNIPPET_RADIUS)
+                snippet = text[start:end].replace("\n", " ").strip()
+                prefix = "…" if start > 0 else ""
+                suffix = "…" if end < len(text) else ""
+                return field, f"{prefix}{snippet}{suffix}"
+        return None, doc.texts[0]
@@ -0,0 +1,375 @@
+"""
+排查会话存储
+在服务端保存排查过程中的导航、排除和确认状态（与 StateManager 的交互逻辑一致），
+每个会话只保存节点编号和位集合，按空闲时间和内存上限淘汰
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .tree_index import TreeIndex
+from .metrics import REGISTRY
+
+SESSION_EVICTIONS = REGISTRY.counter("api_session_evictions_total", "排查会话淘汰次数", ("reason",))
+
+# 会话在存储字典中的固定开销估算（字典条目、OrderedDict 链表节点）
+_ENTRY_OVERHEAD = 160
+# 恢复令牌签名长度（HMAC-SHA256 截断，字节）
+_SIGNATURE_BYTES = 16
+
+
+class TroubleshootingSession:
+    """一个排查会话（状态只保存节点编号，树由所属快照共享）"""
+
+    __slots__ = ("session_id", "index", "path", "excluded", "confirmed", "confirmed_item", "last_access")
+
+    def __init__(self, session_id: str, index: TreeIndex):
+        self.session_id = session_id
+        self.index = index
+        self.path: Tuple[int, ...] = (0,)  # 从根节点到当前节点的编号路径
+        self.excluded = 0  # 已排除节点的位集合
+        self.confirmed = 0  # 已确认节点的位集合（只记录有子项的节点）
+        self.confirmed_item = -1  # 当前显示解决方案的已确认节点，-1 表示没有
+        self.last_access = time.monotonic()
+
+    @property
+    def issue_name(self) -> str:
+        return self.index.issue_name
+
+    @property
+    def current(self) -> int:
+        """当前节点编号"""
+        return self.path[-1]
+
+    def navigate(self, position: int):
+        """导航到指定节点，并重置该节点直接子项的排除和确认状态"""
+        self.path = self.index.ancestry(position)
+        self.confirmed_item = -1
+        mask = 0
+        for child in self.index.children[position]:
+            mask |= 1 << child
+        self.excluded &= ~mask
+        self.confirmed &= ~mask
+
+    def back(self) -> bool:
+        """返回上一级"""
+        if len(self.path) <= 1:
+            return False
+        self.path = self.path[:-1]
+        self.confirmed_item = -1
+        return True
+
+    def toggle_exclude(self, position: int) -> bool:
+        """排除检查项，已排除时撤销排除
+
+        Returns:
+            操作后是否处于排除状态
+        """
+        self.excluded ^= 1 << position
+        return bool(self.excluded >> position & 1)
+
+    def confirm(self, position: int):
+        """确认检查项并进入该节点（有子项的节点记录确认状态）"""
+        if self.index.children[position]:
+            self.confirmed |= 1 << position
+        self.path = self.index.ancestry(position)
+        self.confirmed_item = position
+
+    def item_state(self, position: int) -> str:
+        """检查项状态：excluded / confirmed / pending"""
+        if self.excluded >> position & 1:
+            return "excluded"
+        if self.confirmed >> position & 1:
+            return "confirmed"
+        return "pending"
+
+    def excluded_positions(self) -> List[int]:
+        """已排除的节点编号"""
+        return _bit_positions(self.excluded)
+
+    def migrate(self, index: TreeIndex):
+        """
+        迁移到重新加载后的问题树（按节点ID对应，已不存在的节点丢弃）
+
+        Args:
+            index: 新快照中同一问题的节点索引
+        """
+        old = self.index
+        self.index = index
+        self._restore(
+            current=old.node_ids[self.current],
+            excluded=[old.node_ids[i] for i in _bit_positions(self.excluded)],
+            confirmed=[old.node_ids[i] for i in _bit_positions(self.confirmed)],
+            confirmed_item=old.node_ids[self.confirmed_item] if self.confirmed_item >= 0 else None
+        )
+
+    def to_resume_token(self, secret: bytes) -> str:
+        """
+        导出恢复令牌（节点ID形式，不依赖进程和快照）
+
+        多进程部署时会话只保存在创建它的工作进程中，请求落到其它进程或会话已被淘汰时，
+        客户端带上最近一次收到的令牌即可恢复会话。令牌包含会话ID并用 secret 签名，
+        客户端不能修改状态，也不能用于恢复其它ID的会话
+
+        Args:
+            secret: 签名密钥（所有工作进程相同）
+        """
+        ids = self.index.node_ids
+        state = {
+            "s": self.session_id,
+            "i": self.issue_name,
+            "c": ids[self.current],
+            "x": [ids[i] for i in _bit_positions(self.excluded)],
+            "k": [ids[i] for i in _bit_positions(self.confirmed)],
+            "f": ids[self.confirmed_item] if self.confirmed_item >= 0 else None
+        }
+        raw = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return f"{_b64encode(raw)}.{_b64encode(_sign(secret, raw))}"
+
+    @classmethod
+    def from_resume_token(cls, session_id: str, token: str, resolve_index: Callable[[str], Optional[TreeIndex]],
+                          secret: bytes) -> Optional['TroubleshootingSession']:
+        """从恢复令牌重建会话，令牌无效（签名错误、不属于该会话）或问题已不存在时返回 None"""
+        state = _decode_resume_token(token, session_id, secret)
+        index = resolve_index(state["i"]) if state else None
+        if index is None:
+            return None
+
+        session = cls(session_id, index)
+        session._restore(
+            current=state.get("c"),
+            excluded=state.get("x") or [],
+            confirmed=state.get("k") or [],
+            confirmed_item=state.get("f")
+        )
+        return session
+
+    def estimate_size(self) -> int:
+        """估算会话占用的内存（字节，不含共享的树和索引）"""
+        return (
+            sys.getsizeof(self) + sys.getsizeof(self.session_id) + sys.getsizeof(self.path)
+            + sys.getsizeof(self.excluded) + sys.getsizeof(self.confirmed) + _ENTRY_OVERHEAD
+        )
+
+    def _restore(self, current: Optional[str], excluded: List[str], confirmed: List[str],
+                 confirmed_item: Optional[str]):
+        """按节点ID恢复状态"""
+        position = self.index.position(current) if isinstance(current, str) else None
+        self.path = self.index.ancestry(position if position is not None else 0)
+        self.excluded = _to_bits(self.index, excluded)
+        self.confirmed = _to_bits(self.index, confirmed)
+        item = self.index.position(confirmed_item) if isinstance(confirmed_item, str) else None
+        self.confirmed_item = item if item is not None else -1
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(secret: bytes, raw: bytes) -> bytes:
+    return hmac.new(secret, raw, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+def _decode_resume_token(token: str, session_id: str, secret: bytes) -> Optional[Dict]:
+    """校验签名并解码恢复令牌，令牌无效或不属于该会话时返回 None"""
+    payload, _, signature = token.partition(".")
+    try:
+        raw = _b64decode(payload)
+        if not hmac.compare_digest(_b64decode(signature), _sign(secret, raw)):
+            return None
+        state = json.loads(raw.decode("utf-8"))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(state, dict) or not isinstance(state.get("i"), str) or state.get("s") != session_id:
+        return None
+    return state
+
+
+def _bit_positions(bits: int) -> List[int]:
+    """位集合中为 1 的位置"""
+    positions = []
+    while bits:
+        lowest = bits & -bits
+        positions.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return positions
+
+
+def _to_bits(index: TreeIndex, node_ids: List[str]) -> int:
+    """节点ID列表转换为位集合（忽略不存在的节点）"""
+    bits = 0
+    for node_id in node_ids:
+        position = index.position(node_id) if isinstance(node_id, str) else None
+        if position is not None:
+            bits |= 1 << position
+    return bits
+
+
+class SessionStore:
+    """
+    进程内排查会话存储
+
+    按最近访问时间排序，超过空闲时间的会话在下次访问存储时清理，
+    会话数或估算内存超过上限时淘汰最久未访问的会话
+    """
+
+    def __init__(self, resolve_index: Callable[[str], Optional[TreeIndex]],
+                 ttl: float = 1800, max_sessions: int = 10000, max_bytes: int = 32 * 1024 * 1024,
+                 secret: Optional[bytes] = None):
+        """
+        Args:
+            resolve_index: 根据问题名称获取当前快照中问题树节点索引的函数
+            ttl: 空闲超时（秒）
+            max_sessions: 最大会话数
+            max_bytes: 会话状态的估算内存上限（字节）
+            secret: 恢复令牌签名密钥（多进程部署时所有进程必须相同；不指定时随机生成，只在本存储中有效）
+        """
+        self.resolve_index = resolve_index
+        self.secret = secret or secrets.token_bytes(32)
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, TroubleshootingSession]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def total_bytes(self) -> int:
+        """所有会话的估算内存（字节）"""
+        return self._total_bytes
+
+    def create(self, issue_name: str) -> Optional[TroubleshootingSession]:
+        """创建会话，问题不存在时返回 None"""
+        index = self.resolve_index(issue_name)
+        if index is None:
+            return None
+
+        session = TroubleshootingSession(secrets.token_urlsafe(12), index)
+        with self._lock:
+            self._put(session)
+        return session
+
+    def get(self, session_id: str, resume_token: Optional[str] = None) -> Optional[TroubleshootingSession]:
+        """
+        获取会话并刷新访问时间，问题树已重新加载时迁移到新树
+
+        Args:
+            session_id: 会话ID
+            resume_token: 会话不在本进程时用于恢复的令牌
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_access = now
+
+        if session is None:
+            if not resume_token:
+                return None
+            session = TroubleshootingSession.from_resume_token(
+                session_id, resume_token, self.resolve_index, self.secret
+            )
+            if session is None:
+                return None
+            with self._lock:
+                self._put(session)
+            return session
+
+        index = self.resolve_index(session.issue_name)
+        if index is None:
+            self.delete(session_id)
+            return None
+        if index is not session.index:
+            session.migrate(index)
+        return session
+
+    def peek_issue_name(self, session_id: str, resume_token: Optional[str] = None) -> Optional[str]:
+        """会话所属的问题名称（不刷新访问时间），用于在取出会话之前预先准备问题树"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                return session.issue_name
+        state = _decode_resume_token(resume_token, session_id, self.secret) if resume_token else None
+        return state["i"] if state else None
+
+    def resume_token(self, session: TroubleshootingSession) -> str:
+        """会话当前状态的签名恢复令牌"""
+        return session.to_resume_token(self.secret)
+
+    def touch(self, session: TroubleshootingSession):
+        """会话状态修改后重新计算内存占用，超过上限时淘汰"""
+        with self._lock:
+            if session.session_id in self._sessions:
+                self._resize(session)
+                self._enforce_limits()
+
+    def delete(self, session_id: str) -> bool:
+        """删除会话"""
+        with self._lock:
+            return self._remove(session_id) is not None
+
+    def get_stats(self) -> Dict:
+        """存储统计信息"""
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl
+            }
+
+    def _put(self, session: TroubleshootingSession):
+        self._remove(session.session_id)
+        self._sessions[session.session_id] = session
+        self._resize(session)
+        self._evict_expired(session.last_access)
+        self._enforce_limits()
+
+    def _resize(self, session: TroubleshootingSession):
+        size = session.estimate_size()
+        self._total_bytes += size - self._sizes.get(session.session_id, 0)
+        self._sizes[session.session_id] = size
+
+    def _remove(self, session_id: str) -> Optional[TroubleshootingSession]:
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._total_bytes -= self._sizes.pop(session_id)
+        return session
+
+    def _evict_expired(self, now: float):
+        """清理空闲超时的会话（按访问时间排序，只需检查队首）"""
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_access < self.ttl:
+                break
+            self._remove(session_id)
+            SESSION_EVICTIONS.inc("ttl")
+
+    def _enforce_limits(self):
+        """超过会话数或内存上限时淘汰最久未访问的会话（至少保留最新的一个）"""
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions or self._total_bytes > self.max_bytes
+        ):
+            session_id = next(iter(self._sessions))
+            self._remove(session_id)
+            SESSION_EVICTIONS.inc("capacity")
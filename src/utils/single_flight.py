@@ -0,0 +1,97 @@
+"""
+并发请求合并（single-flight）
+同一个键同时只执行一次，期间到达的相同请求等待并共享这一次的结果（或异常）
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from .metrics import REGISTRY
+
+SINGLE_FLIGHT_CALLS = REGISTRY.counter(
+    "single_flight_calls_total",
+    "合并执行的调用次数（role=leader 为实际执行，role=shared 为等待共享结果、节省的执行）",
+    ("group", "role")
+)
+
+
+class SingleFlight:
+    """线程间的请求合并（在执行调用的线程中运行）"""
+
+    def __init__(self, group: str):
+        """
+        Args:
+            group: 分组名称（指标标签）
+        """
+        self.group = group
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, func: Callable, *args) -> Any:
+        """
+        执行 func(*args)，同一个键已有调用在执行时等待其结果
+
+        Raises:
+            执行失败时，执行者和所有等待者都抛出同一个异常
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            SINGLE_FLIGHT_CALLS.inc(self.group, "shared")
+            return future.result()
+
+        SINGLE_FLIGHT_CALLS.inc(self.group, "leader")
+        try:
+            result = func(*args)
+        except BaseException as e:
+            self._finish(key)
+            future.set_exception(e)
+            raise
+        self._finish(key)
+        future.set_result(result)
+        return result
+
+    def _finish(self, key: Hashable):
+        # 先移除再发布结果，之后到达的请求重新执行（通常会命中调用方自己的缓存）
+        with self._lock:
+            del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """事件循环内的请求合并"""
+
+    def __init__(self, group: str):
+        """
+        Args:
+            group: 分组名称（指标标签）
+        """
+        self.group = group
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable]) -> Any:
+        """
+        执行 factory() 返回的协程，同一个键已有调用在执行时等待其结果
+
+        协程在独立的任务中执行，某个请求被取消（如客户端断开）不影响其它等待者
+        """
+        task = self._calls.get(key)
+        if task is None:
+            SINGLE_FLIGHT_CALLS.inc(self.group, "leader")
+            task = self._calls[key] = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            SINGLE_FLIGHT_CALLS.inc(self.group, "shared")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 所有等待者都已取消时，避免出现“异常未被读取”的警告
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,111 @@
+"""
+编译后的知识库快照文件
+离线编译时把解析、校验后的问题、问题目录和检索索引写入单个文件，
+服务启动时通过内存映射读取，不再解析 YAML
+
+文件格式:
+    魔数（8 字节）| 头部长度（4 字节，大端）| JSON 头部 | pickle 数据
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import time
+from typing import Any, Dict, Tuple
+
+MAGIC = b"KBSNAP\x00\x01"
+FORMAT_VERSION = 1
+_HEADER_LENGTH = struct.Struct(">I")
+
+
+class SnapshotFileError(Exception):
+    """快照文件格式错误或已损坏"""
+    pass
+
+
+def write_snapshot_file(path: str, header: Dict[str, Any], payload: Any) -> Dict[str, Any]:
+    """
+    写入快照文件（先写临时文件再重命名，正在读取旧文件的进程不受影响）
+
+    Args:
+        path: 输出文件路径
+        header: 头部信息（版本号等，读取时无需反序列化数据即可查看）
+        payload: 快照数据
+
+    Returns:
+        实际写入的头部（补充了格式版本、生成时间和数据摘要）
+    """
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    header = {
+        **header,
+        "formatVersion": FORMAT_VERSION,
+        "createdAt": time.time(),
+        "payloadBytes": len(data),
+        "payloadSha256": hashlib.sha256(data).hexdigest()
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        f.write(data)
+    os.replace(tmp_path, path)
+    return header
+
+
+def read_snapshot_header(path: str) -> Dict[str, Any]:
+    """只读取头部（不读取数据）"""
+    with open(path, "rb") as f:
+        prefix = f.read(len(MAGIC) + _HEADER_LENGTH.size)
+        header_length = _check_prefix(path, prefix)
+        return _parse_header(path, f.read(header_length))
+
+
+def read_snapshot_file(path: str) -> Tuple[Dict[str, Any], Any]:
+    """
+    通过内存映射读取快照文件并校验数据摘要
+
+    快照文件只应由 compile 命令生成（pickle 数据不能来自不可信的来源）
+
+    Returns:
+        (头部, 快照数据)
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        offset = len(MAGIC) + _HEADER_LENGTH.size
+        header_length = _check_prefix(path, mapped[:offset])
+        header = _parse_header(path, mapped[offset:offset + header_length])
+
+        view = memoryview(mapped)[offset + header_length:]
+        try:
+            if len(view) != header.get("payloadBytes") or hashlib.sha256(view).hexdigest() != header.get("payloadSha256"):
+                raise SnapshotFileError(f"快照文件已损坏: {path}")
+            payload = pickle.loads(view)
+        finally:
+            view.release()
+
+    return header, payload
+
+
+def _check_prefix(path: str, prefix: bytes) -> int:
+    """校验魔数并返回头部长度"""
+    if len(prefix) < len(MAGIC) + _HEADER_LENGTH.size or prefix[:len(MAGIC)] != MAGIC:
+        raise SnapshotFileError(f"不是知识库快照文件: {path}")
+    return _HEADER_LENGTH.unpack_from(prefix, len(MAGIC))[0]
+
+
+def _parse_header(path: str, header_bytes: bytes) -> Dict[str, Any]:
+    """解析头部并检查格式版本"""
+    try:
+        header = json.loads(bytes(header_bytes).decode("utf-8"))
+    except ValueError:
+        raise SnapshotFileError(f"快照文件头部已损坏: {path}")
+    if header.get("formatVersion") != FORMAT_VERSION:
+        raise SnapshotFileError(
+            f"快照文件格式版本 {header.get('formatVersion')} 与当前版本 {FORMAT_VERSION} 不兼容，请重新编译: {path}"
+        )
+    return header
@@ -0,0 +1,267 @@
+"""
+阶段耗时追踪
+在加载、树构建、序列化和页面渲染等主要阶段记录嵌套的耗时区间（span），同一请求的区间共享一个追踪 ID
+
+- span(name, **attrs): 上下文管理器，嵌套使用时自动记录父区间；未开启追踪时返回空操作对象，几乎没有开销
+- traced(name): 装饰器形式
+- 追踪 ID 通过 ContextVar 传递，线程池任务（WorkerPool 复制上下文）中的区间同样归属发起请求的追踪
+- 结束的区间写入 TraceRecorder：内存环形缓冲区（供管理接口查询），可选同时追加到 JSON Lines 文件（后台线程写入）
+
+环境变量:
+    KB_TRACE: 设为 1 时开启追踪
+    KB_TRACE_BUFFER: 环形缓冲区保留的区间数量（默认 5000）
+    KB_TRACE_FILE: 同时把区间追加写入的 JSON Lines 文件
+"""
+
+import functools
+import itertools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_BUFFER_SIZE = 5000
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("kb_trace_span", default=None)
+_trace_id: ContextVar[Optional[str]] = ContextVar("kb_trace_id", default=None)
+_span_ids = itertools.count(1)
+
+_recorder: Optional["TraceRecorder"] = None
+_configure_lock = threading.Lock()
+
+
+def new_trace_id() -> str:
+    """生成追踪 ID（16 位十六进制）"""
+    return secrets.token_hex(8)
+
+
+def current_trace_id() -> Optional[str]:
+    """当前上下文的追踪 ID"""
+    return _trace_id.get()
+
+
+def set_trace_id(trace_id: Optional[str]):
+    """设置当前上下文的追踪 ID（返回的令牌用于 reset_trace_id 恢复）"""
+    return _trace_id.set(trace_id)
+
+
+def reset_trace_id(token):
+    """恢复 set_trace_id 之前的追踪 ID"""
+    _trace_id.reset(token)
+
+
+class Span:
+    """一个耗时区间"""
+
+    __slots__ = ("recorder", "trace_id", "span_id", "parent_id", "name", "attrs",
+                 "start", "duration_ms", "_started", "_token")
+
+    def __init__(self, recorder: "TraceRecorder", name: str, attrs: Dict):
+        parent = _current_span.get()
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+        self.span_id = format(next(_span_ids), "x")
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else (_trace_id.get() or new_trace_id())
+        self.start = 0.0
+        self.duration_ms = 0.0
+
+    def set(self, **attrs):
+        """补充区间属性（如结束时才知道的结果大小）"""
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.recorder.export(self.to_dict())
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "durationMs": self.duration_ms,
+            "thread": threading.current_thread().name,
+            "attrs": self.attrs
+        }
+
+
+class _NoopSpan:
+    """未开启追踪时使用的空操作区间"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs):
+    """
+    创建耗时区间
+
+    Args:
+        name: 区间名称（如 build_tree、serialize.tree_to_dict）
+        **attrs: 区间属性（如 issue、file）
+
+    Returns:
+        上下文管理器，with 语句中得到的对象可用 set() 补充属性
+    """
+    recorder = _recorder
+    if recorder is None:
+        return _NOOP_SPAN
+    return Span(recorder, name, attrs)
+
+
+def traced(name: str) -> Callable:
+    """装饰器：函数的每次调用记录为一个区间"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _JsonLinesWriter:
+    """后台线程把区间追加写入 JSON Lines 文件，调用方不等待 I/O"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="kb-trace-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, record: Dict):
+        self._queue.put(record)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                record = self._queue.get()
+                if record is None:
+                    return
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+
+class TraceRecorder:
+    """保存结束的区间：内存环形缓冲区，可选同时写入 JSON Lines 文件"""
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE, file: Optional[str] = None):
+        self._spans: deque = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._writer = _JsonLinesWriter(file) if file else None
+        self.file = file
+
+    def export(self, record: Dict):
+        with self._lock:
+            self._spans.append(record)
+        if self._writer is not None:
+            self._writer.write(record)
+
+    def spans(self, trace_id: Optional[str] = None) -> List[Dict]:
+        """缓冲区中的区间（指定追踪 ID 时只返回该追踪的区间），按开始时间排序"""
+        with self._lock:
+            records = list(self._spans)
+        if trace_id is not None:
+            records = [record for record in records if record["traceId"] == trace_id]
+        return sorted(records, key=lambda record: record["start"])
+
+    def traces(self, limit: int = 20) -> List[Dict]:
+        """
+        最近的追踪摘要（最新的在前）
+
+        Returns:
+            每个追踪的根区间名称、属性、开始时间、总耗时和区间数量
+        """
+        with self._lock:
+            records = list(self._spans)
+        summaries: Dict[str, Dict] = {}
+        for record in records:
+            summary = summaries.setdefault(record["traceId"], {
+                "traceId": record["traceId"], "name": None, "attrs": {}, "start": record["start"],
+                "durationMs": 0.0, "spans": 0
+            })
+            summary["spans"] += 1
+            summary["start"] = min(summary["start"], record["start"])
+            if record["parentId"] is None and record["durationMs"] >= summary["durationMs"]:
+                summary.update(name=record["name"], attrs=record["attrs"], durationMs=record["durationMs"])
+        return sorted(summaries.values(), key=lambda summary: summary["start"], reverse=True)[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def configure_tracing(buffer_size: int = DEFAULT_BUFFER_SIZE, file: Optional[str] = None) -> TraceRecorder:
+    """开启追踪（替换已有的记录器）"""
+    global _recorder
+    with _configure_lock:
+        previous, _recorder = _recorder, TraceRecorder(buffer_size, file)
+    if previous is not None:
+        previous.close()
+    return _recorder
+
+
+def configure_tracing_from_env() -> Optional[TraceRecorder]:
+    """根据环境变量开启追踪（已开启时返回现有的记录器）"""
+    if _recorder is not None:
+        return _recorder
+    if os.environ.get("KB_TRACE", "").lower() not in ("1", "true", "yes"):
+        return None
+    return configure_tracing(
+        buffer_size=int(os.environ.get("KB_TRACE_BUFFER") or DEFAULT_BUFFER_SIZE),
+        file=os.environ.get("KB_TRACE_FILE") or None
+    )
+
+
+def disable_tracing():
+    """关闭追踪"""
+    global _recorder
+    with _configure_lock:
+        previous, _recorder = _recorder, None
+    if previous is not None:
+        previous.close()
+
+
+def get_recorder() -> Optional[TraceRecorder]:
+    """当前的记录器（未开启追踪时为 None）"""
+    return _recorder
@@ -3,10 +3,17 @@
 处理refer引用和树形结构拼接
 """
 
+import logging
 from typing import Dict, Optional, List, Set
 
 from ..models.checklist import Issue, ChecklistItem, TreeChecklistItem
 from .data_loader import DataLoader
+from .tree_index import TreeIndex
+from .single_flight import SingleFlight
+from .metrics import TREE_CACHE_HITS, TREE_CACHE_MISSES
+from .tracing import span
+
+logger = logging.getLogger(__name__)
 
 
 class TreeBuilder:
@@ -15,52 +22,87 @@ class TreeBuilder:
     def __init__(self, data_loader: DataLoader):
         self.data_loader = data_loader
         self.built_trees: Dict[str, TreeChecklistItem] = {}
-        self.building_stack: Set[str] = set()  # 用于检测循环引用
+        self.tree_indexes: Dict[str, TreeIndex] = {}
+        self._build_flight = SingleFlight("tree_build")
 
     def build_complete_tree(self, root_issue_name: str) -> Optional[TreeChecklistItem]:
-        """构建完整的树形结构"""
+        """构建完整的树形结构（可在多个线程中并发调用，同一问题的并发构建只执行一次）"""
         # 检查缓存
-        if root_issue_name in self.built_trees:
-            return self.built_trees[root_issue_name]
-
-        # 检查循环引用
-        if root_issue_name in self.building_stack:
-            print(f"警告: 检测到循环引用: {' → '.join(list(self.building_stack) + [root_issue_name])}")
+        cached = self.built_trees.get(root_issue_name)
+        if cached is not None:
+            TREE_CACHE_HITS.inc()
+            return cached
+        TREE_CACHE_MISSES.inc()
+
+        return self._build_flight.do(root_issue_name, self._build_and_cache, root_issue_name)
+
+    def build_uncached_tree(self, root_issue_name: str) -> Optional[TreeChecklistItem]:
+        """构建树但不写入缓存（已缓存时直接返回缓存），用于一次性遍历所有问题的场景，避免缓存随知识库增长"""
+        cached = self.built_trees.get(root_issue_name)
+        if cached is not None:
+            return cached
+        return self._build_tree(root_issue_name)
+
+    def _build_and_cache(self, root_issue_name: str) -> Optional[TreeChecklistItem]:
+        """构建树并写入缓存"""
+        # 上一次构建可能在检查缓存之后刚好完成
+        cached = self.built_trees.get(root_issue_name)
+        if cached is not None:
+            return cached
+
+        root_tree = self._build_tree(root_issue_name)
+        if not root_tree:
             return None
 
+        # 缓存构建结果
+        return self.built_trees.setdefault(root_issue_name, root_tree)
+
+    def _build_tree(self, root_issue_name: str) -> Optional[TreeChecklistItem]:
+        """构建问题树（记录追踪区间）"""
+        with span("build_tree", issue=root_issue_name):
+            return self._build_root_tree(root_issue_name)
+
+    def _build_root_tree(self, root_issue_name: str) -> Optional[TreeChecklistItem]:
+        """构建问题树"""
         # 获取根问题
         root_issue = self.data_loader.get_issue_by_name(root_issue_name)
         if not root_issue:
-            print(f"错误: 未找到问题 '{root_issue_name}'")
+            logger.debug("未找到问题", extra={"issue": root_issue_name})
             return None
 
-        # 开始构建
-        self.building_stack.add(root_issue_name)
-        try:
-            # 构建根节点
-            root_tree = TreeChecklistItem(
-                status=root_issue.status,
-                describe=root_issue.describe,
-                priority=root_issue.priority,
-                version=root_issue.version,
-                todo="",  # 根问题没有todo
-                source_file=root_issue.file_name,
-                original_path=[root_issue.status],
-                is_refer=False
-            )
+        # 每次构建使用独立的引用栈检测循环引用，避免并发构建互相干扰
+        building_stack = {root_issue_name}
+
+        # 构建根节点
+        root_tree = TreeChecklistItem(
+            status=root_issue.status,
+            describe=root_issue.describe,
+            priority=root_issue.priority,
+            version=root_issue.version,
+            todo="",  # 根问题没有todo
+            source_file=root_issue.file_name,
+            original_path=[root_issue.status],
+            is_refer=False
+        )
 
-            # 递归构建子树
-            for item in root_issue.checklist:
-                child_tree = self._build_child_tree(item, root_issue.file_name, [root_issue.status])
-                if child_tree:
-                    root_tree.children.append(child_tree)
+        # 递归构建子树
+        for item in root_issue.checklist:
+            child_tree = self._build_child_tree(item, root_issue.file_name, [root_issue.status], building_stack)
+            if child_tree:
+                root_tree.children.append(child_tree)
 
-            # 缓存构建结果
-            self.built_trees[root_issue_name] = root_tree
-            return root_tree
+        return root_tree
 
-        finally:
-            self.building_stack.remove(root_issue_name)
+    def get_tree_index(self, root_issue_name: str) -> Optional[TreeIndex]:
+        """获取问题树的节点索引（与树一同缓存）"""
+        index = self.tree_indexes.get(root_issue_name)
+        if index is not None:
+            return index
+
+        tree = self.build_complete_tree(root_issue_name)
+        if not tree:
+            return None
+        return self.tree_indexes.setdefault(root_issue_name, TreeIndex(root_issue_name, tree))
 
     def find_node_by_path(self, root_tree: TreeChecklistItem, path: List[str]) -> Optional[TreeChecklistItem]:
         """根据路径查找树节点"""
@@ -83,6 +125,22 @@ class TreeBuilder:
 
         return current
 
+    def find_node_by_id(self, root_tree: TreeChecklistItem, node_id: str) -> Optional[TreeChecklistItem]:
+        """根据节点ID查找树节点（ID 为路径连接，只沿前缀匹配的分支向下查找）"""
+        if not node_id or not root_tree:
+            return None
+
+        stack = [root_tree]
+        while stack:
+            node = stack.pop()
+            current_id = node.get_node_id()
+            if current_id == node_id:
+                return node
+            if node_id.startswith(current_id + "_"):
+                stack.extend(node.children)
+
+        return None
+
     def get_all_referenced_issues(self, root_issue_name: str) -> List[str]:
         """获取所有被引用的问题"""
         root_issue = self.data_loader.get_issue_by_name(root_issue_name)
@@ -108,12 +166,13 @@ class TreeBuilder:
     def clear_cache(self):
         """清空构建缓存"""
         self.built_trees.clear()
-        self.building_stack.clear()
+        self.tree_indexes.clear()
 
-    def _build_child_tree(self, item: ChecklistItem, parent_file: str, path: List[str]) -> Optional[TreeChecklistItem]:
+    def _build_child_tree(self, item: ChecklistItem, parent_file: str, path: List[str],
+                          building_stack: Set[str]) -> Optional[TreeChecklistItem]:
         """构建子树"""
         if hasattr(item, 'refer') and item.refer:
-            return self._build_refer_tree(item.refer, parent_file, path)
+            return self._build_refer_tree(item.refer, parent_file, path, building_stack)
 
         # 处理普通项
         tree_item = TreeChecklistItem(
@@ -134,24 +193,33 @@ class TreeBuilder:
         if hasattr(item, 'checklist') and item.checklist:
             new_path = path + [item.status]
             for child_item in item.checklist:
-                child_tree = self._build_child_tree(child_item, parent_file, new_path)
+                child_tree = self._build_child_tree(child_item, parent_file, new_path, building_stack)
                 if child_tree:
                     tree_item.children.append(child_tree)
 
         return tree_item
 
-    def _build_refer_tree(self, refer_name: str, parent_file: str, path: List[str]) -> Optional[TreeChecklistItem]:
+    def _build_refer_tree(self, refer_name: str, parent_file: str, path: List[str],
+                          building_stack: Set[str]) -> Optional[TreeChecklistItem]:
+        """构建引用树（每个引用记录一个追踪区间，嵌套引用对应嵌套区间）"""
+        with span("build_refer", refer=refer_name):
+            return self._build_refer_subtree(refer_name, parent_file, path, building_stack)
+
+    def _build_refer_subtree(self, refer_name: str, parent_file: str, path: List[str],
+                             building_stack: Set[str]) -> Optional[TreeChecklistItem]:
         """构建引用树"""
-        if refer_name in self.building_stack:
-            print(f"警告: 在引用中检测到循环: {' → '.join(list(self.building_stack) + [refer_name])}")
+        if refer_name in building_stack:
+            # 同一处循环每次构建都会遇到（无效引用已在加载时的数据质量报告中输出），只在调试级别记录
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("在引用中检测到循环: %s", " → ".join(list(building_stack) + [refer_name]))
             return None
 
         refer_issue = self.data_loader.get_issue_by_name(refer_name)
         if not refer_issue:
-            print(f"警告: 未找到引用的问题 '{refer_name}'")
+            logger.debug("未找到引用的问题", extra={"issue": refer_name, "source_file": parent_file})
             return None
 
-        self.building_stack.add(refer_name)
+        building_stack.add(refer_name)
         try:
             new_path = path + [refer_name]
             refer_tree = TreeChecklistItem(
@@ -170,14 +238,14 @@ class TreeBuilder:
             )
 
             for item in refer_issue.checklist:
-                child_tree = self._build_child_tree(item, refer_issue.file_name, new_path)
+                child_tree = self._build_child_tree(item, refer_issue.file_name, new_path, building_stack)
                 if child_tree:
                     refer_tree.children.append(child_tree)
 
             return refer_tree
 
         finally:
-            self.building_stack.remove(refer_name)
+            building_stack.remove(refer_name)
 
     def validate_tree_structure(self, root_issue_name: str) -> List[str]:
         """验证树形结构的完整性"""
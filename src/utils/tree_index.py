@@ -0,0 +1,55 @@
+"""
+问题树节点索引
+按先序遍历给树中每个节点分配一个整数编号，会话等状态只需保存编号和位集合，
+不需要复制树或保存节点ID字符串
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from ..models.checklist import TreeChecklistItem
+
+
+class TreeIndex:
+    """一棵已构建问题树的只读节点索引（编号 0 为根节点）"""
+
+    __slots__ = ("issue_name", "nodes", "node_ids", "parents", "children", "_positions")
+
+    def __init__(self, issue_name: str, root: TreeChecklistItem):
+        self.issue_name = issue_name
+        self.nodes: List[TreeChecklistItem] = []
+        self.node_ids: List[str] = []
+        self.parents: List[int] = []
+        self.children: List[Tuple[int, ...]] = []
+
+        # 先序遍历，父节点编号总是小于子节点
+        stack = [(root, -1)]
+        child_lists: List[List[int]] = []
+        while stack:
+            node, parent = stack.pop()
+            position = len(self.nodes)
+            self.nodes.append(node)
+            self.node_ids.append(node.get_node_id())
+            self.parents.append(parent)
+            child_lists.append([])
+            if parent >= 0:
+                child_lists[parent].append(position)
+            for child in reversed(node.children):
+                stack.append((child, position))
+
+        self.children = [tuple(items) for items in child_lists]
+        self._positions: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.node_ids)}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def position(self, node_id: str) -> Optional[int]:
+        """节点ID对应的编号，不存在时返回 None"""
+        return self._positions.get(node_id)
+
+    def ancestry(self, position: int) -> Tuple[int, ...]:
+        """从根节点到指定节点的编号路径"""
+        path = []
+        while position >= 0:
+            path.append(position)
+            position = self.parents[position]
+        return tuple(reversed(path))
@@ -3,9 +3,9 @@
  * 管理排查系统的全局状态和操作
  */
 
-import { useState, useCallback, useMemo } from 'react';
+import { useState, useCallback, useMemo, useEffect, useRef } from 'react';
 import type { CheckItem, ItemState } from '../types/knowledge-base';
-import { knowledgeApi, type IssueSummary } from '../services/api';
+import { knowledgeApi, subscribeVersionEvents, type IssueSummary } from '../services/api';
 
 /**
  * 应用状态管理 Hook
@@ -117,6 +117,45 @@ export function useAppState() {
     }
   }, []);
 
+  // ===== 知识库更新 =====
+
+  // 订阅回调中读取最新的选中问题
+  const selectedIssueRef = useRef<CheckItem | null>(null);
+  selectedIssueRef.current = selectedIssue;
+
+  /**
+   * 知识库重新加载后只重新获取发生变化的数据
+   * 保留仍然存在的导航路径，排除和确认状态按节点 ID 保留
+   */
+  useEffect(() => {
+    return subscribeVersionEvents(async (event) => {
+      // 首次连接只告知当前版本
+      if (event.previousVersion === null) return;
+      if (!event.full && event.changedIssues.length === 0) return;
+
+      try {
+        setIssues(await knowledgeApi.getIssuesSummary());
+
+        const current = selectedIssueRef.current;
+        if (!current || (!event.full && !event.changedIssues.includes(current.id))) return;
+
+        const tree = await knowledgeApi.getIssueTree(current.id);
+        setSelectedIssue(tree);
+        setCurrentPath(path => {
+          const kept: string[] = [];
+          for (const id of path) {
+            if (!findNodeById(id, tree)) break;
+            kept.push(id);
+          }
+          return kept.length > 0 ? kept : [tree.id];
+        });
+        setConfirmedItem(item => (item ? findNodeById(item.id, tree) : null));
+      } catch (err) {
+        console.error('知识库更新后刷新数据失败:', err);
+      }
+    });
+  }, [findNodeById]);
+
   // ===== 导航操作 =====
 
   /**
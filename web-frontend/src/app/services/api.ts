@@ -140,6 +140,37 @@ export const knowledgeApi = {
   },
 };
 
+/**
+ * 知识库版本变化事件（/api/events 推送）
+ */
+export interface VersionEvent {
+  version: string;
+  previousVersion: string | null;  // 首次连接时为 null
+  loadedAt: number;
+  changedIssues: string[];         // 发生变化的问题名称（即树根节点 id）
+  full: boolean;                   // 无法确定变化范围，需要全部重新获取
+}
+
+/**
+ * 订阅知识库版本变化
+ * 断线后浏览器自动重连，并通过 Last-Event-ID 补发断线期间的变化
+ * @param onVersion 收到版本事件时的回调
+ * @returns 取消订阅函数
+ */
+export function subscribeVersionEvents(onVersion: (event: VersionEvent) => void): () => void {
+  const source = new EventSource(`${API_BASE_URL}/api/events`);
+
+  source.addEventListener('version', (message) => {
+    try {
+      onVersion(JSON.parse((message as MessageEvent).data));
+    } catch (error) {
+      console.error('解析版本事件失败:', error);
+    }
+  });
+
+  return () => source.close();
+}
+
 /**
  * API 辅助函数：检查 API 是否可用
  */